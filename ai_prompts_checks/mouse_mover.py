@@ -1,5 +1,8 @@
+import heapq
+import itertools
+import sys
+import threading
 import time
-import pyautogui
 from pathlib import Path
 
 # Constants
@@ -11,13 +14,13 @@ MAX_INTERVAL = 3600  # Maximum allowed interval in seconds
 DEFAULT_INTERVAL = 60  # Default interval in seconds
 
 
-def load_env():
+def load_env(path=".env"):
     """
     Reads the MOVE_INTERVAL value from a .env file.
     If the file or the variable is not found, it defaults to 60 seconds.
     Only reads lines starting with 'MOVE_INTERVAL=' to ensure correct parsing.
     """
-    env_file = Path(".env")
+    env_file = Path(path)
 
     # Check if .env file exists
     if not env_file.exists():
@@ -94,19 +97,269 @@ def validate_interval(interval):
     return interval
 
 
+class EnvConfig:
+    """
+    The MOVE_INTERVAL setting of a .env file, reloaded only when the file's modification time
+    changes. Checking costs one stat() call, so it can be done on every tick.
+    """
+
+    def __init__(self, path=".env"):
+        self.path = Path(path)
+        self._mtime = None
+        self._interval = None
+
+    def _current_mtime(self):
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None  # Missing; reloaded (with the default) only once until it appears
+
+    def interval(self):
+        """
+        Returns the validated interval, re-reading the file first if it changed.
+        """
+        mtime = self._current_mtime()
+        if self._interval is None or mtime != self._mtime:
+            previous = self._interval
+            self._mtime = mtime
+            self._interval = validate_interval(load_env(self.path))
+            if previous is not None and previous != self._interval:
+                print(f"Reloaded {self.path}: moving every {self._interval} seconds.")
+        return self._interval
+
+
+class Job:
+    """
+    A periodic job in a Scheduler.
+    """
+
+    def __init__(self, func, interval, name):
+        self.func = func
+        self.interval = interval  # May be changed at any time; applies from the next run
+        self.name = name
+        self.next_run = 0.0
+        self.cancelled = False
+        self.runs = 0
+        self.missed = 0  # Runs skipped because the process was suspended or blocked too long
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+
+    @property
+    def mean_lateness(self):
+        return self.total_lateness / self.runs if self.runs else 0.0
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """
+    Runs periodic jobs on absolute deadlines of the monotonic clock.
+
+    Each run is scheduled at the previous deadline plus the interval, not at "now" plus the
+    interval, so the time the jobs themselves take does not accumulate as drift. All jobs share
+    one heap ordered by deadline, and the thread sleeps until the earliest one: one wake-up per
+    run, however many jobs there are.
+
+    When a deadline is missed by whole intervals (e.g. the machine was asleep), the missed runs are
+    skipped instead of being run in a burst.
+
+    The clock and sleep function can be replaced, e.g. with fakes in tests.
+    """
+
+    def __init__(self, clock=time.monotonic, sleep=None):
+        self._clock = clock
+        self._wake = threading.Event()
+        self._sleep = sleep or self._wake.wait  # Event.wait, so stop() can interrupt it
+        self._heap = []
+        self._counter = itertools.count()  # Breaks ties between equal deadlines
+        self._stopped = False
+        self.wakeups = 0
+
+    def every(self, interval, func, name=None, start_now=True):
+        """
+        Adds a job that runs func() every `interval` seconds.
+
+        :param interval (float): The period in seconds.
+        :param func (Callable): The function to run; it takes no arguments.
+        :param name (str): The name in reports; defaults to the function's name.
+        :param start_now (bool): Whether the first run is immediate or after one interval.
+
+        :return Job: The job, to change its interval or cancel it.
+        """
+        job = Job(func, interval, name or getattr(func, "__name__", "job"))
+        job.next_run = self._clock() + (0 if start_now else interval)
+        heapq.heappush(self._heap, (job.next_run, next(self._counter), job))
+        return job
+
+    def stop(self):
+        """
+        Makes run() return; safe to call from another thread or a job.
+        """
+        self._stopped = True
+        self._wake.set()
+
+    def run(self, duration=None):
+        """
+        Runs the jobs until stop() is called or, if given, `duration` seconds have passed.
+        """
+        self._stopped = False
+        self._wake.clear()
+        end = None if duration is None else self._clock() + duration
+
+        while self._heap and not self._stopped:
+            deadline, _, job = self._heap[0]
+            if job.cancelled:
+                heapq.heappop(self._heap)
+                continue
+
+            now = self._clock()
+            if end is not None and deadline > end:
+                if end > now:
+                    self._sleep(end - now)
+                break
+            if deadline > now:
+                self._sleep(deadline - now)
+                self.wakeups += 1
+                continue
+
+            heapq.heappop(self._heap)
+            lateness = now - deadline
+            job.runs += 1
+            job.total_lateness += lateness
+            job.max_lateness = max(job.max_lateness, lateness)
+            job.func()
+
+            job.next_run = deadline + job.interval
+            now = self._clock()
+            if job.next_run <= now:
+                missed = int((now - job.next_run) // job.interval) + 1
+                job.missed += missed
+                job.next_run += missed * job.interval
+            heapq.heappush(self._heap, (job.next_run, next(self._counter), job))
+
+    def jobs(self):
+        return [job for _, _, job in sorted(self._heap) if not job.cancelled]
+
+
+class PyAutoGuiBackend:
+    """
+    Moves the real cursor. pyautogui is imported here, so the rest of the module works without it
+    (and without a display).
+    """
+
+    def __init__(self):
+        import pyautogui
+
+        self._pyautogui = pyautogui
+
+    def position(self):
+        x, y = self._pyautogui.position()
+        return x, y
+
+    def size(self):
+        width, height = self._pyautogui.size()
+        return width, height
+
+    def move_to(self, x, y):
+        self._pyautogui.moveTo(x, y)
+
+
+class FakeBackend:
+    """
+    A cursor in memory, for running headless. `user_moves_to` simulates the user.
+    """
+
+    def __init__(self, size=(1920, 1080), position=(100, 100)):
+        self._size = size
+        self._position = position
+        self.moves = []
+
+    def position(self):
+        return self._position
+
+    def size(self):
+        return self._size
+
+    def move_to(self, x, y):
+        self._position = (x, y)
+        self.moves.append((x, y))
+
+    def user_moves_to(self, x, y):
+        self._position = (x, y)
+
+
+class MouseMover:
+    """
+    Nudges the cursor by one pixel per tick, unless the user moved it since the previous tick.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.moves = 0
+        self.skipped = 0
+        self._last_position = None  # Where the cursor was left by the previous tick
+
+    def tick(self):
+        position = self.backend.position()
+        if self._last_position is not None and position != self._last_position:
+            # The user is active; no need to keep the session awake
+            self.skipped += 1
+            self._last_position = position
+            return
+
+        self._last_position = move_cursor(self.backend, position)
+        self.moves += 1
+
+
 # Move the mouse cursor by 1 pixel
-def move_cursor():
+def move_cursor(backend, position=None):
     """
     Moves the mouse cursor 1 pixel to the right from its current position.
+    Returns the cursor position afterwards.
     """
-    x, y = pyautogui.position()  # Get the current cursor position
-    screen_width, _ = pyautogui.size()
+    x, y = position or backend.position()  # Get the current cursor position
+    screen_width, _ = backend.size()
 
     # Ensure the cursor doesn't move outside the screen boundaries
     if x + 1 < screen_width:
-        pyautogui.moveTo(x + 1, y)
-    else:
-        print("Cursor is at the right edge of the screen.")
+        backend.move_to(x + 1, y)
+        return x + 1, y
+
+    print("Cursor is at the right edge of the screen.")
+    return x, y
+
+
+def simulate(duration=5.0, interval=0.25):
+    """
+    Runs the scheduler headless against a FakeBackend, with a simulated user moving the cursor now
+    and then, and reports the timing accuracy and the number of wake-ups.
+    """
+    backend = FakeBackend()
+    mover = MouseMover(backend)
+    scheduler = Scheduler()
+    mover_job = scheduler.every(interval, mover.tick, name="move")
+
+    user_positions = itertools.count(500)
+    user_job = scheduler.every(
+        interval * 3.7,
+        lambda: backend.user_moves_to(next(user_positions), 300),
+        name="user",
+        start_now=False,
+    )
+
+    cpu_before = time.process_time()
+    scheduler.run(duration)
+    cpu_time = time.process_time() - cpu_before
+
+    print(f"Simulated {duration:.1f}s with a {interval}s interval:")
+    for job in (mover_job, user_job):
+        print(
+            f"  {job.name}: {job.runs} runs, lateness mean {job.mean_lateness * 1000:.2f}ms, "
+            f"max {job.max_lateness * 1000:.2f}ms, {job.missed} missed"
+        )
+    print(f"  {mover.moves} moves, {mover.skipped} skipped while the user was active")
+    print(f"  {scheduler.wakeups} wake-ups, {cpu_time * 1000:.1f}ms CPU time")
 
 
 def main():
@@ -115,14 +368,21 @@ def main():
     at the specified interval.
     """
     # Load and validate the interval
-    interval = validate_interval(load_env())
+    config = EnvConfig()
+    interval = config.interval()
     print(f"Mouse cursor will move every {interval} seconds.")
 
     try:
-        # Infinite loop to move the mouse cursor at each interval
-        while True:
-            move_cursor()
-            time.sleep(interval)
+        mover = MouseMover(PyAutoGuiBackend())
+        scheduler = Scheduler()
+
+        def tick():
+            # .env is re-read only if it changed; a new interval applies from the next move
+            job.interval = config.interval()
+            mover.tick()
+
+        job = scheduler.every(interval, tick, name="move")
+        scheduler.run()
 
     except KeyboardInterrupt:
         # Handle user interruption (Ctrl+C)
@@ -133,4 +393,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    # python mouse_mover.py --simulate runs headless, without pyautogui
+    if "--simulate" in sys.argv:
+        simulate()
+    else:
+        main()
@@ -0,0 +1,409 @@
+import abc
+import io
+import marshal
+import os
+import pickle
+import shutil
+import struct
+import sys
+import time
+import types
+from array import array
+from typing import Any, BinaryIO, Dict, Optional
+
+# Every file written by this module starts with the magic bytes followed by a one byte codec id,
+# so readers never have to guess the format. Files without the header are legacy raw pickles.
+MAGIC = b"WBIN"
+HEADER = struct.Struct("<4sB")
+
+# Length prefixes for the out-of-band pickle layout
+_COUNT = struct.Struct("<I")
+_LENGTH = struct.Struct("<Q")
+
+DEFAULT_CODEC = "pickle"
+
+
+class Codec(abc.ABC):
+    """
+    Base class for the serialization formats. A codec only sees the payload after the header.
+    """
+
+    name: str = ""
+    codec_id: int = 0
+
+    @abc.abstractmethod
+    def dump(self, obj: Any, file: BinaryIO) -> None:
+        """
+        Encodes the object into the file.
+
+        :raises TypeError: If the codec cannot encode the object.
+        """
+
+    @abc.abstractmethod
+    def load(self, file: BinaryIO) -> Any:
+        """
+        Decodes an object from the file.
+        """
+
+    def supports(self, obj: Any) -> bool:
+        """
+        Returns True if the codec can encode the object. `save` doesn't call it, since `dump`
+        raises for such objects anyway; it is for choosing a codec up front.
+        """
+        return True
+
+
+# The only globals a pickle file may reference: a few builtins, and the functions NumPy arrays,
+# dtypes and scalars are rebuilt with (under numpy.core before NumPy 2, numpy._core since)
+ALLOWED_GLOBALS = {
+    ("builtins", "bytearray"),
+    ("builtins", "complex"),
+    ("builtins", "frozenset"),
+    ("builtins", "range"),
+    ("builtins", "set"),
+    ("builtins", "slice"),
+    *(
+        (f"numpy.{core}.{module}", name)
+        for core in ("core", "_core")
+        for module, name in (
+            ("numeric", "_frombuffer"),
+            ("multiarray", "_reconstruct"),
+            ("multiarray", "scalar"),
+        )
+    ),
+    ("numpy", "dtype"),
+    ("numpy", "ndarray"),
+}
+
+
+class _SafeUnpickler(pickle.Unpickler):
+    """
+    An Unpickler that refuses to import anything outside ALLOWED_GLOBALS, so loading a tampered
+    file cannot execute arbitrary code.
+    """
+
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) in ALLOWED_GLOBALS:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"Refusing to load global '{module}.{name}'.")
+
+
+class _SafePickler(pickle.Pickler):
+    """
+    A Pickler that refuses to reference globals outside ALLOWED_GLOBALS, so it never writes a file
+    that _SafeUnpickler cannot read back.
+    """
+
+    def reducer_override(self, obj: Any) -> Any:
+        # Classes and functions are the only objects pickled as global references; every other
+        # object's reduce function and class come through here in turn
+        if isinstance(obj, (type, types.FunctionType, types.BuiltinFunctionType)):
+            module = getattr(obj, "__module__", None)
+            name = getattr(obj, "__qualname__", None)
+            if (module, name) not in ALLOWED_GLOBALS:
+                raise pickle.PicklingError(f"Refusing to save global '{module}.{name}'.")
+        return NotImplemented
+
+
+class _Discard:
+    def write(self, data) -> int:
+        return len(data)
+
+
+class PickleCodec(Codec):
+    """
+    Pickle protocol 5, limited to builtin types and NumPy arrays so files can be loaded safely.
+    Objects referencing any other class or function (dataclasses, datetimes...) are refused when
+    saving, rather than written to a file `load` would reject.
+
+    Buffers that support out-of-band pickling (contiguous NumPy arrays and pickle.PickleBuffer
+    wrappers) are written after the pickle stream instead of being copied into it, and are handed
+    back to the unpickler as views of the file contents. bytes and bytearray objects are pickled
+    in-band; wrap a large bytearray in pickle.PickleBuffer to write it out-of-band.
+    """
+
+    name = "pickle"
+    codec_id = 1
+
+    def dump(self, obj: Any, file: BinaryIO) -> None:
+        buffers = []
+        stream = io.BytesIO()
+        try:
+            _SafePickler(stream, protocol=5, buffer_callback=buffers.append).dump(obj)
+        except pickle.PicklingError as e:
+            raise TypeError(str(e)) from e
+        payload = stream.getbuffer()
+
+        file.write(_COUNT.pack(len(buffers)))
+        file.write(_LENGTH.pack(len(payload)))
+        file.write(payload)
+        for buffer in buffers:
+            raw = buffer.raw()
+            file.write(_LENGTH.pack(raw.nbytes))
+            file.write(raw)
+
+    def load(self, file: BinaryIO) -> Any:
+        data = memoryview(file.read())
+
+        (count,) = _COUNT.unpack_from(data, 0)
+        offset = _COUNT.size
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        payload = data[offset : offset + length]
+        offset += length
+
+        buffers = []
+        for _ in range(count):
+            (size,) = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            buffers.append(data[offset : offset + size])
+            offset += size
+
+        return _SafeUnpickler(io.BytesIO(payload), buffers=buffers).load()
+
+    def supports(self, obj: Any) -> bool:
+        # A trial run with the buffers left out, so large arrays aren't copied
+        try:
+            _SafePickler(_Discard(), protocol=5, buffer_callback=lambda buffer: False).dump(obj)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        return True
+
+
+class MarshalCodec(Codec):
+    """
+    The `marshal` format. Fast and compact for builtin types (numbers, strings, bytes, lists,
+    tuples, dicts, sets), and it never imports or runs code. The format is tied to the Python
+    version, so it is only suitable for files read by the same interpreter.
+    """
+
+    name = "marshal"
+    codec_id = 2
+
+    def dump(self, obj: Any, file: BinaryIO) -> None:
+        try:
+            data = marshal.dumps(obj)
+        except ValueError as e:
+            raise TypeError(str(e)) from e
+        file.write(data)
+
+    def load(self, file: BinaryIO) -> Any:
+        # marshal.load on a file object issues many tiny reads; one read plus loads is far faster
+        return marshal.loads(file.read())
+
+    def supports(self, obj: Any) -> bool:
+        try:
+            marshal.dumps(obj)
+        except ValueError:
+            return False
+        return True
+
+
+class IntArrayCodec(Codec):
+    """
+    A typed format for lists of 64-bit signed integers: the raw little-endian machine integers,
+    8 bytes per element, read back with a single `array.frombytes` call.
+    """
+
+    name = "int-array"
+    codec_id = 3
+    typecode = "q"
+
+    def dump(self, obj: Any, file: BinaryIO) -> None:
+        if not self.supports(obj):
+            raise TypeError("Only lists of 64-bit integers can be encoded.")
+        values = array(self.typecode, obj)
+        if sys.byteorder == "big":
+            values.byteswap()
+        values.tofile(file)
+
+    def load(self, file: BinaryIO) -> Any:
+        values = array(self.typecode)
+        values.frombytes(file.read())
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values.tolist()
+
+    def supports(self, obj: Any) -> bool:
+        if not isinstance(obj, list) or not all(type(value) is int for value in obj):
+            return False
+        try:
+            array(self.typecode, obj)
+        except OverflowError:
+            return False
+        return True
+
+
+CODECS: Dict[str, Codec] = {}
+_CODECS_BY_ID: Dict[int, Codec] = {}
+
+
+def register_codec(codec: Codec) -> None:
+    """
+    Makes a codec available by name to `save` and by id to `load`.
+
+    :param codec: The codec instance to register.
+    :raises ValueError: If the name or id is already taken.
+    """
+    if codec.name in CODECS or codec.codec_id in _CODECS_BY_ID:
+        raise ValueError(f"Codec '{codec.name}' (id {codec.codec_id}) is already registered.")
+    CODECS[codec.name] = codec
+    _CODECS_BY_ID[codec.codec_id] = codec
+
+
+for _codec in (PickleCodec(), MarshalCodec(), IntArrayCodec()):
+    register_codec(_codec)
+
+
+def save(obj: Any, path: str, codec: str = DEFAULT_CODEC) -> None:
+    """
+    Serializes an object to a file with a self-describing header.
+
+    :param obj: The object to save.
+    :param path: The destination file.
+    :param codec: The codec name.
+    :raises KeyError: If the codec is unknown.
+    :raises TypeError: If the codec cannot encode the object; an existing file is left as is.
+    """
+    selected = CODECS[codec]
+
+    # Written next to the destination and renamed over it, so a failed dump leaves no partial file
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as file:
+            file.write(HEADER.pack(MAGIC, selected.codec_id))
+            selected.dump(obj, file)
+        os.replace(temporary, path)
+    except TypeError as e:
+        raise TypeError(f"Codec '{codec}' cannot encode {type(obj).__name__} objects: {e}") from e
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def _read_header(file: BinaryIO) -> Optional[Codec]:
+    header = file.read(HEADER.size)
+    if len(header) == HEADER.size:
+        magic, codec_id = HEADER.unpack(header)
+        if magic == MAGIC:
+            if codec_id not in _CODECS_BY_ID:
+                raise ValueError(f"Unknown codec id {codec_id}.")
+            return _CODECS_BY_ID[codec_id]
+
+    # Legacy files are a bare pickle stream; rewind and read them with the safe unpickler
+    file.seek(0)
+    return None
+
+
+def detect_codec(path: str) -> str:
+    """
+    Returns the name of the codec a file was written with ("legacy-pickle" for headerless files).
+
+    :param path: The file to inspect.
+    :return: The codec name.
+    """
+    with open(path, "rb") as file:
+        codec = _read_header(file)
+    return codec.name if codec else "legacy-pickle"
+
+
+def load(path: str) -> Any:
+    """
+    Loads an object saved with `save`, or a legacy raw pickle file.
+
+    :param path: The file to read.
+    :return: The deserialized object.
+    """
+    with open(path, "rb") as file:
+        codec = _read_header(file)
+        if codec is None:
+            return _SafeUnpickler(file).load()
+        return codec.load(file)
+
+
+def copy(source: str, destination: str, codec: Optional[str] = None) -> None:
+    """
+    Copies a binary data file.
+
+    Without a codec (or with the codec the source already uses) the bytes are copied as-is with
+    `shutil.copyfile`, which uses `os.sendfile` on Linux so the data never enters Python. Only a
+    change of codec decodes and re-encodes the contents.
+
+    :param source: The file to copy.
+    :param destination: The destination file.
+    :param codec: The codec for the copy, or None to keep the source format.
+    """
+    if codec is None or codec == detect_codec(source):
+        shutil.copyfile(source, destination)
+    else:
+        save(load(source), destination, codec)
+
+
+def benchmark(obj: Any, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """
+    Measures the encoded size and the save/load speed of every codec that supports the object.
+
+    :param obj: The object to encode.
+    :param repeat: The number of save/load rounds per codec; the best round is reported.
+    :return: A mapping of codec name to {"bytes", "save_seconds", "load_seconds"}.
+    """
+    results: Dict[str, Dict[str, float]] = {}
+
+    for name, codec in CODECS.items():
+        if not codec.supports(obj):
+            continue
+
+        save_times, load_times = [], []
+        for _ in range(repeat):
+            buffer = io.BytesIO()
+            start_time = time.perf_counter()
+            codec.dump(obj, buffer)
+            save_times.append(time.perf_counter() - start_time)
+
+            buffer.seek(0)
+            start_time = time.perf_counter()
+            codec.load(buffer)
+            load_times.append(time.perf_counter() - start_time)
+
+        results[name] = {
+            "bytes": HEADER.size + buffer.getbuffer().nbytes,
+            "save_seconds": min(save_times),
+            "load_seconds": min(load_times),
+        }
+
+    return results
+
+
+def print_benchmark(obj: Any, label: str, repeat: int = 5) -> None:
+    """
+    Prints the `benchmark` results as a table.
+
+    :param obj: The object to encode.
+    :param label: A description of the object.
+    :param repeat: The number of save/load rounds per codec.
+    """
+    print(f"{label}:")
+    for name, result in benchmark(obj, repeat).items():
+        size = result["bytes"]
+        save_rate = size / result["save_seconds"] / 1e6
+        load_rate = size / result["load_seconds"] / 1e6
+        print(
+            f"  {name:<10} {size:>12,} bytes  "
+            f"save {result['save_seconds']:.6f}s ({save_rate:,.0f} MB/s)  "
+            f"load {result['load_seconds']:.6f}s ({load_rate:,.0f} MB/s)"
+        )
+
+
+if __name__ == "__main__":
+    print_benchmark(list(range(1_000_000)), "1M ints")
+    print_benchmark([1, 2, 3, 4, "Hello how Are you?", 6, 7, 8, 9, 10], "Mixed list")
+    print_benchmark({f"key{i}": i for i in range(100_000)}, "100k dict")
+    print_benchmark(bytearray(os.urandom(50_000_000)), "50 MB bytearray")
+
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        # Written out-of-band, and read back as a view of the loaded file contents
+        print_benchmark(np.arange(10_000_000, dtype=np.float64), "80 MB NumPy array")
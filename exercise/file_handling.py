@@ -1,4 +1,27 @@
+import mmap
 import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1024)
+def resolve_path(file_path):
+    """
+    Resolves a path relative to this script's directory into a normalized absolute path.
+    The result only depends on the argument, so it is computed once per distinct path.
+
+    Args:
+        file_path (str): The path to resolve.
+
+    Returns:
+        str: The normalized absolute path.
+    """
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    absolute_path = os.path.join(base_path, file_path)
+    return os.path.normpath(absolute_path)
+
 
 def read_file_safe(file_path):
     """
@@ -15,9 +38,7 @@ def read_file_safe(file_path):
     """
     try:
         # Get the absolute path relative to the script's directory
-        base_path = os.path.dirname(os.path.abspath(__file__))
-        absolute_path = os.path.join(base_path, file_path)
-        normalized_path = os.path.normpath(absolute_path)
+        normalized_path = resolve_path(file_path)
 
         if not os.path.isfile(normalized_path):
             return (False, "Error: File does not exist.")
@@ -32,3 +53,218 @@ def read_file_safe(file_path):
         return (False, "Error: An IOError occurred while reading the file.")
     except Exception as e:
         return (False, f"An unexpected error occurred: {e}")
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters describing how a FileCache has been used.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    evictions: int = 0
+    entries: int = 0
+    cached_bytes: int = 0
+    max_bytes: int = 0
+
+
+class _CacheEntry:
+    __slots__ = ("signature", "raw", "text", "size")
+
+    def __init__(self, signature, raw):
+        self.signature = signature
+        self.raw = raw
+        self.text = None
+        self.size = len(raw)
+
+
+class FileCache:
+    """
+    An LRU cache of file contents with a byte budget.
+
+    Entries are keyed on the resolved path and validated on every read against the file's
+    (mtime_ns, size, inode), so a changed or replaced file is always re-read. Raw bytes and decoded
+    text are cached separately: callers that only need bytes never pay for decoding, and text is
+    decoded at most once per file version.
+
+    Files at or above `mmap_threshold` bytes are memory-mapped instead of read, so their raw
+    contents live in the OS page cache rather than in the Python heap.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, mmap_threshold=8 * 1024 * 1024):
+        """
+        Args:
+            max_bytes (int): The total size of cached contents before the least recently used
+                entries are evicted. Decoded text counts as well as raw bytes.
+            mmap_threshold (int): Files of at least this size are memory-mapped. Use None to never
+                memory-map.
+        """
+        self.max_bytes = max_bytes
+        self.mmap_threshold = mmap_threshold
+        self._entries = OrderedDict()
+        self._stats = CacheStats(max_bytes=max_bytes)
+        self._lock = threading.Lock()
+
+    def _load(self, path, signature):
+        with open(path, "rb") as file:
+            size = signature[1]
+            if self.mmap_threshold is not None and size and size >= self.mmap_threshold:
+                return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            return file.read()
+
+    def _evict(self):
+        while self._stats.cached_bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            # mmaps are not closed explicitly: callers may still hold memoryviews of them
+            self._stats.cached_bytes -= entry.size
+            self._stats.evictions += 1
+
+    def _entry(self, path):
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                if entry.signature == signature:
+                    self._entries.move_to_end(path)
+                    self._stats.hits += 1
+                    return entry
+                del self._entries[path]
+                self._stats.cached_bytes -= entry.size
+                self._stats.invalidations += 1
+            self._stats.misses += 1
+
+        entry = _CacheEntry(signature, self._load(path, signature))
+
+        with self._lock:
+            if entry.size <= self.max_bytes:
+                self._entries[path] = entry
+                self._stats.cached_bytes += entry.size
+                self._evict()
+
+        return entry
+
+    def read_bytes(self, path):
+        """
+        Returns the raw contents of a file without decoding them.
+
+        Args:
+            path (str): An absolute path.
+
+        Returns:
+            memoryview: A read-only view of the file contents.
+        """
+        return memoryview(self._entry(path).raw).toreadonly()
+
+    def read_text(self, path, encoding="utf-8"):
+        """
+        Returns the decoded contents of a file, with newlines translated as text-mode `open` does.
+
+        Args:
+            path (str): An absolute path.
+            encoding (str): The text encoding of the file.
+
+        Returns:
+            str: The file contents.
+        """
+        entry = self._entry(path)
+
+        if entry.text is None or entry.text[0] != encoding:
+            text = str(entry.raw, encoding)
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+            with self._lock:
+                previous = entry.text
+                entry.text = (encoding, text)
+                if self._entries.get(path) is entry:
+                    growth = len(text) - (len(previous[1]) if previous else 0)
+                    entry.size += growth
+                    self._stats.cached_bytes += growth
+                    self._evict()
+
+        return entry.text[1]
+
+    def invalidate(self, path=None):
+        """
+        Drops one entry, or every entry when no path is given.
+
+        Args:
+            path (str): An absolute path, or None.
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._stats.cached_bytes = 0
+            elif path in self._entries:
+                self._stats.cached_bytes -= self._entries.pop(path).size
+
+    def stats(self):
+        """
+        Returns a snapshot of the cache counters.
+
+        Returns:
+            CacheStats: The current statistics.
+        """
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                invalidations=self._stats.invalidations,
+                evictions=self._stats.evictions,
+                entries=len(self._entries),
+                cached_bytes=self._stats.cached_bytes,
+                max_bytes=self.max_bytes,
+            )
+
+
+default_cache = FileCache()
+
+
+def _read_cached(file_path, reader):
+    try:
+        normalized_path = resolve_path(file_path)
+
+        if not os.path.isfile(normalized_path):
+            return (False, "Error: File does not exist.")
+
+        return (True, reader(normalized_path))
+
+    except FileNotFoundError:
+        return (False, "Error: File not found.")
+    except IOError:
+        return (False, "Error: An IOError occurred while reading the file.")
+    except Exception as e:
+        return (False, f"An unexpected error occurred: {e}")
+
+
+def read_file_cached(file_path, cache=default_cache):
+    """
+    Same contract as `read_file_safe`, but served from a FileCache. Repeated reads of an unchanged
+    file cost one `os.stat` instead of a full read and decode.
+
+    Args:
+        file_path (str): The path to the file to be read.
+        cache (FileCache): The cache to use.
+
+    Returns:
+        tuple: (True, content) if successful, otherwise (False, error message).
+    """
+    return _read_cached(file_path, cache.read_text)
+
+
+def read_bytes_safe(file_path, cache=default_cache):
+    """
+    Like `read_file_cached`, but returns the raw contents as a read-only memoryview and never
+    decodes them.
+
+    Args:
+        file_path (str): The path to the file to be read.
+        cache (FileCache): The cache to use.
+
+    Returns:
+        tuple: (True, memoryview) if successful, otherwise (False, error message).
+    """
+    return _read_cached(file_path, cache.read_bytes)
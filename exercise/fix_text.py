@@ -1,11 +1,13 @@
-from file_handling import read_file_safe
+from file_handling import read_file_cached
+from text_transform import TextTransform
+
+# Both rules are compiled into one translate table and applied in a single pass
+JTOI_TRANSFORM = TextTransform([('J', 'I'), ('j', 'i')])
 
 def JTOI(text):
-  text = text.replace('J', 'I')
-  text = text.replace('j', 'i')
-  return text
+  return JTOI_TRANSFORM.transform(text)
 
-(success, data) = read_file_safe('../data/words.txt')
+(success, data) = read_file_cached('../data/words.txt')
 
 if success:
     print(JTOI(data))
@@ -1,5 +1,5 @@
-import pickle
+import binary_storage
+import record_store  # Registers the "records" codec
 
-with open('data/binary_data.ignore.bin', "rb") as file:
-    my_list = pickle.load(file)
-    print(my_list)
+my_list = binary_storage.load('data/binary_data.ignore.bin')
+print(my_list)
@@ -0,0 +1,696 @@
+"""
+A record-oriented binary store with a persisted value index and in-place updates.
+
+The data file is a `binary_storage` file using the "records" codec, so `binary_storage.load`
+can still read it as a plain list or dict. After the header every element lives in a fixed-width
+slot, which makes two things cheap:
+
+- Updating one element rewrites one slot (plus an 8 byte generation counter), not the whole file.
+- Elements can be read by position straight from an mmap of the file.
+
+Searches go through an index kept next to the data file (`<path>.idx`): a sorted array of
+positions for lists (binary search, O(log n)) and a hash map from value to keys for dicts (O(1)).
+The index is derived data. It is saved in full when it is built; after that `close` only saves a
+delta (`<path>.idx.delta`) with the records updated since, which the next open applies, until the
+delta grows past a fraction of the store. It is rebuilt by a full scan when it is missing or was
+written for another generation of the data file (e.g. after a crash).
+
+Updates are crash safe through a redo log (`<path>.wal`): the new slot bytes are appended to the
+log and fsynced together with a commit marker before the data file is touched, and any committed
+log is replayed when the store is opened again. A torn write to the data file is therefore always
+repaired, and an uncommitted log tail is ignored. Only the pages an update wrote are flushed.
+"""
+
+import marshal
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Tuple, Union
+
+import binary_storage
+
+KIND_LIST = 0
+KIND_DICT = 1
+
+# kind, key width, value width, count, generation, file id. The random file id ties the index
+# and the redo log to one particular file, so leftovers from a file that was since rewritten
+# (e.g. by binary_storage.save) are never trusted.
+_STORE_HEADER = struct.Struct("<BxHIQQQ")
+_GENERATION_OFFSET = binary_storage.HEADER.size + 16
+_FILE_ID_OFFSET = binary_storage.HEADER.size + 24
+_SLOTS_OFFSET = binary_storage.HEADER.size + _STORE_HEADER.size
+
+# Value slot: a one byte type tag followed by the payload
+_TAG_NONE, _TAG_INT, _TAG_FLOAT, _TAG_STR, _TAG_BYTES, _TAG_BOOL = range(6)
+_INT = struct.Struct("<q")
+_FILE_ID = struct.Struct("<Q")
+_FLOAT = struct.Struct("<d")
+_SIZE = struct.Struct("<I")
+_KEY_SIZE = struct.Struct("<H")
+_MIN_VALUE_WIDTH = 1 + 8
+
+# Redo log record: slot offset, data length, then the data and a CRC32 of all three
+_WAL_RECORD = struct.Struct("<QI")
+_WAL_CRC = struct.Struct("<I")
+_WAL_COMMIT = 2**64 - 1
+
+# Past this fraction of updated records, close() rewrites the whole index instead of a delta
+_DELTA_LIMIT = 0.125
+
+Key = Union[int, str]
+
+
+def _encode_value(value: Any, width: int) -> bytes:
+    if value is None:
+        encoded = bytes((_TAG_NONE,))
+    elif isinstance(value, bool):
+        encoded = bytes((_TAG_BOOL, value))
+    elif isinstance(value, int):
+        try:
+            encoded = bytes((_TAG_INT,)) + _INT.pack(value)
+        except struct.error:
+            raise ValueError(f"Integer {value} does not fit in a 64-bit slot.") from None
+    elif isinstance(value, float):
+        encoded = bytes((_TAG_FLOAT,)) + _FLOAT.pack(value)
+    elif isinstance(value, str):
+        raw = value.encode("utf-8")
+        encoded = bytes((_TAG_STR,)) + _SIZE.pack(len(raw)) + raw
+    elif isinstance(value, bytes):
+        encoded = bytes((_TAG_BYTES,)) + _SIZE.pack(len(value)) + value
+    else:
+        raise TypeError(f"Unsupported value type for a record slot: {type(value).__name__}.")
+
+    if len(encoded) > width:
+        raise ValueError(f"Value {value!r} needs {len(encoded)} bytes, the slot holds {width}.")
+
+    return encoded.ljust(width, b"\0")
+
+
+def _decode_value(slot: Union[bytes, memoryview]) -> Any:
+    tag = slot[0]
+    if tag == _TAG_INT:
+        return _INT.unpack_from(slot, 1)[0]
+    if tag == _TAG_STR:
+        (size,) = _SIZE.unpack_from(slot, 1)
+        return bytes(slot[5 : 5 + size]).decode("utf-8")
+    if tag == _TAG_FLOAT:
+        return _FLOAT.unpack_from(slot, 1)[0]
+    if tag == _TAG_BYTES:
+        (size,) = _SIZE.unpack_from(slot, 1)
+        return bytes(slot[5 : 5 + size])
+    if tag == _TAG_BOOL:
+        return bool(slot[1])
+    return None
+
+
+def _index_key(value: Any) -> Tuple[int, Any]:
+    """
+    Returns the (type tag, value) pair used to order and hash values in the index. The tag keeps
+    values of different types apart, so 1, 1.0 and True are distinct and never compared.
+    """
+    if value is None:
+        return (_TAG_NONE, 0)
+    if isinstance(value, bool):
+        return (_TAG_BOOL, value)
+    if isinstance(value, int):
+        return (_TAG_INT, value)
+    if isinstance(value, float):
+        return (_TAG_FLOAT, value)
+    if isinstance(value, str):
+        return (_TAG_STR, value)
+    return (_TAG_BYTES, value)
+
+
+def _value_width(values: Iterable[Any], slack: int) -> int:
+    width = _MIN_VALUE_WIDTH
+    for value in values:
+        if isinstance(value, (str, bytes)):
+            size = len(value.encode("utf-8")) if isinstance(value, str) else len(value)
+            width = max(width, 1 + _SIZE.size + size)
+    return width + slack
+
+
+class RecordsCodec(binary_storage.Codec):
+    """
+    The fixed-width slot layout used by RecordStore. Supports lists of scalars and dicts with
+    string keys and scalar values (None, bool, int, float, str, bytes).
+    """
+
+    name = "records"
+    codec_id = 4
+
+    # Extra bytes per value slot so strings can grow a little in place
+    slack = 0
+
+    def supports(self, obj: Any) -> bool:
+        if isinstance(obj, dict):
+            if not all(isinstance(key, str) for key in obj):
+                return False
+            values = obj.values()
+        elif isinstance(obj, list):
+            values = obj
+        else:
+            return False
+
+        scalar = (type(None), bool, int, float, str, bytes)
+        return all(
+            isinstance(value, scalar)
+            and not (isinstance(value, int) and not -(2**63) <= value < 2**63)
+            for value in values
+        )
+
+    def dump(self, obj: Any, file: BinaryIO) -> None:
+        if not self.supports(obj):
+            raise TypeError("Only lists of scalars and dicts of str -> scalar can be encoded.")
+        if isinstance(obj, dict):
+            kind = KIND_DICT
+            raw_keys = [key.encode("utf-8") for key in obj]
+            key_width = _KEY_SIZE.size + max(map(len, raw_keys), default=0)
+            values = list(obj.values())
+        else:
+            kind = KIND_LIST
+            raw_keys = []
+            key_width = 0
+            values = obj
+
+        value_width = _value_width(values, self.slack)
+        file_id = int.from_bytes(os.urandom(8), "little")
+        file.write(_STORE_HEADER.pack(kind, key_width, value_width, len(values), 0, file_id))
+
+        for i, value in enumerate(values):
+            if kind == KIND_DICT:
+                raw_key = raw_keys[i]
+                file.write((_KEY_SIZE.pack(len(raw_key)) + raw_key).ljust(key_width, b"\0"))
+            file.write(_encode_value(value, value_width))
+
+    def load(self, file: BinaryIO) -> Any:
+        data = memoryview(file.read())
+        kind, key_width, value_width, count, _, _ = _STORE_HEADER.unpack_from(data, 0)
+        slot_width = key_width + value_width
+
+        records = _iter_slots(data, _STORE_HEADER.size, kind, key_width, slot_width, count)
+        if kind == KIND_DICT:
+            return dict(records)
+        return [value for _, value in records]
+
+
+def _iter_slots(
+    data: Union[memoryview, mmap.mmap],
+    start: int,
+    kind: int,
+    key_width: int,
+    slot_width: int,
+    count: int,
+) -> Iterator[Tuple[Key, Any]]:
+    # Released explicitly, since an exported view would keep the mmap from being closed
+    with memoryview(data) as view:
+        for position in range(count):
+            offset = start + position * slot_width
+            key: Key = position
+            if kind == KIND_DICT:
+                (size,) = _KEY_SIZE.unpack_from(view, offset)
+                key = bytes(view[offset + 2 : offset + 2 + size]).decode("utf-8")
+            yield key, _decode_value(view[offset + key_width : offset + slot_width])
+
+
+binary_storage.register_codec(RecordsCodec())
+
+
+class RecordStore:
+    """
+    Opens a "records" file for indexed search and in-place updates.
+
+    Usage:
+        with RecordStore("data/binary_data.ignore.bin") as store:
+            positions = store.search(3)
+            store.update(positions[0], 13)
+    """
+
+    def __init__(self, path: str, sync: bool = True) -> None:
+        """
+        :param path: A file written by `binary_storage.save(..., codec="records")`.
+        :param sync: fsync the log and the data file on every update. Disabling it trades crash
+            safety for speed.
+        :raises ValueError: If the file is not a records file.
+        """
+        self.path = path
+        self.wal_path = f"{path}.wal"
+        self.index_path = f"{path}.idx"
+        self.delta_path = f"{path}.idx.delta"
+        self.sync = sync
+
+        self._file = open(path, "r+b")
+        self._mm = None
+        try:
+            header = self._file.read(_SLOTS_OFFSET)
+            magic, codec_id = binary_storage.HEADER.unpack_from(header.ljust(_SLOTS_OFFSET, b"\0"))
+            if magic != binary_storage.MAGIC or codec_id != RecordsCodec.codec_id:
+                raise ValueError(f"{path} is not a '{RecordsCodec.name}' file.")
+
+            replayed = self._replay_wal(header[_FILE_ID_OFFSET:_SLOTS_OFFSET])
+            self._mm = mmap.mmap(self._file.fileno(), 0)
+        except BaseException:
+            self._file.close()
+            raise
+
+        (
+            self.kind,
+            self._key_width,
+            self._value_width,
+            self._count,
+            self._generation,
+            self._file_id,
+        ) = _STORE_HEADER.unpack_from(self._mm, binary_storage.HEADER.size)
+        self._slot_width = self._key_width + self._value_width
+        self._dirty = False
+
+        self._load_or_build_index(trust_saved=not replayed)
+
+    @classmethod
+    def create(cls, path: str, data: Union[list, dict], slack: int = 0, **kwargs) -> "RecordStore":
+        """
+        Writes a new records file and opens it.
+
+        :param path: The destination file.
+        :param data: A list of scalars or a dict of str -> scalar.
+        :param slack: Extra bytes per value slot, so longer strings can be stored in place later.
+        :return: The opened RecordStore.
+        """
+        codec = RecordsCodec()
+        codec.slack = slack
+        with open(path, "wb") as file:
+            file.write(binary_storage.HEADER.pack(binary_storage.MAGIC, codec.codec_id))
+            codec.dump(data, file)
+
+        for stale in (f"{path}.idx", f"{path}.idx.delta", f"{path}.wal"):
+            if os.path.exists(stale):
+                os.remove(stale)
+
+        return cls(path, **kwargs)
+
+    def __enter__(self) -> "RecordStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    # Slot access
+
+    def _slot_offset(self, position: int) -> int:
+        return _SLOTS_OFFSET + position * self._slot_width
+
+    def _value_at(self, position: int) -> Any:
+        offset = self._slot_offset(position) + self._key_width
+        return _decode_value(self._mm[offset : offset + self._value_width])
+
+    def _position_of(self, key: Key) -> int:
+        if self.kind == KIND_DICT:
+            if key not in self._key_positions:
+                raise KeyError(key)
+            return self._key_positions[key]
+
+        if not -self._count <= key < self._count:
+            raise IndexError("record index out of range")
+        return key % self._count
+
+    def get(self, key: Key) -> Any:
+        """
+        Reads one value by list position or dict key, straight from the mapped file.
+
+        :param key: The list position or dict key.
+        :return: The stored value.
+        """
+        return self._value_at(self._position_of(key))
+
+    __getitem__ = get
+
+    def items(self) -> Iterator[Tuple[Key, Any]]:
+        """
+        Iterates over (position or key, value) pairs in file order.
+        """
+        return _iter_slots(
+            self._mm, _SLOTS_OFFSET, self.kind, self._key_width, self._slot_width, self._count
+        )
+
+    def to_python(self) -> Union[list, dict]:
+        """
+        Materializes the whole store as a list or dict.
+        """
+        if self.kind == KIND_DICT:
+            return dict(self.items())
+        return [value for _, value in self.items()]
+
+    # Index
+
+    def _read_saved(self, path: str) -> Any:
+        try:
+            with open(path, "rb") as file:
+                saved = marshal.load(file)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(saved, dict) or saved.get("file_id") != self._file_id:
+            return None
+        return saved
+
+    def _load_or_build_index(self, trust_saved: bool = True) -> None:
+        # Keys (list positions or dict keys) updated since the saved index was written, with the
+        # index key of their value at that time
+        self._base_keys: Dict[Key, Tuple[int, Any]] = {}
+
+        index = self._read_saved(self.index_path) if trust_saved else None
+        delta = self._read_saved(self.delta_path) if index else None
+        if delta and (delta.get("base"), delta.get("generation")) != (
+            index["generation"],
+            self._generation,
+        ):
+            delta = None
+
+        if (
+            index is None
+            or index.get("count") != self._count
+            or (delta is None and index.get("generation") != self._generation)
+        ):
+            self._build_index()
+            self.flush_index()
+            return
+
+        if self.kind == KIND_DICT:
+            self._key_positions = index["keys"]
+            self._value_keys = index["values"]
+        else:
+            self._sorted_positions = array("q")
+            self._sorted_positions.frombytes(index["positions"])
+        self._index_generation = index["generation"]
+
+        if delta:
+            self._apply_delta(delta["keys"])
+
+    def _apply_delta(self, base_keys: Dict[Key, Tuple[int, Any]]) -> None:
+        """
+        Brings the saved index up to date with the mapped file: every updated record is taken out
+        under its old value, then put back under its current one.
+        """
+        if self.kind == KIND_DICT:
+            for key, index_key in base_keys.items():
+                keys = self._value_keys[index_key]
+                keys.remove(key)
+                if not keys:
+                    del self._value_keys[index_key]
+            for key in base_keys:
+                position = self._key_positions[key]
+                self._reindex(position, key, self._value_at(position))
+        else:
+            # While they are removed the array is still ordered by the old values
+            def old_key(position: int) -> Tuple[int, Any]:
+                if position in base_keys:
+                    return base_keys[position]
+                return _index_key(self._value_at(position))
+
+            for position, index_key in base_keys.items():
+                lo, hi = self._equal_range(index_key, old_key)
+                del self._sorted_positions[bisect_left(self._sorted_positions, position, lo, hi)]
+            for position in base_keys:
+                self._reindex(position, position, self._value_at(position))
+
+        self._base_keys = dict(base_keys)
+
+    def _build_index(self) -> None:
+        if self.kind == KIND_DICT:
+            self._key_positions: Dict[str, int] = {}
+            self._value_keys: Dict[Tuple[int, Any], List[str]] = {}
+            for position, (key, value) in enumerate(self.items()):
+                self._key_positions[key] = position
+                self._value_keys.setdefault(_index_key(value), []).append(key)
+        else:
+            # sorted() is stable, so equal values keep their positions in ascending order
+            keys = [_index_key(value) for _, value in self.items()]
+            self._sorted_positions = array("q", sorted(range(self._count), key=keys.__getitem__))
+
+    def flush_index(self) -> None:
+        """
+        Persists the index for the current generation, atomically through a temporary file.
+        """
+        index = {
+            "file_id": self._file_id,
+            "generation": self._generation,
+            "count": self._count,
+        }
+        if self.kind == KIND_DICT:
+            index["keys"] = self._key_positions
+            index["values"] = self._value_keys
+        else:
+            index["positions"] = self._sorted_positions.tobytes()
+
+        self._write_saved(self.index_path, index)
+        if os.path.exists(self.delta_path):
+            os.remove(self.delta_path)
+        self._index_generation = self._generation
+        self._base_keys = {}
+        self._dirty = False
+
+    def _flush_delta(self) -> None:
+        if len(self._base_keys) > self._count * _DELTA_LIMIT:
+            self.flush_index()
+            return
+
+        delta = {
+            "file_id": self._file_id,
+            "base": self._index_generation,
+            "generation": self._generation,
+            "keys": self._base_keys,
+        }
+        self._write_saved(self.delta_path, delta)
+        self._dirty = False
+
+    def _write_saved(self, path: str, saved: dict) -> None:
+        # Atomically through a temporary file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as file:
+            marshal.dump(saved, file)
+        os.replace(temp_path, path)
+
+    def _equal_range(self, index_key: Tuple[int, Any], sort_key=None) -> Tuple[int, int]:
+        if sort_key is None:
+            sort_key = lambda position: _index_key(self._value_at(position))
+        lo = bisect_left(self._sorted_positions, index_key, key=sort_key)
+        hi = bisect_right(self._sorted_positions, index_key, lo, key=sort_key)
+        return lo, hi
+
+    def search(self, value: Any) -> List[Key]:
+        """
+        Finds every element equal to the value (of the same type).
+
+        :param value: The value to look for.
+        :return: The matching list positions in ascending order, or dict keys in file order.
+        """
+        index_key = _index_key(value)
+        if self.kind == KIND_DICT:
+            keys = self._value_keys.get(index_key, ())
+            return sorted(keys, key=self._key_positions.__getitem__)
+
+        lo, hi = self._equal_range(index_key)
+        return self._sorted_positions[lo:hi].tolist()
+
+    def _unindex(self, position: int, key: Key, value: Any) -> None:
+        index_key = _index_key(value)
+        if self.kind == KIND_DICT:
+            keys = self._value_keys[index_key]
+            keys.remove(key)
+            if not keys:
+                del self._value_keys[index_key]
+            return
+
+        # Positions with equal values are stored in ascending order
+        lo, hi = self._equal_range(index_key)
+        del self._sorted_positions[bisect_left(self._sorted_positions, position, lo, hi)]
+
+    def _reindex(self, position: int, key: Key, value: Any) -> None:
+        index_key = _index_key(value)
+        if self.kind == KIND_DICT:
+            self._value_keys.setdefault(index_key, []).append(key)
+            return
+
+        lo, hi = self._equal_range(index_key)
+        self._sorted_positions.insert(
+            bisect_left(self._sorted_positions, position, lo, hi), position
+        )
+
+    # Updates
+
+    def update(self, key: Key, value: Any) -> None:
+        """
+        Replaces one value in place.
+
+        :param key: The list position or dict key.
+        :param value: The new value; it must fit in the store's value slot.
+        """
+        self.update_many([(key, value)])
+
+    def update_many(self, changes: Iterable[Tuple[Key, Any]]) -> None:
+        """
+        Replaces several values in place as one atomic, logged batch.
+
+        :param changes: (list position or dict key, new value) pairs.
+        :raises KeyError, IndexError: If a key or position does not exist.
+        :raises ValueError, TypeError: If a value cannot be stored in a slot.
+        """
+        # Keyed by position so that repeated keys in one batch keep only the last value
+        planned = {}
+        for key, value in changes:
+            position = self._position_of(key)
+            encoded = _encode_value(value, self._value_width)
+            planned[position] = (position, key, value, encoded)
+        planned = list(planned.values())
+
+        if not planned:
+            return
+
+        writes = [
+            (self._slot_offset(position) + self._key_width, encoded)
+            for position, _, _, encoded in planned
+        ]
+
+        # The first write of a session invalidates the saved index until close() rewrites it
+        if not self._dirty:
+            self._generation += 1
+            writes.append((_GENERATION_OFFSET, _INT.pack(self._generation)))
+
+        self._write_wal(writes)
+
+        for position, key, _, _ in planned:
+            value = self._value_at(position)
+            base_key = key if self.kind == KIND_DICT else position
+            self._base_keys.setdefault(base_key, _index_key(value))
+            self._unindex(position, key, value)
+
+        for offset, data in writes:
+            self._mm[offset : offset + len(data)] = data
+        if self.sync:
+            self._flush_pages(writes)
+
+        for position, key, value, _ in planned:
+            self._reindex(position, key, value)
+
+        self._clear_wal()
+        self._dirty = True
+
+    def _flush_pages(self, writes: List[Tuple[int, bytes]]) -> None:
+        # msync only the pages that were written, merging ranges that share pages
+        granularity = mmap.ALLOCATIONGRANULARITY
+        ranges = sorted(
+            (offset - offset % granularity, offset + len(data)) for offset, data in writes
+        )
+        start, end = ranges[0]
+        for next_start, next_end in ranges[1:]:
+            if next_start > end:
+                self._mm.flush(start, end - start)
+                start = next_start
+            end = max(end, next_end)
+        self._mm.flush(start, end - start)
+
+    # Redo log
+
+    def _write_wal(self, writes: List[Tuple[int, bytes]]) -> None:
+        with open(self.wal_path, "wb") as wal:
+            wal.write(_FILE_ID.pack(self._file_id))
+            for offset, data in writes + [(_WAL_COMMIT, b"")]:
+                record = _WAL_RECORD.pack(offset, len(data)) + data
+                wal.write(record + _WAL_CRC.pack(zlib.crc32(record)))
+            wal.flush()
+            if self.sync:
+                os.fsync(wal.fileno())
+
+    def _clear_wal(self) -> None:
+        with open(self.wal_path, "wb") as wal:
+            if self.sync:
+                os.fsync(wal.fileno())
+
+    def _replay_wal(self, file_id: bytes) -> bool:
+        """
+        Applies a committed redo log left behind by a crash.
+
+        :param file_id: The raw file id from the data file header.
+        :return: True if any write was replayed.
+        """
+        if not os.path.exists(self.wal_path):
+            return False
+
+        with open(self.wal_path, "rb") as wal:
+            data = wal.read()
+
+        writes = []
+        committed = []
+        # A log written for another file (same path, since rewritten) is discarded
+        offset = _FILE_ID.size if data[: _FILE_ID.size] == file_id else len(data)
+        while offset + _WAL_RECORD.size <= len(data):
+            slot_offset, size = _WAL_RECORD.unpack_from(data, offset)
+            end = offset + _WAL_RECORD.size + size
+            if end + _WAL_CRC.size > len(data):
+                break  # Torn tail
+            (crc,) = _WAL_CRC.unpack_from(data, end)
+            if crc != zlib.crc32(data[offset:end]):
+                break
+
+            if slot_offset == _WAL_COMMIT:
+                committed = writes
+                break
+            writes.append((slot_offset, data[offset + _WAL_RECORD.size : end]))
+            offset = end + _WAL_CRC.size
+
+        # Replaying a committed batch is idempotent; an uncommitted one never reached the file
+        for slot_offset, slot_data in committed:
+            self._file.seek(slot_offset)
+            self._file.write(slot_data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        os.remove(self.wal_path)
+        return bool(committed)
+
+    def close(self) -> None:
+        """
+        Saves the index changes if there are any and releases the file.
+        """
+        if self._mm is None:
+            return
+
+        if self._dirty:
+            self._flush_delta()
+        self._mm.close()
+        self._mm = None
+        self._file.close()
+
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+    import time
+
+    path = os.path.join(tempfile.mkdtemp(), "records.ignore.bin")
+    count = 2_000_000
+    data = [random.randrange(1_000_000) for _ in range(count)]
+
+    start_time = time.perf_counter()
+    store = RecordStore.create(path, data)
+    print(f"Created {count:,} records in {time.perf_counter() - start_time:.3f} seconds")
+
+    target = data[count // 2]
+    start_time = time.perf_counter()
+    positions = store.search(target)
+    print(f"search({target}) -> {positions} in {time.perf_counter() - start_time:.6f} seconds")
+
+    start_time = time.perf_counter()
+    store.update(positions[0], target + 10)
+    print(f"update in {time.perf_counter() - start_time:.6f} seconds")
+    store.close()
+
+    with RecordStore(path) as store:
+        print(store.get(positions[0]), store.search(target + 10)[:5])
+
+    print(binary_storage.load(path)[positions[0]])
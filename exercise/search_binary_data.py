@@ -1,33 +1,56 @@
-import pickle
 from typing import List, Dict
 
-with open("data/binary_data.ignore.bin", "rb") as file:
-    my_data = pickle.load(file)
+import binary_storage
+import record_store  # Registers the "records" codec
+
+file_path = "data/binary_data.ignore.bin"
+
+if binary_storage.detect_codec(file_path) == record_store.RecordsCodec.name:
+    # Indexed search: the file is never fully loaded or scanned
+    with record_store.RecordStore(file_path) as store:
+        print(f"Opened a record store with {len(store)} records")
+
+        int_to_search = int(input("Enter a number to search"))
+        matches = store.search(int_to_search)
+
+        if store.kind == record_store.KIND_LIST:
+            print("The loaded data is a list")
+            if matches:
+                print(f"Found {int_to_search} in the list at index {matches[0]}")
+        else:
+            print("The loaded data is a dictionary")
+            for key in matches:
+                print(f"Found {int_to_search} in the dictionary at key {key}")
+
+    found = bool(matches)
+
+else:
+    my_data = binary_storage.load(file_path)
     print(my_data)
 
-int_to_search = int(input("Enter a number to search"))
+    int_to_search = int(input("Enter a number to search"))
 
-found = False
+    found = False
 
-if isinstance(my_data, List):
-    print("The loaded data is a list")
+    if isinstance(my_data, List):
+        print("The loaded data is a list")
 
-    for i in range(len(my_data)):
-        if my_data[i] == int_to_search:
-            print(f"Found {int_to_search} in the list at index {i}")
-            found = True
-            break
+        for i in range(len(my_data)):
+            if my_data[i] == int_to_search:
+                print(f"Found {int_to_search} in the list at index {i}")
+                found = True
+                break
 
-elif isinstance(my_data, Dict):
-    print("The loaded data is a dictionary")
+    elif isinstance(my_data, Dict):
+        print("The loaded data is a dictionary")
 
-    for key in my_data.keys():
-        if my_data[key] == int_to_search:
-            print(f"Found {int_to_search} in the dictionary at key {key}")
-            found = True
+        for key in my_data.keys():
+            if my_data[key] == int_to_search:
+                print(f"Found {int_to_search} in the dictionary at key {key}")
+                found = True
 
-else:
-    print("The binary data is not a list or a dictionary")
+    else:
+        print("The binary data is not a list or a dictionary")
 
 if not found:
     print(f"Not found {int_to_search} in the list")
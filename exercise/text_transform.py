@@ -0,0 +1,150 @@
+import os
+import re
+import shutil
+import tempfile
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # Characters per read
+
+
+class TextTransform:
+    """
+    Applies a set of replacement rules to text in a single pass.
+
+    Rules are compiled once:
+        - Single character rules go into one `str.translate` table.
+        - Multi-character rules go into one alternation regex, longest pattern first, so the
+          longest rule wins where several match at the same position.
+
+    All rules are applied simultaneously, so the output of one rule is never rewritten by another
+    (unlike chained `str.replace` calls). Where a multi-character rule matches, it takes priority
+    over the single character rules for the characters it covers.
+
+    Text can be transformed whole, as a stream of chunks, or file to file. When streaming, the last
+    (longest pattern - 1) characters of each chunk are held back until the next chunk arrives, so
+    matches that straddle a chunk boundary are still found and memory stays O(chunk size).
+    """
+
+    def __init__(self, rules: Iterable[Tuple[str, str]]) -> None:
+        """
+        :param rules: (old, new) pairs. Later rules override earlier ones with the same `old`.
+        :raises ValueError: If a rule has an empty `old` string.
+        """
+        self.char_rules: Dict[int, str] = {}
+        self.multi_rules: Dict[str, str] = {}
+
+        for old, new in rules:
+            if not old:
+                raise ValueError("Replacement rules need a non-empty string to replace.")
+            if len(old) == 1:
+                self.char_rules[ord(old)] = new
+            else:
+                self.multi_rules[old] = new
+
+        self._pattern: Optional[re.Pattern] = None
+        self._overlap = 0
+        if self.multi_rules:
+            patterns = sorted(self.multi_rules, key=len, reverse=True)
+            self._pattern = re.compile("|".join(map(re.escape, patterns)))
+            self._overlap = len(patterns[0]) - 1
+
+    def _apply(self, text: str, end: int) -> Tuple[str, int]:
+        """
+        Transforms the text up to (at least) `end`, finishing any match that starts before it.
+
+        :param text: The text to transform.
+        :param end: Matches starting at or after this index are left for later.
+        :return: The transformed text and the index where processing stopped.
+        """
+        if self._pattern is None:
+            return text[:end].translate(self.char_rules), end
+
+        pieces = []
+        position = 0
+        for match in self._pattern.finditer(text):
+            if match.start() >= end:
+                break
+            pieces.append(text[position : match.start()].translate(self.char_rules))
+            pieces.append(self.multi_rules[match.group()])
+            position = match.end()
+
+        stop = max(position, end)
+        pieces.append(text[position:stop].translate(self.char_rules))
+        return "".join(pieces), stop
+
+    def transform(self, text: str) -> str:
+        """
+        Transforms a whole string.
+
+        :param text: The text to transform.
+        :return: The transformed text.
+        """
+        return self._apply(text, len(text))[0]
+
+    def transform_chunks(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Transforms a stream of text chunks.
+
+        :param chunks: An iterable of strings.
+        :return: An iterator of transformed strings; joined, they equal `transform` of the input.
+        """
+        carry = ""
+        for chunk in chunks:
+            text = carry + chunk
+            # A match starting before the cutoff is guaranteed to be complete within `text`
+            output, stop = self._apply(text, len(text) - self._overlap)
+            carry = text[stop:]
+            if output:
+                yield output
+
+        if carry:
+            yield self.transform(carry)
+
+    def transform_file(
+        self,
+        source: str,
+        destination: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        encoding: str = "utf-8",
+    ) -> None:
+        """
+        Transforms a file chunk by chunk and writes the result atomically: the output goes to a
+        temporary file in the destination directory, which is renamed over the destination only
+        once it is complete. Readers never see a partial file, and the destination may be the
+        source itself.
+
+        :param source: The file to read.
+        :param destination: The file to write, or None to rewrite the source in place.
+        :param chunk_size: The number of characters per read.
+        :param encoding: The text encoding of both files.
+        """
+        destination = destination or source
+        directory = os.path.dirname(os.path.abspath(destination))
+
+        # newline="" keeps the original line endings untouched
+        with open(source, "r", encoding=encoding, newline="") as reader:
+            chunks = iter(lambda: reader.read(chunk_size), "")
+
+            with tempfile.NamedTemporaryFile(
+                "w", encoding=encoding, newline="", dir=directory, delete=False
+            ) as writer:
+                try:
+                    for output in self.transform_chunks(chunks):
+                        writer.write(output)
+                except BaseException:
+                    writer.close()
+                    os.remove(writer.name)
+                    raise
+
+        # Temporary files are created private (0600); keep the permissions of the source instead
+        shutil.copymode(source, writer.name)
+        os.replace(writer.name, destination)
+
+
+if __name__ == "__main__":
+    transform = TextTransform([("J", "I"), ("j", "i"), ("js", "is"), ("Thjs", "This")])
+
+    print(transform.transform("Thjs js a Joke"))
+
+    # The same result when the input arrives one character at a time
+    print("".join(transform.transform_chunks("Thjs js a Joke")))
@@ -1,41 +1,72 @@
-import pickle
 from typing import List, Dict
 
-with open("data/binary_data.ignore.bin", "rb") as file:
-    my_data = pickle.load(file)
-    print(my_data)
+import binary_storage
+import record_store  # Registers the "records" codec
 
-int_to_search = int(
-    input("Enter a number to search and update (by adding 10 to the found number): ")
-)
+file_path = "data/binary_data.ignore.bin"
+prompt = "Enter a number to search and update (by adding 10 to the found number): "
 
-found = False
+if binary_storage.detect_codec(file_path) == record_store.RecordsCodec.name:
+    # Indexed search and in-place update: only the changed slots are written
+    with record_store.RecordStore(file_path) as store:
+        print(f"Opened a record store with {len(store)} records")
 
-if isinstance(my_data, List):
-    print("The loaded data is a list")
+        int_to_search = int(input(prompt))
+        matches = store.search(int_to_search)
 
-    for i in range(len(my_data)):
-        if my_data[i] == int_to_search:
-            print(f"Found {int_to_search} in the list at index {i}")
-            my_data[i] += 10
-            found = True
-            break
+        if store.kind == record_store.KIND_LIST:
+            print("The loaded data is a list")
+            matches = matches[:1]
+            for i in matches:
+                print(f"Found {int_to_search} in the list at index {i}")
+        else:
+            print("The loaded data is a dictionary")
+            for key in matches:
+                print(f"Found {int_to_search} in the dictionary at key {key}")
 
-elif isinstance(my_data, Dict):
-    print("The loaded data is a dictionary")
+        store.update_many((key, int_to_search + 10) for key in matches)
 
-    for key in my_data.keys():
-        if my_data[key] == int_to_search:
-            print(f"Found {int_to_search} in the dictionary at key {key}")
-            my_data[key] += 10
-            found = True
+    if matches:
+        print("Data updated successfully")
+    else:
+        print(f"Not found {int_to_search} in the list")
 
 else:
-    print("The binary data is not a list or a dictionary")
+    my_data = binary_storage.load(file_path)
+    print(my_data)
 
-if not found:
-    print(f"Not found {int_to_search} in the list")
-else:
-    with open("data/binary_data.ignore.bin", "wb") as file:
-        pickle.dump(my_data, file)
+    int_to_search = int(input(prompt))
+
+    found = False
+
+    if isinstance(my_data, List):
+        print("The loaded data is a list")
+
+        for i in range(len(my_data)):
+            if my_data[i] == int_to_search:
+                print(f"Found {int_to_search} in the list at index {i}")
+                my_data[i] += 10
+                found = True
+                break
+
+    elif isinstance(my_data, Dict):
+        print("The loaded data is a dictionary")
+
+        for key in my_data.keys():
+            if my_data[key] == int_to_search:
+                print(f"Found {int_to_search} in the dictionary at key {key}")
+                my_data[key] += 10
+                found = True
+
+    else:
+        print("The binary data is not a list or a dictionary")
+
+    if not found:
+        print(f"Not found {int_to_search} in the list")
+    else:
+        # Keep the format the file was written in (legacy headerless pickles are upgraded)
+        codec = binary_storage.detect_codec(file_path)
+        if codec not in binary_storage.CODECS:
+            codec = binary_storage.DEFAULT_CODEC
+        binary_storage.save(my_data, file_path, codec)
         print("Data updated successfully")
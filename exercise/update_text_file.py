@@ -1,7 +1,6 @@
-with open("data/words.txt", "r") as file:
-    data = file.read()
+from text_transform import TextTransform
 
-    data = data.replace(input("Enter word to replace: "), input("Enter new word: "))
+transform = TextTransform([(input("Enter word to replace: "), input("Enter new word: "))])
 
-    with open("data/words_updated.ignore.txt", "w") as file_updated:
-        file_updated.write(data)
+# Streams the file in chunks and writes the copy atomically (temp file + rename)
+transform.transform_file("data/words.txt", "data/words_updated.ignore.txt")
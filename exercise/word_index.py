@@ -0,0 +1,433 @@
+"""
+An inverted index over text files: term -> (line, byte offset) postings.
+
+Building streams each file line by line. Postings are collected in memory up to a token budget
+and then flushed as a segment file, so memory is bounded no matter how large the corpus is.
+
+Segment file layout:
+    - Magic bytes and the length of the term dictionary.
+    - The term dictionary (marshal): term -> (count, start, line typecode, line bytes,
+      offset typecode, offset bytes).
+    - The postings blob. For every term, its line numbers and byte offsets are stored as deltas
+      from the previous posting in the smallest `array` typecode that fits ('B', 'H', 'I' or 'Q'),
+      so frequent terms usually cost 2-3 bytes per posting and decode with one `frombytes` call
+      plus `itertools.accumulate`.
+
+The blob is mmapped and only the postings of queried terms are decoded, so lookups take
+milliseconds once the dictionaries are loaded. A manifest records each file's (mtime_ns, size)
+and segments; `refresh` only re-indexes files whose stats changed. New segments are written and
+the manifest saved before old segments are deleted, so a failure at any point leaves an index
+that still matches its manifest.
+
+Term counts per file are the ones in the segment dictionaries. The corpus-wide counts used by
+`count` and `top` live in a separate file, loaded on first use and updated by the difference on
+refresh; it is rebuilt from the segments if it doesn't match the manifest's generation.
+"""
+
+import json
+import marshal
+import mmap
+import os
+import re
+import struct
+from array import array
+from collections import Counter
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+MAGIC = b"WIDX"
+_SEGMENT_HEADER = struct.Struct("<4sQ")
+_TOKEN_RE = re.compile(r"\w+")
+_TYPECODES = [("B", 0xFF), ("H", 0xFFFF), ("I", 0xFFFFFFFF), ("Q", 0xFFFFFFFFFFFFFFFF)]
+
+DEFAULT_TOKEN_BUDGET = 4_000_000  # Postings held in memory before a segment is flushed
+
+Posting = Tuple[str, int, int]  # (file path, line number, byte offset)
+
+
+def tokenize(path: str) -> Iterator[Tuple[str, int, int]]:
+    """
+    Streams the lowercased word tokens of a file.
+
+    :param path: The file to read (UTF-8; invalid bytes are replaced).
+    :return: An iterator of (term, 1-based line number, byte offset in the file).
+    """
+    with open(path, "rb") as file:
+        offset = 0
+        for line_number, raw in enumerate(file, start=1):
+            line = raw.decode("utf-8", errors="replace")
+            ascii_only = raw.isascii()
+
+            for match in _TOKEN_RE.finditer(line):
+                start = match.start()
+                if not ascii_only:
+                    # Character and byte positions only diverge on non-ASCII lines
+                    start = len(line[:start].encode("utf-8", errors="replace"))
+                yield match.group().lower(), line_number, offset + start
+
+            offset += len(raw)
+
+
+def _delta_array(values: array) -> array:
+    deltas = [values[0]] + [b - a for a, b in zip(values, values[1:])]
+    largest = max(deltas)
+    typecode = next(code for code, limit in _TYPECODES if largest <= limit)
+    return array(typecode, deltas)
+
+
+def _write_segment(path: str, postings: Dict[str, Tuple[array, array]]) -> None:
+    dictionary = {}
+    blobs = []
+    position = 0
+
+    for term, (lines, offsets) in postings.items():
+        line_deltas = _delta_array(lines)
+        offset_deltas = _delta_array(offsets)
+        line_bytes = line_deltas.tobytes()
+        offset_bytes = offset_deltas.tobytes()
+
+        dictionary[term] = (
+            len(lines),
+            position,
+            line_deltas.typecode,
+            len(line_bytes),
+            offset_deltas.typecode,
+            len(offset_bytes),
+        )
+        blobs.append(line_bytes)
+        blobs.append(offset_bytes)
+        position += len(line_bytes) + len(offset_bytes)
+
+    encoded = marshal.dumps(dictionary)
+    with open(path, "wb") as file:
+        file.write(_SEGMENT_HEADER.pack(MAGIC, len(encoded)))
+        file.write(encoded)
+        for blob in blobs:
+            file.write(blob)
+
+
+class _Segment:
+    """
+    A read-only view of one segment file.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            magic, length = _SEGMENT_HEADER.unpack(file.read(_SEGMENT_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an index segment.")
+            self.dictionary = marshal.loads(file.read(length))
+            self._base = _SEGMENT_HEADER.size + length
+            size = os.fstat(file.fileno()).st_size
+            self._mm = (
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                if size > self._base
+                else None
+            )
+
+    def postings(self, term: str) -> Tuple[List[int], List[int]]:
+        entry = self.dictionary.get(term)
+        if entry is None:
+            return [], []
+
+        _, start, line_code, line_size, offset_code, offset_size = entry
+        start += self._base
+
+        lines = array(line_code)
+        lines.frombytes(self._mm[start : start + line_size])
+        offsets = array(offset_code)
+        offsets.frombytes(self._mm[start + line_size : start + line_size + offset_size])
+
+        return list(accumulate(lines)), list(accumulate(offsets))
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+
+
+class WordIndex:
+    """
+    A persistent inverted index over a set of text files, stored in a directory.
+
+    Usage:
+        index = WordIndex("data/words.ignore.idx")
+        index.refresh(["data/words.txt"])
+        index.lookup("content")
+        index.top(10)
+    """
+
+    MANIFEST = "manifest.json"
+    COUNTS = "counts.bin"
+
+    def __init__(self, index_dir: str, token_budget: int = DEFAULT_TOKEN_BUDGET) -> None:
+        """
+        :param index_dir: The directory holding the manifest and segment files.
+        :param token_budget: The number of postings buffered in memory per segment.
+        """
+        self.index_dir = index_dir
+        self.token_budget = token_budget
+        os.makedirs(index_dir, exist_ok=True)
+
+        self._manifest = {"generation": 0, "files": {}}
+        manifest_path = os.path.join(index_dir, self.MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as file:
+                self._manifest = json.load(file)
+
+        self._segments: Dict[str, _Segment] = {}
+        self._counts: Optional[Dict[str, int]] = None  # Corpus-wide, most frequent first
+
+    def __enter__(self) -> "WordIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # Building
+
+    def _segment(self, name: str) -> _Segment:
+        if name not in self._segments:
+            self._segments[name] = _Segment(os.path.join(self.index_dir, name))
+        return self._segments[name]
+
+    def _drop_segments(self, names: Iterable[str]) -> None:
+        for name in names:
+            segment = self._segments.pop(name, None)
+            if segment is not None:
+                segment.close()
+            try:
+                os.remove(os.path.join(self.index_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def _remove_orphans(self) -> None:
+        # Segments left behind by a failure between saving the manifest and deleting them
+        referenced = {name for e in self._manifest["files"].values() for name in e["segments"]}
+        self._drop_segments(
+            name
+            for name in os.listdir(self.index_dir)
+            if name.endswith(".seg") and name not in referenced
+        )
+
+    def _file_counts(self, entry: dict) -> Counter:
+        counts: Counter = Counter()
+        for name in entry["segments"]:
+            for term, postings in self._segment(name).dictionary.items():
+                counts[term] += postings[0]
+        return counts
+
+    def _index_file(self, path: str, file_id: int) -> Tuple[List[str], Counter]:
+        segments: List[str] = []
+        counts: Counter = Counter()
+        postings: Dict[str, Tuple[array, array]] = {}
+        buffered = 0
+
+        def flush() -> None:
+            name = f"{file_id}-{len(segments)}.seg"
+            segments.append(name)
+            _write_segment(os.path.join(self.index_dir, name), postings)
+
+        try:
+            for term, line_number, offset in tokenize(path):
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = (array("Q"), array("Q"))
+                entry[0].append(line_number)
+                entry[1].append(offset)
+                counts[term] += 1
+                buffered += 1
+
+                if buffered >= self.token_budget:
+                    flush()
+                    postings = {}
+                    buffered = 0
+
+            if postings or not segments:
+                flush()
+        except BaseException:
+            # The file vanished or couldn't be read: the manifest still has its old segments
+            self._drop_segments(segments)
+            raise
+
+        return segments, counts
+
+    def refresh(self, paths: Iterable[str]) -> List[str]:
+        """
+        Indexes new files and re-indexes files whose mtime or size changed.
+
+        :param paths: The files that make up the corpus.
+        :return: The paths that were (re)indexed.
+        """
+        files = self._manifest["files"]
+        updated = []
+        replaced: List[str] = []  # Old segments, deleted once the manifest no longer needs them
+        changes: Counter = Counter()
+
+        try:
+            for path in paths:
+                path = os.path.abspath(path)
+                stat = os.stat(path)
+                entry = files.get(path)
+                if entry and (entry["mtime_ns"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+
+                # Higher than every id in the manifest, so no live segment is overwritten
+                file_id = max((e["id"] for e in files.values()), default=-1) + 1
+                segments, counts = self._index_file(path, file_id)
+                if entry:
+                    changes.subtract(self._file_counts(entry))
+                    replaced.extend(entry["segments"])
+                changes.update(counts)
+                files[path] = {
+                    "id": file_id,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "segments": segments,
+                }
+                updated.append(path)
+        finally:
+            # Files indexed before a failure are kept
+            if updated:
+                self._save_manifest(changes)
+                self._drop_segments(replaced)
+                self._remove_orphans()
+
+        return updated
+
+    def remove(self, path: str) -> None:
+        """
+        Removes a file from the index.
+
+        :param path: The indexed file.
+        """
+        entry = self._manifest["files"].get(os.path.abspath(path))
+        if entry:
+            changes = Counter()
+            changes.subtract(self._file_counts(entry))
+            del self._manifest["files"][os.path.abspath(path)]
+            self._save_manifest(changes)
+            self._drop_segments(entry["segments"])
+
+    def _save_manifest(self, changes: Counter) -> None:
+        """
+        Saves the manifest under a new generation, and the corpus counts updated by `changes`
+        if they are loaded. Counts that aren't loaded are rebuilt from the segments when needed.
+        """
+        self._manifest["generation"] += 1
+        if self._counts is not None:
+            total = Counter(self._counts)
+            total.update(changes)
+            # Ordered by frequency so `top` is a slice; terms no longer present are dropped
+            self._counts = {term: n for term, n in total.most_common() if n > 0}
+            self._write(self.COUNTS, marshal.dumps((self._manifest["generation"], self._counts)))
+
+        self._write(self.MANIFEST, json.dumps(self._manifest).encode("utf-8"))
+
+    def _write(self, name: str, data: bytes) -> None:
+        path = os.path.join(self.index_dir, name)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+    def _corpus_counts(self) -> Dict[str, int]:
+        if self._counts is None:
+            generation, counts = None, None
+            try:
+                with open(os.path.join(self.index_dir, self.COUNTS), "rb") as file:
+                    generation, counts = marshal.loads(file.read())
+            except (OSError, EOFError, ValueError, TypeError):
+                pass
+            if generation != self._manifest["generation"]:
+                # Missing, or written by a run that failed before saving its manifest
+                total: Counter = Counter()
+                for entry in self._manifest["files"].values():
+                    total.update(self._file_counts(entry))
+                counts = dict(total.most_common())
+                data = marshal.dumps((self._manifest["generation"], counts))
+                self._write(self.COUNTS, data)
+            self._counts = counts
+        return self._counts
+
+    # Queries
+
+    def lookup(self, term: str) -> List[Posting]:
+        """
+        Returns every occurrence of a term.
+
+        :param term: The word to look up (case-insensitive).
+        :return: (file path, line number, byte offset) tuples, in file and offset order.
+        """
+        term = term.lower()
+        results: List[Posting] = []
+
+        for path, entry in self._manifest["files"].items():
+            for name in entry["segments"]:
+                lines, offsets = self._segment(name).postings(term)
+                results.extend((path, line, offset) for line, offset in zip(lines, offsets))
+
+        return results
+
+    def lookup_many(self, terms: Iterable[str]) -> Dict[str, List[Posting]]:
+        """
+        Looks up several terms at once.
+
+        :param terms: The words to look up.
+        :return: A mapping of each lowercased term to its postings.
+        """
+        return {term.lower(): self.lookup(term) for term in terms}
+
+    def lines_with_all(self, terms: Iterable[str]) -> List[Tuple[str, int]]:
+        """
+        Finds the lines that contain every one of the terms.
+
+        :param terms: The words that must all appear on the line.
+        :return: Sorted (file path, line number) pairs.
+        """
+        # Intersect the rarest term first so the working set stays small
+        ordered = sorted({term.lower() for term in terms}, key=self.count)
+        if not ordered:
+            return []
+
+        matches: Optional[Set[Tuple[str, int]]] = None
+        for term in ordered:
+            lines = {(path, line) for path, line, _ in self.lookup(term)}
+            matches = lines if matches is None else matches & lines
+            if not matches:
+                return []
+
+        return sorted(matches)
+
+    def count(self, term: str) -> int:
+        """
+        Returns the number of occurrences of a term across the corpus.
+        """
+        return self._corpus_counts().get(term.lower(), 0)
+
+    def top(self, n: int = 10) -> List[Tuple[str, int]]:
+        """
+        Returns the n most frequent terms.
+
+        :param n: The number of terms.
+        :return: (term, count) pairs, most frequent first.
+        """
+        counts = self._corpus_counts()
+        return [(term, counts[term]) for term, _ in zip(counts, range(n))]
+
+    def close(self) -> None:
+        """
+        Unmaps all open segments.
+        """
+        for segment in self._segments.values():
+            segment.close()
+        self._segments.clear()
+
+
+if __name__ == "__main__":
+    with WordIndex("data/words.ignore.idx") as index:
+        print(f"Indexed: {index.refresh(['data/words.txt'])}")
+        print(index.top(5))
+        print(index.lookup("content"))
+        # The corpus counts are kept apart from the segments; they must agree
+        assert index.count("content") == len(index.lookup("content"))
+        print(index.lines_with_all(["content", "correct"]))
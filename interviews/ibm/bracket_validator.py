@@ -0,0 +1,332 @@
+"""
+Streaming and parallel bracket validation for inputs too large to hold in memory.
+
+`is_valid_par` in check_parens.py walks a whole string one character at a time. This module
+validates a byte stream chunk by chunk instead:
+
+- Non-bracket bytes are dropped with a precomputed `bytes.translate` delete table, so the Python
+  loop only ever sees the brackets themselves.
+- Every chunk is reduced to a `ChunkSummary`: the closers it could not match (they must be
+  matched by whatever came before it), the openers still open at its end, and the first
+  mismatch inside it. Summaries combine associatively, so the streaming mode folds them left to
+  right and the parallel mode computes them in a process pool and reduces them afterwards.
+- Errors are reported as byte offsets from the start of the input.
+
+Brackets inside JSON strings or comments are not treated specially.
+"""
+
+import os
+import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import reduce
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional, Union
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+_PAIRS = {ord(")"): ord("("), ord("]"): ord("["), ord("}"): ord("{")}
+_OPENING = frozenset(_PAIRS.values())
+_BRACKETS = b"()[]{}"
+
+# Deleting everything except the six bracket bytes leaves a string the loop can walk directly
+_NON_BRACKETS = bytes(b for b in range(256) if b not in _BRACKETS)
+_BRACKET_RE = re.compile(rb"[()\[\]{}]")
+
+
+@dataclass
+class BracketReport:
+    """
+    The outcome of validating an input.
+
+    :param valid: True if every bracket is matched and properly nested.
+    :param error_offset: The byte offset of the first error, or None if the input is valid.
+        For unclosed brackets this is the end of the input, where a closer was expected.
+    :param reason: A human-readable description of the error, or an empty string.
+    """
+
+    valid: bool
+    error_offset: Optional[int] = None
+    reason: str = ""
+
+
+class ChunkSummary(NamedTuple):
+    """
+    The reduction of a contiguous span of the input.
+
+    :param closers: Closing brackets that had nothing to match inside the span, in order.
+    :param closer_offsets: The byte offsets of `closers`.
+    :param openers: Opening brackets still open at the end of the span, outermost first.
+    :param error_offset: The offset of the first mismatch inside the span, if any. Once set, the
+        span's openers are irrelevant and `closers` only holds closers seen before the error.
+    :param length: The number of bytes covered by the span.
+    """
+
+    closers: bytes
+    closer_offsets: array
+    openers: bytes
+    error_offset: Optional[int]
+    length: int
+
+
+EMPTY_SUMMARY = ChunkSummary(b"", array("q"), b"", None, 0)
+
+
+def summarize_chunk(chunk: bytes, base: int = 0) -> ChunkSummary:
+    """
+    Reduces a chunk of input to its unmatched closers and openers.
+
+    :param chunk: The raw bytes of the chunk.
+    :param base: The byte offset of the chunk within the whole input.
+    :return: The ChunkSummary of the chunk.
+    """
+    filtered = chunk.translate(None, _NON_BRACKETS)
+
+    stack = bytearray()
+    closers = bytearray()
+    closer_indexes = []
+    error_index = None
+
+    for index, byte in enumerate(filtered):
+        if byte in _OPENING:
+            stack.append(byte)
+        elif stack:
+            if stack[-1] != _PAIRS[byte]:
+                error_index = index
+                break
+            stack.pop()
+        else:
+            closers.append(byte)
+            closer_indexes.append(index)
+
+    # Indexes are positions within the filtered brackets; map the few we report back to byte
+    # offsets with a second scan, which only happens for chunks that need it
+    closer_offsets = array("q")
+    error_offset = None
+    if closer_indexes or error_index is not None:
+        positions = [match.start() for match in _BRACKET_RE.finditer(chunk)]
+        closer_offsets.extend(base + positions[index] for index in closer_indexes)
+        if error_index is not None:
+            error_offset = base + positions[error_index]
+            stack.clear()
+
+    return ChunkSummary(bytes(closers), closer_offsets, bytes(stack), error_offset, len(chunk))
+
+
+def combine_summaries(left: ChunkSummary, right: ChunkSummary) -> ChunkSummary:
+    """
+    Combines the summaries of two adjacent spans into the summary of their concatenation.
+
+    The operation is associative, so any grouping of adjacent summaries gives the same result.
+
+    :param left: The summary of the earlier span.
+    :param right: The summary of the span immediately after it.
+    :return: The summary of both spans.
+    """
+    length = left.length + right.length
+
+    # Anything after an error cannot produce an earlier error
+    if left.error_offset is not None:
+        return left._replace(length=length)
+
+    # The right span's leading closers match the left span's trailing openers, innermost first
+    matched = min(len(left.openers), len(right.closers))
+    for i in range(matched):
+        if left.openers[-1 - i] != _PAIRS[right.closers[i]]:
+            return ChunkSummary(
+                left.closers, left.closer_offsets, b"", right.closer_offsets[i], length
+            )
+
+    return ChunkSummary(
+        left.closers + right.closers[matched:],
+        left.closer_offsets + right.closer_offsets[matched:],
+        left.openers[: len(left.openers) - matched] + right.openers,
+        right.error_offset,
+        length,
+    )
+
+
+def report_from_summary(summary: ChunkSummary) -> BracketReport:
+    """
+    Turns the summary of the whole input into a BracketReport.
+
+    :param summary: The summary covering the entire input.
+    :return: The BracketReport for the input.
+    """
+    if summary.closers:
+        closer = chr(summary.closers[0])
+        return BracketReport(
+            False, summary.closer_offsets[0], f"Unexpected '{closer}' with nothing to close."
+        )
+    if summary.error_offset is not None:
+        return BracketReport(
+            False, summary.error_offset, "Closing bracket does not match the open bracket."
+        )
+    if summary.openers:
+        opener = chr(summary.openers[-1])
+        return BracketReport(
+            False,
+            summary.length,
+            f"Unexpected end of input: {len(summary.openers)} bracket(s) still open, "
+            f"innermost '{opener}'.",
+        )
+    return BracketReport(True)
+
+
+class StreamingBracketValidator:
+    """
+    An incremental validator: feed it chunks as they arrive, then call `finish`.
+
+    Memory use is the current chunk plus the stack of open brackets.
+    """
+
+    def __init__(self) -> None:
+        self._summary = EMPTY_SUMMARY
+
+    @property
+    def failed(self) -> bool:
+        """
+        True once an error has been found; further input cannot make the stream valid.
+        """
+        return bool(self._summary.closers) or self._summary.error_offset is not None
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        Validates the next chunk of input.
+
+        :param chunk: The next bytes of the stream.
+        """
+        if self.failed:
+            # Keep counting bytes, but the first error is already known
+            self._summary = self._summary._replace(length=self._summary.length + len(chunk))
+            return
+
+        self._summary = combine_summaries(
+            self._summary, summarize_chunk(chunk, self._summary.length)
+        )
+
+    def finish(self) -> BracketReport:
+        """
+        Returns the report for everything fed so far.
+
+        :return: The BracketReport for the stream.
+        """
+        return report_from_summary(self._summary)
+
+
+ChunkSource = Union[BinaryIO, Iterable[bytes]]
+
+
+def iter_chunks(source: ChunkSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yields chunks from a binary file, a socket, or any iterable of bytes.
+
+    :param source: An object with `recv` (socket) or `read` (file), or an iterable of bytes.
+    :param chunk_size: The maximum number of bytes per read.
+    :return: An iterator of non-empty byte chunks.
+    """
+    if hasattr(source, "recv"):
+        read = source.recv
+    elif hasattr(source, "read"):
+        read = source.read
+    else:
+        yield from (chunk for chunk in source if chunk)
+        return
+
+    while chunk := read(chunk_size):
+        yield chunk
+
+
+def validate_stream(
+    source: ChunkSource, chunk_size: int = DEFAULT_CHUNK_SIZE, stop_on_error: bool = True
+) -> BracketReport:
+    """
+    Validates a stream of bytes chunk by chunk.
+
+    :param source: A binary file, a socket, or an iterable of bytes.
+    :param chunk_size: The maximum number of bytes per read.
+    :param stop_on_error: Stop reading at the first mismatched or unexpected closer instead of
+        draining the rest of the source.
+    :return: The BracketReport for the stream.
+    """
+    validator = StreamingBracketValidator()
+
+    for chunk in iter_chunks(source, chunk_size):
+        validator.feed(chunk)
+        if stop_on_error and validator.failed:
+            break
+
+    return validator.finish()
+
+
+def validate_bytes(data: Union[bytes, str]) -> BracketReport:
+    """
+    Validates an in-memory buffer. Strings are encoded as UTF-8, so offsets are byte offsets.
+
+    :param data: The bytes or string to validate.
+    :return: The BracketReport for the data.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return report_from_summary(summarize_chunk(data))
+
+
+def _summarize_file_range(path: str, start: int, length: int) -> ChunkSummary:
+    # Each worker reads its own range, so no chunk data has to be pickled across processes
+    with open(path, "rb") as file:
+        file.seek(start)
+        return summarize_chunk(file.read(length), start)
+
+
+def validate_file(
+    path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: Optional[int] = None
+) -> BracketReport:
+    """
+    Validates a file, either streaming it in a single process or, when `workers` is given,
+    summarizing its chunks in a process pool and combining the summaries in order.
+
+    :param path: The path of the file to validate.
+    :param chunk_size: The number of bytes per chunk.
+    :param workers: The number of worker processes, or None for the single-process stream.
+    :return: The BracketReport for the file.
+    """
+    if workers is None:
+        with open(path, "rb") as file:
+            return validate_stream(file, chunk_size)
+
+    size = os.path.getsize(path)
+    starts = range(0, size, chunk_size)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        summaries = executor.map(
+            _summarize_file_range,
+            [path] * len(starts),
+            starts,
+            [chunk_size] * len(starts),
+        )
+        return report_from_summary(reduce(combine_summaries, summaries, EMPTY_SUMMARY))
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    for text in ["()[]{}", "([)]", "([])", '{"a": [1, 2, {"b": (3)}]}', "}{", "(("]:
+        print(f"{text!r}: {validate_bytes(text)}")
+
+    # Simulate a deeply nested, multi-chunk document
+    with tempfile.NamedTemporaryFile("wb", suffix=".json", delete=False) as file:
+        for _ in range(200_000):
+            file.write(b'{"items": [1, 2, 3], "nested": {"a": [')
+        for _ in range(200_000):
+            file.write(b"]}}")
+        path = file.name
+
+    try:
+        for workers in (None, os.cpu_count()):
+            start_time = time.perf_counter()
+            report = validate_file(path, chunk_size=1 << 20, workers=workers)
+            duration = time.perf_counter() - start_time
+            print(f"workers={workers}: {report} in {duration:.3f} seconds")
+    finally:
+        os.remove(path)
@@ -5,6 +5,8 @@
 # ([]) => true
 # ()[]{} => true
 
+OPENING = frozenset('([{')
+
 def is_valid_par(s):
 
   b_map = {
@@ -24,16 +26,19 @@ def is_valid_par(s):
         stack.pop()  # Pop the matching opening bracket
       else:
         return False  # Not a valid pair
-    else:
+    elif char in OPENING:
       stack.append(char)  # Push opening brackets onto the stack
+    # Any other character (letters, digits, ...) is ignored
 
   # If the stack is empty, all brackets are matched
   return not stack
       
 
-inputs = [
-  "()[]{}",
-  "([)]",
-  "([])"
-]
-print([is_valid_par(input) for input in inputs])
+if __name__ == "__main__":
+  inputs = [
+    "()[]{}",
+    "([)]",
+    "([])",
+    "f(a[0]) { return x; }"
+  ]
+  print([is_valid_par(input) for input in inputs])
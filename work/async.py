@@ -1,5 +1,7 @@
 import asyncio
 
+from warlock_utils_package import TaskRunner, run_monitored
+
 async def print_numbers():
   for i in range(10):
     print(i)
@@ -12,9 +14,16 @@ async def print_letters():
 
 async def main():
 
+  # Run the coroutines as a structured group: if one fails, the other is cancelled
+  async with TaskRunner() as runner:
+    runner.submit(print_numbers)
+    runner.submit(print_letters)
+
+  # OR
+
   # Gather multiple coroutines into one
-  await asyncio.gather(print_numbers(), print_letters())
-  
+  # await asyncio.gather(print_numbers(), print_letters())
+
   # OR
 
   # Create tasks
@@ -25,4 +34,5 @@ async def main():
   # await t1
   # await t2
 
-asyncio.run(main())
+# Set LOOP_MONITOR=1 to report what blocks the event loop
+run_monitored(main())
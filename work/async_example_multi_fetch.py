@@ -1,23 +1,39 @@
-import asyncio
-import aiohttp
-
 # Can be imported if warlock_utils_package is not a package
 # from warlock_utils_package.decorators import decorator
 # else import like
-from warlock_utils_package import decorator
+from warlock_utils_package import TaskRunner, decorator, run_monitored
 
+from http_cache import HttpCache
+from url_fetcher import UrlFetcher
+
+
+async def fetch_url(fetcher, url):
+    result = await fetcher.fetch(url)
+    if result.ok:
+        print(f"Fetched {url} with length {result.size}")
+    else:
+        print(f"Failed to fetch {url}: {result.error or result.status}")
+    return result
 
-@decorator
-async def fetch_url(session, url):
-    async with session.get(url) as response:
-        content = await response.text()
-        print(f"Fetched {url} with length {len(content)}")
 
+# Decorates the whole run rather than every request, so the output stays readable at scale
+@decorator
 async def main(urls):
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch_url(session, url) for url in urls]
-        await asyncio.gather(*tasks)
+    # Responses are revalidated instead of re-downloaded across runs
+    cache = HttpCache(disk_dir="data/http_cache.ignore")
+
+    async with UrlFetcher(concurrency=50, limit_per_host=10, cache=cache) as fetcher:
+        async with TaskRunner(
+            max_concurrency=fetcher.concurrency, policy="collect", timeout=30
+        ) as runner:
+            for url in urls:
+                runner.submit(fetch_url, fetcher, url, name=url)
+
+    print(runner.metrics.report())
+
 
-# Usage
-urls = ["http://example.com", "http://example.org", "http://example.net"]
-asyncio.run(main(urls))
+if __name__ == "__main__":
+    # Usage
+    urls = ["http://example.com", "http://example.org", "http://example.net"]
+    # Set LOOP_MONITOR=1 to report what blocks the event loop
+    run_monitored(main(urls))
@@ -0,0 +1,387 @@
+"""
+Transparent compressed file I/O.
+
+`open_file` is a drop-in replacement for `open` that reads and writes gzip, xz and bzip2 files.
+The format is taken from the file's magic bytes when reading (so a misnamed file still reads) and
+from its extension (.gz, .xz, .bz2) when writing; other files are opened as usual.
+
+Writing gzip with `parallel=True` uses ParallelGzipWriter, which compresses the output in
+independent blocks on a pool of workers, pigz-style. Every block is a complete gzip member, and
+gzip readers (including `gzip.open`, zcat and pigz) read concatenated members as one stream, so
+the result is an ordinary .gz file. Blocks end at line boundaries, and with `index=True` a
+sidecar "<file>.idx" records where each block starts; `open_at_block` and `read_block` use it to
+start reading at any block without decompressing the ones before it.
+"""
+
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import IO, BinaryIO, List, Optional
+
+GZIP = "gzip"
+XZ = "xz"
+BZIP2 = "bzip2"
+
+_MAGIC = [
+    (b"\x1f\x8b", GZIP),
+    (b"\xfd7zXZ\x00", XZ),
+    (b"BZh", BZIP2),
+]
+_EXTENSIONS = {".gz": GZIP, ".gzip": GZIP, ".xz": XZ, ".bz2": BZIP2}
+_OPENERS = {GZIP: gzip.open, XZ: lzma.open, BZIP2: bz2.open}
+
+INDEX_SUFFIX = ".idx"
+
+
+def compression_from_extension(path) -> Optional[str]:
+    """
+    :return str: "gzip", "xz" or "bzip2" for a compressed file name, otherwise None.
+    """
+    return _EXTENSIONS.get(os.path.splitext(str(path))[1].lower())
+
+
+def detect_compression(path) -> Optional[str]:
+    """
+    Detects the compression of an existing file from its first bytes, falling back to the
+    extension for files too short to tell (e.g. empty ones).
+
+    :return str: "gzip", "xz" or "bzip2", or None for an uncompressed file.
+    """
+    with open(path, "rb") as file:
+        head = file.read(6)
+    for magic, compression in _MAGIC:
+        if head.startswith(magic):
+            return compression
+    return compression_from_extension(path) if len(head) < 2 else None
+
+
+def open_file(
+    path,
+    mode: str = "r",
+    encoding: Optional[str] = None,
+    newline: Optional[str] = None,
+    compresslevel: Optional[int] = None,
+    parallel: bool = False,
+    **writer_options,
+) -> IO:
+    """
+    Opens a file like `open`, compressing or decompressing transparently.
+
+    :param path: The file to open.
+    :param mode (str): "r", "w", "a", "x", with "b" for binary; text mode by default.
+    :param encoding (str): The text encoding, as for `open`.
+    :param newline (str): The newline handling, as for `open`.
+    :param compresslevel (int): The compression level; defaults to each format's default.
+    :param parallel (bool): Whether gzip output is compressed by a ParallelGzipWriter.
+    :param writer_options: Passed on to ParallelGzipWriter, e.g. workers or index.
+
+    :return IO: The open file.
+    """
+    reading = "r" in mode and "+" not in mode
+    compression = (
+        detect_compression(path)
+        if reading and os.path.exists(path)
+        else compression_from_extension(path)
+    )
+    if compression is None:
+        return open(path, mode, encoding=encoding, newline=newline)
+
+    binary = "b" in mode
+    if compression == GZIP and parallel and mode.strip("bt") == "w":
+        writer = ParallelGzipWriter(
+            path, level=compresslevel if compresslevel is not None else 6, **writer_options
+        )
+        return writer if binary else io.TextIOWrapper(writer, encoding=encoding, newline=newline)
+
+    raw_mode = mode.replace("t", "") + ("" if binary else "t")
+    options = {} if binary else {"encoding": encoding, "newline": newline}
+    if compresslevel is not None:
+        key = "preset" if compression == XZ else "compresslevel"
+        options[key] = compresslevel
+    return _OPENERS[compression](path, raw_mode, **options)
+
+
+@dataclass
+class BlockIndex:
+    """
+    Where each block of a ParallelGzipWriter file starts, in the compressed file and in the
+    uncompressed data. Block i covers uncompressed bytes
+    [uncompressed_offsets[i], uncompressed_offsets[i] + uncompressed_sizes[i]).
+    """
+
+    compressed_offsets: List[int] = field(default_factory=list)
+    compressed_sizes: List[int] = field(default_factory=list)
+    uncompressed_offsets: List[int] = field(default_factory=list)
+    uncompressed_sizes: List[int] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.compressed_offsets)
+
+    def append(self, compressed_size: int, uncompressed_size: int):
+        if self.compressed_offsets:
+            self.compressed_offsets.append(self.compressed_offsets[-1] + self.compressed_sizes[-1])
+            self.uncompressed_offsets.append(
+                self.uncompressed_offsets[-1] + self.uncompressed_sizes[-1]
+            )
+        else:
+            self.compressed_offsets.append(0)
+            self.uncompressed_offsets.append(0)
+        self.compressed_sizes.append(compressed_size)
+        self.uncompressed_sizes.append(uncompressed_size)
+
+    def block_at(self, offset: int) -> int:
+        """
+        :param offset (int): A position in the uncompressed data.
+
+        :return int: The number of the block containing it.
+        """
+        end = self.uncompressed_offsets[-1] + self.uncompressed_sizes[-1] if self else 0
+        if not 0 <= offset < end:
+            raise IndexError(f"Offset {offset} is outside the data.")
+        return bisect_right(self.uncompressed_offsets, offset) - 1
+
+    def save(self, path: str):
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(asdict(self), file)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BlockIndex":
+        """
+        :param path (str): The compressed file, or its ".idx" file.
+        """
+        if not path.endswith(INDEX_SUFFIX):
+            path += INDEX_SUFFIX
+        with open(path, "r", encoding="utf-8") as file:
+            return cls(**json.load(file))
+
+
+def _compress_block(data: bytes, level: int) -> bytes:
+    # Module level, so it can be pickled for process pools. mtime=0 keeps the output reproducible
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class ParallelGzipWriter(io.BufferedIOBase):
+    """
+    A binary file writer that compresses blocks of about `block_size` bytes in parallel.
+
+    Written data is cut into blocks at line boundaries (a line longer than a block goes into one
+    block whole). Each block is compressed into an independent gzip member on the pool, and the
+    members are written in order. At most 2 * workers blocks are in flight, which bounds the
+    memory to a few blocks per worker however fast the data comes in.
+
+    zlib releases the GIL while compressing, so the default thread pool uses every core without
+    pickling the blocks; kind="process" is there for platforms or builds where it does not. The
+    cost is a slightly larger file (each block starts with an empty dictionary), under 1% for
+    1 MiB blocks.
+
+    Usage:
+        with open_file("data/out.csv.gz", "w", parallel=True, index=True) as file:
+            file.write(...)
+    """
+
+    def __init__(
+        self,
+        path,
+        level: int = 6,
+        block_size: int = 1024 * 1024,
+        workers: Optional[int] = None,
+        kind: str = "thread",
+        executor: Optional[Executor] = None,
+        index: bool = False,
+    ):
+        """
+        :param path: The file to write.
+        :param level (int): The gzip compression level, 1 (fastest) to 9 (smallest).
+        :param block_size (int): The uncompressed size of a block, in bytes.
+        :param workers (int): The pool size; defaults to the number of CPUs.
+        :param kind (str): "thread" or "process", used when no executor is given.
+        :param executor (Executor): An existing pool to use instead of creating one.
+        :param index (bool): Whether to write a BlockIndex to "<path>.idx" on close.
+        """
+        super().__init__()
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown pool kind: {kind!r}")
+
+        self.path = str(path)
+        self.level = level
+        self.block_size = block_size
+        self.workers = workers or os.cpu_count() or 1
+        self.index = BlockIndex() if index else None
+
+        self._owns_executor = executor is None
+        if executor is None:
+            pool_class = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+            executor = pool_class(max_workers=self.workers)
+        self._executor = executor
+        self._file = open(self.path, "wb")
+        self._buffer = bytearray()
+        self._pending: deque = deque()  # (future, uncompressed size), in file order
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            end = self._buffer.rfind(b"\n", 0, self.block_size) + 1
+            if end == 0:
+                # A line longer than a block: cut after it instead
+                end = self._buffer.find(b"\n", self.block_size) + 1
+                if end == 0:
+                    break  # Wait for the end of the line
+            self._submit(bytes(self._buffer[:end]))
+            del self._buffer[:end]
+        return len(data)
+
+    def _submit(self, block: bytes):
+        self._pending.append(
+            (self._executor.submit(_compress_block, block, self.level), len(block))
+        )
+        while len(self._pending) >= 2 * self.workers:
+            self._write_next()
+
+    def _write_next(self):
+        future, size = self._pending.popleft()
+        member = future.result()
+        self._file.write(member)
+        if self.index is not None:
+            self.index.append(len(member), size)
+
+    def flush(self):
+        # Blocks are only cut by size: flushing partial blocks would make the file larger, and
+        # TextIOWrapper flushes often. Everything is written on close.
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            # With no data at all, one empty member still makes it a valid gzip file
+            if self._buffer or (not self._pending and self._file.tell() == 0):
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._write_next()
+            if self.index is not None:
+                self.index.save(self.path + INDEX_SUFFIX)
+        finally:
+            for future, _ in self._pending:
+                future.cancel()
+            self._file.close()
+            if self._owns_executor:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+            super().close()
+
+
+def read_block(path, block: int, index: Optional[BlockIndex] = None) -> bytes:
+    """
+    Decompresses one block of a file written with an index.
+
+    :param path: The compressed file.
+    :param block (int): The block number.
+    :param index (BlockIndex): The file's index; loaded from "<path>.idx" if not given.
+
+    :return bytes: The block's uncompressed data; always whole lines.
+    """
+    index = index or BlockIndex.load(str(path))
+    with open(path, "rb") as file:
+        file.seek(index.compressed_offsets[block])
+        return gzip.decompress(file.read(index.compressed_sizes[block]))
+
+
+class _OwningGzipFile(gzip.GzipFile):
+    # GzipFile never closes a file object it was given; this one does
+    def __init__(self, file: BinaryIO):
+        super().__init__(fileobj=file, mode="rb")
+        self._owned_file = file
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._owned_file.close()
+
+
+def open_at_block(
+    path,
+    block: int,
+    index: Optional[BlockIndex] = None,
+    encoding: Optional[str] = None,
+    newline: Optional[str] = None,
+) -> IO:
+    """
+    Opens a file written with an index for reading from the start of a block to the end of the
+    file, without decompressing the blocks before it.
+
+    :param path: The compressed file.
+    :param block (int): The block number; see BlockIndex.block_at to find it from an offset.
+    :param index (BlockIndex): The file's index; loaded from "<path>.idx" if not given.
+    :param encoding (str): The text encoding.
+    :param newline (str): The newline handling, as for `open`.
+
+    :return IO: A text stream, positioned at the start of a line.
+    """
+    index = index or BlockIndex.load(str(path))
+    file = open(path, "rb")
+    try:
+        file.seek(index.compressed_offsets[block])
+        compressed = _OwningGzipFile(file)
+    except BaseException:
+        file.close()
+        raise
+    return io.TextIOWrapper(compressed, encoding=encoding, newline=newline)
+
+
+if __name__ == "__main__":
+    import time
+
+    from file_operations import FileOperations, Person
+
+    file_operations = FileOperations()
+    persons = [
+        Person(name=f"Person {i}", age=i % 90, city=["London", "Paris", "Tokyo"][i % 3])
+        for i in range(300_000)
+    ]
+
+    print(f"{'file':<36} {'write s':>8} {'read s':>8} {'size':>10}")
+    for target in (
+        "data/compressed.ignore.csv",
+        "data/compressed.ignore.csv.gz",
+        "data/compressed.ignore.csv.xz",
+        "data/compressed.ignore.csv.bz2",
+    ):
+        start_time = time.perf_counter()
+        file_operations.write_csv(target, persons)
+        written = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        count = len(file_operations.read_csv(target))
+        read = time.perf_counter() - start_time
+        assert count == len(persons)
+        print(f"{target:<36} {written:8.2f} {read:8.2f} {os.path.getsize(target) >> 10:7} KiB")
+
+    # Single-threaded gzip for comparison with the parallel writer used above
+    start_time = time.perf_counter()
+    with gzip.open("data/compressed.single.ignore.csv.gz", "wt", newline="") as file:
+        file.write(file_operations.read("data/compressed.ignore.csv"))
+    print(f"gzip.open, one thread: {time.perf_counter() - start_time:.2f}s")
+
+    path = "data/compressed.indexed.ignore.csv.gz"
+    with open_file(path, "w", newline="", parallel=True, index=True) as file:
+        file.write(file_operations.read("data/compressed.ignore.csv"))
+    index = BlockIndex.load(path)
+    middle = index.block_at(index.uncompressed_offsets[-1] // 2)
+    with open_at_block(path, middle) as file:
+        print(f"{len(index)} blocks; block {middle} starts with {file.readline()!r}")
+    print(f"Last line of block 0: {read_block(path, 0, index).splitlines()[-1]!r}")
@@ -0,0 +1,386 @@
+"""
+External merge sort and group-by for Person files larger than memory.
+
+Sorting with `FileOperations.read_csv` needs every Person in a list at once, and a Person object
+takes roughly ten times the bytes of its CSV row. Here, the input is streamed instead:
+
+1. Persons are read into a buffer until its estimated size reaches the memory budget; the buffer
+   is sorted and written to a temporary "run" file. Each run is sorted on its own.
+2. The runs are merged with `heapq.merge`, which holds only the current person of each run. When
+   there are more runs than `max_fan_in`, neighbouring runs are merged into longer runs first, so
+   the number of open files stays bounded.
+
+Both steps are stable: persons with equal keys keep their input order, because each run is sorted
+with the stable `list.sort` and `heapq.merge` prefers earlier runs on ties.
+
+Memory use is about `memory_bytes` plus one read buffer per merged run, independent of the input
+size; the disk needs room for about twice the input (the runs and, for multi-pass merges, the next
+generation of runs). A 20 GB export sorts with the default 512 MiB budget into ~400 runs, merged
+in two passes.
+
+Usage:
+    external_sort("data/persons.csv", "data/persons.sorted.jsonl", keys=["city", "-age"])
+
+    for city, persons in group_by("data/persons.csv", ["city"]):
+        print(city, sum(1 for _ in persons))
+"""
+
+import csv
+import heapq
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import fields
+from operator import attrgetter
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from compressed_io import compression_from_extension, open_file
+from file_operations import FileOperations, Person, person_schema
+
+FIELDS = {field.name: field.type for field in fields(Person)}
+
+DEFAULT_MEMORY_BYTES = 512 * 1024 * 1024
+DEFAULT_FAN_IN = 64
+_READ_BUFFER = 64 * 1024  # Per run file during merges
+
+
+class _Descending:
+    """
+    Inverts the ordering of a value, for descending keys that can't be negated (strings).
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other) -> bool:
+        return self.value == other.value
+
+
+def sort_key(keys: Sequence[str]) -> Callable[[Person], object]:
+    """
+    Builds a key function from field names, e.g. ["city", "-age"] sorts by city, then by age in
+    descending order.
+
+    :param keys (Sequence[str]): Person field names, each optionally prefixed with "-".
+
+    :return Callable: A key function for sorted, list.sort or heapq.merge.
+    """
+    if not keys:
+        raise ValueError("At least one sort key is required.")
+
+    parts = []
+    for spec in keys:
+        name = spec.lstrip("-")
+        if name not in FIELDS:
+            raise ValueError(f"Unknown field {name!r}; expected one of {list(FIELDS)}.")
+        parts.append((name, spec.startswith("-")))
+
+    if not any(descending for _, descending in parts):
+        return attrgetter(*(name for name, _ in parts))
+
+    getters = []
+    for name, descending in parts:
+        getter = attrgetter(name)
+        if not descending:
+            getters.append(getter)
+        elif FIELDS[name] in (int, float):
+            getters.append(lambda person, getter=getter: -getter(person))
+        else:
+            getters.append(lambda person, getter=getter: _Descending(getter(person)))
+    return lambda person: tuple(getter(person) for getter in getters)
+
+
+def _overhead(person: Person) -> int:
+    # The object, its attribute dict, its field values (minus the characters), a list slot and a
+    # key tuple
+    return (
+        sys.getsizeof(person)
+        + sys.getsizeof(person.__dict__)
+        + sys.getsizeof(person.age)
+        + sys.getsizeof("") * 2
+        + 8
+        + 80
+    )
+
+
+_PERSON_OVERHEAD = _overhead(Person(name="", age=0, city=""))
+
+
+def _is_jsonl(path: str) -> bool:
+    if compression_from_extension(path):
+        path = os.path.splitext(str(path))[0]
+    return str(path).endswith((".jsonl", ".ndjson"))
+
+
+def read_persons(path: str) -> Iterator[Person]:
+    """
+    Streams persons from a CSV file or, for .jsonl/.ndjson files, JSON lines, either of which may
+    be compressed. Invalid records are reported and skipped, as FileOperations does.
+
+    :param path (str): The file to read.
+
+    :return Iterator[Person]: The persons, in file order.
+    """
+    with open_file(path, "r", newline="") as file:
+        if not _is_jsonl(path):
+            file_operations = FileOperations()
+            for row in csv.DictReader(file):
+                person = file_operations.parse_row(row)
+                if person is not None:
+                    yield person
+            return
+
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield Person.deserialize(json.loads(line))
+            except (KeyError, ValueError) as e:
+                print(f"Invalid JSON line {line_number}: {e}. Skipping.")
+
+
+def write_persons(path: str, persons: Iterable[Person]) -> int:
+    """
+    Writes persons to a CSV file or, for .jsonl/.ndjson files, JSON lines; compressed by the
+    extension, e.g. ".csv.gz".
+
+    :param path (str): The file to write.
+    :param persons (Iterable[Person]): The persons; consumed lazily.
+
+    :return int: The number of persons written.
+    """
+    count = 0
+    with open_file(path, "w", newline="", parallel=True) as file:
+        if not _is_jsonl(path):
+            writer = csv.writer(file)
+            writer.writerow(person_schema.fieldnames)
+            for person in persons:
+                writer.writerow(person_schema.to_row(person))
+                count += 1
+            return count
+
+        dumps, to_dict = json.dumps, person_schema.to_dict
+        for person in persons:
+            file.write(dumps(to_dict(person)) + "\n")
+            count += 1
+    return count
+
+
+# Runs are plain CSV rows without a header: the fastest format csv can read back
+def _write_run(directory: str, persons: List[Person]) -> str:
+    handle, path = tempfile.mkstemp(suffix=".run", dir=directory)
+    with os.fdopen(handle, "w", newline="") as file:
+        csv.writer(file).writerows(map(person_schema.to_row, persons))
+    return path
+
+
+def _read_run(path: str) -> Iterator[Person]:
+    with open(path, "r", newline="", buffering=_READ_BUFFER) as file:
+        yield from map(person_schema.from_row, csv.reader(file))
+
+
+class SortStats:
+    """
+    What an external sort did, for tuning the memory budget.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.runs = 0
+        self.merge_passes = 0
+        self.duration = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"SortStats(records={self.records}, runs={self.runs}, "
+            f"merge_passes={self.merge_passes}, duration={self.duration:.2f}s)"
+        )
+
+
+def sorted_persons(
+    persons: Iterable[Person],
+    keys: Sequence[str],
+    memory_bytes: int = DEFAULT_MEMORY_BYTES,
+    max_fan_in: int = DEFAULT_FAN_IN,
+    temp_dir: Optional[str] = None,
+    stats: Optional[SortStats] = None,
+) -> Iterator[Person]:
+    """
+    Sorts a stream of persons with bounded memory, spilling sorted runs to temporary files.
+
+    Input that fits in the budget is sorted in memory without touching the disk. The temporary
+    files are removed when the returned iterator is exhausted or closed.
+
+    :param persons (Iterable[Person]): The input, e.g. read_persons(path).
+    :param keys (Sequence[str]): The sort keys; see sort_key.
+    :param memory_bytes (int): The approximate memory for buffered persons.
+    :param max_fan_in (int): The most runs merged at once.
+    :param temp_dir (str): Where the runs are written; defaults to the system temp directory.
+    :param stats (SortStats): Filled in with what the sort did, if given.
+
+    :return Iterator[Person]: The persons, sorted.
+    """
+    if max_fan_in < 2:
+        raise ValueError("max_fan_in must be at least 2.")
+
+    key = sort_key(keys)
+    stats = stats if stats is not None else SortStats()
+    started = time.perf_counter()
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="external-sort-", dir=temp_dir) as directory:
+            runs: List[str] = []
+            buffer: List[Person] = []
+            size = 0
+            for person in persons:
+                buffer.append(person)
+                size += _PERSON_OVERHEAD + len(person.name) + len(person.city)
+                if size >= memory_bytes:
+                    buffer.sort(key=key)
+                    runs.append(_write_run(directory, buffer))
+                    stats.records += len(buffer)
+                    buffer, size = [], 0
+
+            buffer.sort(key=key)
+            stats.records += len(buffer)
+            if not runs:
+                yield from buffer
+                return
+            if buffer:
+                runs.append(_write_run(directory, buffer))
+            del buffer
+            stats.runs = len(runs)
+
+            # Merge neighbouring runs (which keeps the merge stable) until one pass can merge the
+            # rest
+            while len(runs) > max_fan_in:
+                stats.merge_passes += 1
+                merged = []
+                for i in range(0, len(runs), max_fan_in):
+                    group = runs[i : i + max_fan_in]
+                    if len(group) == 1:
+                        merged.append(group[0])
+                        continue
+                    path = _write_run(
+                        directory, heapq.merge(*(_read_run(run) for run in group), key=key)
+                    )
+                    for run in group:
+                        os.remove(run)
+                    merged.append(path)
+                runs = merged
+
+            stats.merge_passes += 1
+            yield from heapq.merge(*(_read_run(run) for run in runs), key=key)
+    finally:
+        stats.duration = time.perf_counter() - started
+
+
+def external_sort(
+    input_path: str,
+    output_path: str,
+    keys: Sequence[str],
+    memory_bytes: int = DEFAULT_MEMORY_BYTES,
+    max_fan_in: int = DEFAULT_FAN_IN,
+    temp_dir: Optional[str] = None,
+) -> SortStats:
+    """
+    Sorts a Person CSV or JSON lines file into another file, with bounded memory. The formats are
+    chosen by extension, so this also converts between them.
+
+    :param input_path (str): The file to sort.
+    :param output_path (str): The file to write; must differ from the input.
+    :param keys (Sequence[str]): The sort keys, e.g. ["city", "-age"].
+    :param memory_bytes (int): The approximate memory for buffered persons.
+    :param max_fan_in (int): The most runs merged at once.
+    :param temp_dir (str): Where runs are written; defaults to the output file's directory, which
+        must have room for about twice the input.
+
+    :return SortStats: What the sort did.
+    """
+    stats = SortStats()
+    write_persons(
+        output_path,
+        sorted_persons(
+            read_persons(input_path),
+            keys,
+            memory_bytes=memory_bytes,
+            max_fan_in=max_fan_in,
+            temp_dir=temp_dir or os.path.dirname(os.path.abspath(output_path)),
+            stats=stats,
+        ),
+    )
+    return stats
+
+
+def group_by(
+    path: str,
+    keys: Sequence[str],
+    memory_bytes: int = DEFAULT_MEMORY_BYTES,
+    temp_dir: Optional[str] = None,
+) -> Iterator[Tuple[tuple, Iterator[Person]]]:
+    """
+    Streams the persons of a file grouped by the given fields, in sorted order of the fields.
+
+    Like itertools.groupby, each group must be consumed before moving on to the next one; only
+    the current person is in memory, so a group may be larger than memory too.
+
+    :param path (str): A Person CSV or JSON lines file.
+    :param keys (Sequence[str]): The fields to group by; "-" sorts that field descending.
+    :param memory_bytes (int): The approximate memory for the sort.
+    :param temp_dir (str): Where the sort writes its runs.
+
+    :return Iterator[Tuple[tuple, Iterator[Person]]]: (field values, persons) per group.
+    """
+    group_key = attrgetter(*(spec.lstrip("-") for spec in keys))
+    persons = sorted_persons(
+        read_persons(path), keys, memory_bytes=memory_bytes, temp_dir=temp_dir
+    )
+    for value, group in itertools.groupby(persons, key=group_key):
+        yield (value if len(keys) > 1 else (value,)), group
+
+
+if __name__ == "__main__":
+    from warlock_utils_package import memory_profile
+
+    cities = ["New York", "London", "Paris", "Tokyo", "Berlin", "Mumbai", "Lagos"]
+    source = "data/external_sort.ignore.csv"
+    target = "data/external_sort.sorted.ignore.jsonl"
+    keys = ["city", "-age"]
+    FileOperations().write_csv(
+        source,
+        (
+            Person(name=f"Person {i}", age=(i * 7919) % 97, city=cities[(i * 31) % len(cities)])
+            for i in range(100_000)
+        ),
+    )
+
+    # A budget far below the input's in-memory size, to force runs and a multi-pass merge
+    stats = external_sort(source, target, keys, memory_bytes=2 * 1024 * 1024, max_fan_in=8)
+    print(stats)
+
+    start_time = time.perf_counter()
+    expected = sorted(FileOperations().read_csv(source), key=sort_key(keys))
+    print(f"sorted(read_csv) in memory: {time.perf_counter() - start_time:.2f}s")
+    assert list(read_persons(target)) == expected, "Sorted output differs from sorted()"
+    del expected
+
+    # Peak traced memory, measured separately since tracing slows the sort down several times
+    with memory_profile(label="external_sort, 2 MiB budget", mode="cheap"):
+        external_sort(source, target, keys, memory_bytes=2 * 1024 * 1024)
+    with memory_profile(label="sorted(read_csv)", mode="cheap"):
+        sorted(FileOperations().read_csv(source), key=sort_key(keys))
+
+    for (city,), persons in group_by(source, ["city"], memory_bytes=2 * 1024 * 1024):
+        count = total = 0
+        for person in persons:
+            count += 1
+            total += person.age
+        print(f"{city:<10} {count:>7} persons, mean age {total / count:.1f}")
@@ -1,9 +1,12 @@
 import csv
-from dataclasses import dataclass, asdict, fields
+from dataclasses import dataclass
 import json
 from os.path import join
 from pathlib import Path
-from typing import List, Tuple, TypedDict
+from typing import List, Optional, Tuple
+
+from compressed_io import open_file
+from schema import compile_schema
 
 # Define the filename and path for the CSV and JSON files
 filename = join("data", "persons.ignore.csv")
@@ -48,7 +51,7 @@ class Person:
 
         :return: A dictionary representing the Person instance.
         """
-        return asdict(self)
+        return person_schema.to_dict(self)
 
     @staticmethod
     def deserialize(data: "PersonDict") -> "Person":
@@ -58,12 +61,13 @@ class Person:
         :param data: A dictionary with keys matching the Person fields.
         :return: A Person instance.
         """
-        # Convert age to int, since it might be a string if read from sources like JSON or CSV
-        name = data["name"]
-        age = int(data["age"])  # Ensure 'age' is an integer
-        city = data["city"]
+        # The generated from_dict converts age to int, since it might be a string if read from
+        # sources like JSON or CSV
+        return person_schema.from_dict(data)
+
 
-        return Person(name=name, age=age, city=city)
+# Generated serializers for Person; see schema.py
+person_schema = compile_schema(Person)
 
 
 # Instead of using a TypedDict dataclass, we can use a Dynamically created TypedDict below
@@ -81,8 +85,7 @@ def create_typed_dict_from_dataclass(cls):
     :param cls: The dataclass to convert.
     :return: A dynamically created TypedDict class.
     """
-    annotations = {field.name: field.type for field in fields(cls)}
-    return TypedDict(f"{cls.__name__}Dict", annotations, total=True)
+    return compile_schema(cls).typed_dict
 
 
 # Create the PersonDict dynamically
@@ -103,7 +106,7 @@ class FileOperations:
         :return Tuple[int, int]: A tuple containing the number of lines and words.
         """
         try:
-            with open(filename, "r") as file:
+            with open_file(filename, "r") as file:
                 lines = file.readlines()
                 num_lines = len(lines)
                 num_words = sum(len(line.split()) for line in lines)
@@ -131,7 +134,7 @@ class FileOperations:
         """
 
         try:
-            with open(filename, "r") as file:
+            with open_file(filename, "r") as file:
                 data = file.read()
                 return data
         except FileNotFoundError:
@@ -144,6 +147,61 @@ class FileOperations:
             print(f"An error occurred: {e}")
             return ""
 
+    def parse_row(self, row: dict) -> Optional[Person]:
+        """
+        Converts one CSV row into a Person, falling back to age 0 when the age is missing or
+        invalid.
+
+        :param row (dict): A row as produced by csv.DictReader.
+
+        :return Optional[Person]: The Person, or None if the row has to be skipped.
+        """
+        try:
+            return Person.deserialize(row)
+        except KeyError as e:
+            key_name = e.args[0]
+            print(f"Missing key: '{key_name}' in row {row}. Using default value.")
+
+            # Handle missing 'age' key specifically
+            if key_name == "age":
+                return Person(
+                    name=row.get("name", "Unknown"),
+                    age=0,
+                    city=row.get("city", "Unknown"),
+                )
+
+            print(f"Skipping row due to missing key: '{key_name}'.")
+            return None
+
+        except ValueError as e:
+            # Capture invalid value scenarios
+            invalid_key = None
+            for key, value in row.items():
+                try:
+                    # Assuming the expected value types:
+                    # 'name' as str, 'age' as int, 'city' as str
+                    if key == "age":
+                        int(value)  # Check if 'age' can be converted to int
+                    elif key in ["name", "city"]:
+                        if (
+                            not isinstance(value, str) or not value.strip()
+                        ):  # Check for non-empty string
+                            raise ValueError(f"Invalid value for '{key}': {value}")
+                except ValueError:
+                    invalid_key = key
+                    break
+
+            if invalid_key == "age":
+                print(f"ValueError for row {row}: {e}. using default value 0.")
+                return Person(
+                    name=row.get("name", "Unknown"),
+                    age=0,
+                    city=row.get("city", "Unknown"),
+                )
+
+            print(f"ValueError for row {row}: {e}. Skipping row.")
+            return None
+
     def read_csv(self, filename: str) -> List[Person]:
         """
         Reads a CSV file and returns the data as a list of Person instances.
@@ -155,61 +213,12 @@ class FileOperations:
         persons: List[Person] = []
 
         try:
-            with open(filename, "r") as file:
+            with open_file(filename, "r", newline="") as file:
                 csv_reader = csv.DictReader(file)
                 for row in csv_reader:
-                    try:
-                        person = Person.deserialize(row)
+                    person = self.parse_row(row)
+                    if person is not None:
                         persons.append(person)
-                    except KeyError as e:
-                        key_name = e.args[0]
-                        print(
-                            f"Missing key: '{key_name}' in row {row}. Using default value."
-                        )
-
-                        # Handle missing 'age' key specifically
-                        if key_name == "age":
-                            person = Person(
-                                name=row.get("name", "Unknown"),
-                                age=0,
-                                city=row.get("city", "Unknown"),
-                            )
-                            persons.append(person)
-                        else:
-                            print(f"Skipping row due to missing key: '{key_name}'.")
-
-                    except ValueError as e:
-                        # Capture invalid value scenarios
-                        invalid_key = None
-                        for key, value in row.items():
-                            try:
-                                # Assuming the expected value types:
-                                # 'name' as str, 'age' as int, 'city' as str
-                                if key == "age":
-                                    int(value)  # Check if 'age' can be converted to int
-                                elif key in ["name", "city"]:
-                                    if (
-                                        not isinstance(value, str) or not value.strip()
-                                    ):  # Check for non-empty string
-                                        raise ValueError(
-                                            f"Invalid value for '{key}': {value}"
-                                        )
-                            except ValueError:
-                                invalid_key = key
-                                break
-
-                        if invalid_key == "age":
-                            print(
-                                f"ValueError for row {row}: {e}. using default value 0."
-                            )
-                            person = Person(
-                                name=row.get("name", "Unknown"),
-                                age=0,
-                                city=row.get("city", "Unknown"),
-                            )
-                            persons.append(person)
-                        else:
-                            print(f"ValueError for row {row}: {e}. Skipping row.")
 
         except FileNotFoundError:
             print("File not found.")
@@ -231,12 +240,10 @@ class FileOperations:
         """
 
         try:
-            with open(filename, "w", newline="") as file:
-                fieldnames = ["name", "age", "city"]
-                csv_writer = csv.DictWriter(file, fieldnames=fieldnames)
-                csv_writer.writeheader()
-                for person in data:
-                    csv_writer.writerow(person.serialize())
+            with open_file(filename, "w", newline="", parallel=True) as file:
+                csv_writer = csv.writer(file)
+                csv_writer.writerow(person_schema.fieldnames)
+                csv_writer.writerows(map(person_schema.to_row, data))
         except FileNotFoundError:
             print("File not found.")
         except PermissionError:
@@ -255,7 +262,7 @@ class FileOperations:
         """
 
         try:
-            with open(filename, "w") as file:
+            with open_file(filename, "w", parallel=True) as file:
                 json_data = [person.serialize() for person in data]
                 json.dump(json_data, file, indent=4)
         except FileNotFoundError:
@@ -277,7 +284,7 @@ class FileOperations:
         """
 
         try:
-            with open(filename, "r") as file:
+            with open_file(filename, "r") as file:
                 json_data = json.load(file)
                 persons = []
                 for person_data in json_data:
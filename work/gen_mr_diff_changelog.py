@@ -39,11 +39,15 @@ import os
 import traceback
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List
+from typing import TYPE_CHECKING, List
 
-import aiohttp
-import gitlab
-import pyperclip
+from async_file_operations import AsyncFileOperations
+from warlock_utils_package import TaskRunner, run_monitored
+
+# aiohttp, gitlab and pyperclip take a large share of the startup time, so they are imported
+# where they are used; a run with missing settings exits without loading them
+if TYPE_CHECKING:
+    import gitlab
 
 # Data class for holding MR commit details
 
@@ -82,11 +86,31 @@ class MergeRequestDetails:
 
 
 async def fetch_mr_details(
-    project_id: int, mr_id: int, gl: gitlab.Gitlab
+    project_id: int, mr_id: int, gl: "gitlab.Gitlab"
 ) -> MergeRequestDetails:
     """
     Fetches merge request details including commits and diffs from GitLab.
 
+    python-gitlab is a blocking client, so the calls run in a worker thread; awaiting them
+    directly would stall the event loop for every HTTP round trip.
+
+    Args:
+        project_id (int): The GitLab project ID.
+        mr_id (int): The merge request ID.
+        gl (gitlab.Gitlab): An instance of the GitLab client.
+
+    Returns:
+        MergeRequestDetails: A data class containing MR title, author, creation date, commits, and changes.
+    """
+    return await asyncio.to_thread(fetch_mr_details_blocking, project_id, mr_id, gl)
+
+
+def fetch_mr_details_blocking(
+    project_id: int, mr_id: int, gl: "gitlab.Gitlab"
+) -> MergeRequestDetails:
+    """
+    Fetches merge request details including commits and diffs from GitLab, blocking the caller.
+
     Args:
         project_id (int): The GitLab project ID.
         mr_id (int): The merge request ID.
@@ -99,6 +123,7 @@ async def fetch_mr_details(
         gitlab.exceptions.GitlabGetError: If there is an error retrieving the merge request.
         Exception: For any other unexpected errors.
     """
+    import gitlab
 
     try:
         project = gl.projects.get(project_id)
@@ -148,7 +173,7 @@ async def fetch_mr_details(
 
 
 async def generate_diff_between_mrs(
-    project_id: int, mr_id_1: int, mr_id_2: int, gl: gitlab.Gitlab
+    project_id: int, mr_id_1: int, mr_id_2: int, gl: "gitlab.Gitlab"
 ) -> str:
     """
     Generates a diff report between two merge requests by comparing their commits and changes.
@@ -167,17 +192,17 @@ async def generate_diff_between_mrs(
     """
 
     try:
-        # Fetch diffs for both MRs concurrently
-        mr1_details_task: asyncio.Future[MergeRequestDetails] = asyncio.create_task(
-            fetch_mr_details(project_id, mr_id_1, gl)
-        )
-        mr2_details_task: asyncio.Future[MergeRequestDetails] = asyncio.create_task(
-            fetch_mr_details(project_id, mr_id_2, gl)
-        )
+        # Fetch diffs for both MRs concurrently; if one fails, the other is cancelled
+        async with TaskRunner(max_concurrency=2) as runner:
+            mr1_details_task: asyncio.Future[MergeRequestDetails] = runner.submit(
+                fetch_mr_details, project_id, mr_id_1, gl
+            )
+            mr2_details_task: asyncio.Future[MergeRequestDetails] = runner.submit(
+                fetch_mr_details, project_id, mr_id_2, gl
+            )
 
-        # Await the tasks
-        mr1_details: MergeRequestDetails = await mr1_details_task
-        mr2_details: MergeRequestDetails = await mr2_details_task
+        mr1_details: MergeRequestDetails = mr1_details_task.result()
+        mr2_details: MergeRequestDetails = mr2_details_task.result()
 
         print(f"Fetched details for MR#${mr_id_1} and MR#${mr_id_2}")
 
@@ -222,7 +247,8 @@ async def get_space_key(
     Retrieves the Confluence space key for a given page.
 
     Args:
-        session (aiohttp.ClientSession): An aiohttp session for making HTTP requests.
+        session (aiohttp.ClientSession | CachingSession): An aiohttp session for making HTTP
+            requests, optionally wrapped in a cache.
         confluence_base_url (str): The base URL of the Confluence instance.
         page_id (str): The ID of the Confluence page.
         username (str): The Confluence username.
@@ -234,6 +260,7 @@ async def get_space_key(
     Raises:
         aiohttp.ClientResponseError: If the API request fails.
     """
+    import aiohttp
 
     async with session.get(
         f"{confluence_base_url}/rest/api/content/{page_id}?expand=space",
@@ -269,10 +296,15 @@ async def create_confluence_subpage(
         aiohttp.ClientResponseError: If there is an error during the HTTP request.
         Exception: For any other unexpected errors.
     """
+    import aiohttp
+
+    from http_cache import CachingSession, HttpCache
 
     headers = {"Accept": "application/json", "Content-Type": "application/json"}
 
     async with aiohttp.ClientSession() as session:
+        # Page metadata such as the space key rarely changes; keep it across runs and revalidate it
+        session = CachingSession(session, HttpCache(disk_dir="data/http_cache.ignore"))
         try:
             # Generate a title for the new page
             current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -344,9 +376,9 @@ async def main() -> None:
             raise ValueError("MR_ID_1 environment variable is not set or empty.")
         mr_id_1 = int(mr_id_1_str)
 
-        mr_id_2_str: int = int(os.getenv("MR_ID_2"))
+        mr_id_2_str = os.getenv("MR_ID_2")
         if not mr_id_2_str:
-            raise ValueError("MR_ID_1 environment variable is not set or empty.")
+            raise ValueError("MR_ID_2 environment variable is not set or empty.")
         mr_id_2 = int(mr_id_2_str)
 
         gitlab_token: str = os.getenv("GITLAB_PRIVATE_TOKEN")
@@ -356,6 +388,8 @@ async def main() -> None:
         if project_id <= 0 or mr_id_1 <= 0 or mr_id_2 <= 0:
             raise ValueError("Invalid project or MR IDs provided.")
 
+        import gitlab
+
         # Initialize GitLab API client
         gl = gitlab.Gitlab("https://gitlab.com", private_token=gitlab_token)
 
@@ -364,12 +398,14 @@ async def main() -> None:
             project_id, mr_id_1, mr_id_2, gl
         )
 
-        # Write the diff report to a text file
-        with open("data/diff_report.ignore.txt", "w", encoding="utf-8") as file:
-            file.write(diff_report)
+        # Write the diff report to a text file without blocking the event loop
+        async with AsyncFileOperations(max_workers=1) as file_operations:
+            await file_operations.write_text("data/diff_report.ignore.txt", diff_report)
         print("Diff report generated, saved to diff_report.txt")
 
         # Copy the diff report to the clipboard
+        import pyperclip
+
         pyperclip.copy(diff_report)
         print("Diff report copied to clipboard.")
 
@@ -380,6 +416,6 @@ async def main() -> None:
         traceback.print_exc()
 
 
-# Run the main script
+# Run the main script; set LOOP_MONITOR=1 to report what blocks the event loop
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_monitored(main())
@@ -1,3 +1,5 @@
+from warlock_utils_package import Pipeline
+
 def generator(start, stop):
   for i in range(start, stop):
     yield i
@@ -21,3 +23,7 @@ print(next(gen_2))
 squares_gen = (x ** 2 for x in range(2, 5))
 
 print(next(squares_gen))
+
+# Generators compose into lazy pipelines: each stage pulls one item at a time from the previous one
+
+print(Pipeline(generator(0, 100)).filter(lambda x: x % 7 == 0).map(lambda x: x ** 2).batch(3).take(2).collect())
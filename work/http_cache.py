@@ -0,0 +1,652 @@
+import asyncio
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+# Only responses that are complete and reusable as-is are stored
+CACHEABLE_STATUSES = frozenset({200, 203})
+
+_META_LENGTH = struct.Struct("<I")
+
+# `session.get` arguments that change which response comes back; they are part of the cache key
+_KEYED_OPTIONS = ("allow_redirects", "max_redirects")
+# Arguments that only change how the request is made. Requests with any other argument (data,
+# json, cookies, ...) bypass the cache, since the key can't capture them
+_NEUTRAL_OPTIONS = frozenset(
+    {
+        "auth",
+        "timeout",
+        "ssl",
+        "verify_ssl",
+        "proxy",
+        "proxy_auth",
+        "proxy_headers",
+        "read_until_eof",
+        "server_hostname",
+        "trace_request_ctx",
+        *_KEYED_OPTIONS,
+    }
+)
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    Parses a Cache-Control header into a dict of lowercased directives.
+
+    :param value (str): The header value, or None.
+
+    :return Dict[str, Optional[str]]: e.g. {"max-age": "60", "no-cache": None}.
+    """
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _seconds(value: Optional[str]) -> float:
+    # Malformed values count as 0, like a missing header
+    try:
+        return max(0.0, float(value)) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters describing how an HttpCache has been used.
+    """
+
+    hits: int = 0  # Served fresh from the cache, no request made
+    misses: int = 0  # Fetched in full from upstream
+    revalidated: int = 0  # Upstream answered 304 Not Modified; the cached body was reused
+    coalesced: int = 0  # Joined an identical request already in flight
+    stores: int = 0
+    evictions: int = 0
+    memory_bytes: int = 0
+    disk_bytes: int = 0
+
+
+class CacheEntry:
+    """
+    A stored response: status, headers and body, plus what is needed to judge its freshness and
+    revalidate it.
+    """
+
+    __slots__ = ("url", "status", "reason", "headers", "body", "vary", "expires", "size")
+
+    def __init__(self, url, status, reason, headers, body, vary, expires):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers: List[Tuple[str, str]] = headers
+        self.body: bytes = body
+        self.vary: Dict[str, Optional[str]] = vary
+        self.expires: float = expires
+        self.size = len(body) + sum(len(k) + len(v) for k, v in headers)
+
+    def header(self, name: str) -> Optional[str]:
+        name = name.lower()
+        return next((v for k, v in self.headers if k.lower() == name), None)
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires
+
+    def to_bytes(self) -> bytes:
+        meta = json.dumps(
+            {
+                "url": self.url,
+                "status": self.status,
+                "reason": self.reason,
+                "headers": self.headers,
+                "vary": self.vary,
+                "expires": self.expires,
+            }
+        ).encode("utf-8")
+        return _META_LENGTH.pack(len(meta)) + meta + self.body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CacheEntry":
+        (length,) = _META_LENGTH.unpack_from(data)
+        meta = json.loads(data[_META_LENGTH.size : _META_LENGTH.size + length])
+        return cls(
+            meta["url"],
+            meta["status"],
+            meta["reason"],
+            [tuple(pair) for pair in meta["headers"]],
+            data[_META_LENGTH.size + length :],
+            meta["vary"],
+            meta["expires"],
+        )
+
+
+class CachedResponse:
+    """
+    A fully read response, served from the cache or from upstream. It mirrors the parts of
+    aiohttp.ClientResponse that callers of `session.get` use: status, headers, read, text, json
+    and raise_for_status, and it can be used with `async with`.
+    """
+
+    def __init__(self, url, status, reason, headers, body, from_cache, request_info=None):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.body = body
+        self.from_cache = from_cache
+        self.request_info = request_info
+
+    @classmethod
+    def from_entry(cls, entry: CacheEntry, from_cache: bool = True) -> "CachedResponse":
+        return cls(
+            entry.url, entry.status, entry.reason, entry.headers, entry.body, from_cache
+        )
+
+    async def __aenter__(self) -> "CachedResponse":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise aiohttp.ClientResponseError(
+                self.request_info,
+                (),
+                status=self.status,
+                message=self.reason or "",
+                headers=self.headers,
+            )
+
+    async def read(self) -> bytes:
+        return self.body
+
+    async def text(self, encoding: Optional[str] = None) -> str:
+        if encoding is None:
+            content_type = self.headers.get("Content-Type", "")
+            _, _, charset = content_type.partition("charset=")
+            encoding = charset.split(";")[0].strip() or "utf-8"
+        return self.body.decode(encoding)
+
+    async def json(self, loads=json.loads):
+        return loads(await self.text())
+
+
+class _DiskTier:
+    """
+    A directory of cache entries, one file per key, evicted least recently used first once their
+    total size exceeds the byte budget. File mtimes record recency, so the order survives restarts.
+
+    The methods run on worker threads (see HttpCache), so the bookkeeping is guarded by a lock;
+    entry files are renamed into place and deleted under it too, and only read outside it.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        files = []
+        for item in os.scandir(directory):
+            if item.name.endswith(".entry"):
+                stat = item.stat()
+                files.append((stat.st_mtime_ns, item.name, stat.st_size))
+        self._sizes: "OrderedDict[str, int]" = OrderedDict(
+            (name, size) for _, name, size in sorted(files)
+        )
+        self.total = sum(self._sizes.values())
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.entry")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        name = f"{key}.entry"
+        with self._lock:
+            if name not in self._sizes:
+                return None
+        try:
+            with open(self._path(key), "rb") as file:
+                entry = CacheEntry.from_bytes(file.read())
+            os.utime(self._path(key))
+        except (OSError, ValueError, KeyError, struct.error):
+            self.remove(key)
+            return None
+        with self._lock:
+            # A concurrent put may have evicted it meanwhile
+            if name in self._sizes:
+                self._sizes.move_to_end(name)
+        return entry
+
+    def put(self, key: str, entry: CacheEntry) -> int:
+        data = entry.to_bytes()
+        if len(data) > self.max_bytes:
+            return 0
+
+        # Write then rename, so a crash never leaves a truncated entry behind
+        with tempfile.NamedTemporaryFile("wb", dir=self.directory, delete=False) as file:
+            file.write(data)
+
+        name = f"{key}.entry"
+        evicted = 0
+        with self._lock:
+            os.replace(file.name, self._path(key))
+            self.total += len(data) - self._sizes.pop(name, 0)
+            self._sizes[name] = len(data)
+
+            while self.total > self.max_bytes:
+                old_name, size = self._sizes.popitem(last=False)
+                self.total -= size
+                evicted += 1
+                try:
+                    os.remove(os.path.join(self.directory, old_name))
+                except FileNotFoundError:
+                    pass
+        return evicted
+
+    def remove(self, key: str):
+        with self._lock:
+            size = self._sizes.pop(f"{key}.entry", None)
+            if size is not None:
+                self.total -= size
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+
+
+class HttpCache:
+    """
+    A private HTTP cache for aiohttp GET requests, with a memory tier and an optional disk tier.
+
+    - Freshness follows the response's Cache-Control (max-age, s-maxage, no-cache, no-store) or
+      Expires header, minus its Age. Fresh entries are served without any request.
+    - Stale entries that carry an ETag or Last-Modified are revalidated with If-None-Match /
+      If-Modified-Since; a 304 refreshes the entry and reuses the cached body.
+    - Both tiers are LRU with a byte budget. Entries are written through to disk and promoted
+      back into memory when read from it.
+    - Concurrent requests for the same key share one upstream call.
+
+    The cache key is the URL with its query parameters plus the credentials used, so one user's
+    responses are never served to another, and responses are matched on the request headers
+    their Vary header names. Requests with a body, cookies or other arguments that could change
+    the response bypass the cache. Only requests with identical headers are coalesced, since the
+    Vary header of the response isn't known until it arrives.
+
+    Usage:
+        cache = HttpCache(disk_dir="data/http_cache.ignore")
+        async with aiohttp.ClientSession() as session:
+            session = CachingSession(session, cache)
+            async with session.get(url) as response:
+                data = await response.json()
+    """
+
+    def __init__(
+        self,
+        memory_bytes: int = 16 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_bytes: int = 256 * 1024 * 1024,
+    ):
+        """
+        :param memory_bytes (int): The memory tier budget; 0 disables the memory tier.
+        :param disk_dir (str): The directory of the disk tier, or None for memory only.
+        :param disk_bytes (int): The disk tier budget.
+        """
+        self.memory_bytes = memory_bytes
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._memory_total = 0
+        self._disk = _DiskTier(disk_dir, disk_bytes) if disk_dir else None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = CacheStats()
+
+    # Storage
+
+    def _remember(self, key: str, entry: CacheEntry):
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_total -= previous.size
+        if entry.size > self.memory_bytes:
+            return
+
+        self._memory[key] = entry
+        self._memory_total += entry.size
+        while self._memory_total > self.memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_total -= old.size
+            self._stats.evictions += 1
+
+    async def _lookup(self, key: str) -> Optional[CacheEntry]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry
+        if self._disk is not None:
+            entry = await asyncio.to_thread(self._disk.get, key)
+            if entry is not None:
+                self._remember(key, entry)
+        return entry
+
+    async def _store(self, key: str, entry: CacheEntry):
+        self._stats.stores += 1
+        self._remember(key, entry)
+        if self._disk is not None:
+            self._stats.evictions += await asyncio.to_thread(self._disk.put, key, entry)
+
+    async def _forget(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_total -= entry.size
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.remove, key)
+
+    def clear(self):
+        """
+        Drops every memory entry. Disk entries are kept.
+        """
+        self._memory.clear()
+        self._memory_total = 0
+
+    def stats(self) -> CacheStats:
+        """
+        Returns a snapshot of the cache counters.
+        """
+        snapshot = CacheStats(**vars(self._stats))
+        snapshot.memory_bytes = self._memory_total
+        snapshot.disk_bytes = self._disk.total if self._disk is not None else 0
+        return snapshot
+
+    # Freshness
+
+    @staticmethod
+    def _expires(headers, now: float) -> Optional[float]:
+        """
+        Returns when a response stops being fresh, or None if it must not be stored.
+        """
+        directives = parse_cache_control(headers.get("Cache-Control"))
+        if "no-store" in directives or headers.get("Vary", "").strip() == "*":
+            return None
+        if "no-cache" in directives:
+            return now
+
+        age = _seconds(headers.get("Age"))
+        for name in ("s-maxage", "max-age"):
+            value = directives.get(name)
+            if value is not None and value.isdigit():
+                return now + int(value) - age
+
+        expires = _http_date(headers.get("Expires"))
+        if expires is not None:
+            # Measure against the server's clock, so clock skew doesn't extend freshness
+            date = _http_date(headers.get("Date")) or now
+            return now + expires - date - age
+
+        # No explicit lifetime: keep it only for revalidation
+        return now
+
+    @staticmethod
+    def _vary(headers, request_headers) -> Dict[str, Optional[str]]:
+        names = [name.strip().lower() for name in headers.get("Vary", "").split(",")]
+        return {name: request_headers.get(name) for name in names if name}
+
+    @staticmethod
+    def _key(url: str, request_headers, options: dict) -> str:
+        credentials = request_headers.get("Authorization") or ""
+        if options.get("auth") is not None:
+            credentials = options["auth"].encode()
+        keyed = "".join(f"\0{name}={options[name]!r}" for name in _KEYED_OPTIONS if name in options)
+        return hashlib.sha256(f"GET {url}\0{credentials}{keyed}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _request_key(key: str, request_headers) -> str:
+        headers = sorted((name.lower(), value) for name, value in request_headers.items())
+        return hashlib.sha256(f"{key}\0{headers!r}".encode("utf-8")).hexdigest()
+
+    # Requests
+
+    async def get(self, session: aiohttp.ClientSession, url: str, **kwargs) -> CachedResponse:
+        """
+        Performs a GET request through the cache.
+
+        :param session (aiohttp.ClientSession): The session used for upstream requests.
+        :param url (str): The URL to fetch.
+        :param kwargs: Passed on to `session.get` (headers, auth, params...).
+
+        :return CachedResponse: The response, with its body already read.
+        """
+        headers = CIMultiDict(kwargs.pop("headers", None) or {})
+        params = kwargs.pop("params", None)
+        if params:
+            # The URL aiohttp would request, so the key covers the query
+            url = str(URL(url).update_query(params))
+
+        request_directives = parse_cache_control(headers.get("Cache-Control"))
+        if "no-store" in request_directives or not _NEUTRAL_OPTIONS.issuperset(kwargs):
+            async with session.get(url, headers=headers, **kwargs) as response:
+                return await self._read(response, from_cache=False)
+
+        key = self._key(url, headers, kwargs)
+        request_key = self._request_key(key, headers)
+
+        task = self._inflight.get(request_key)
+        if task is not None:
+            self._stats.coalesced += 1
+        else:
+            task = asyncio.create_task(
+                self._fetch(session, url, key, headers, "no-cache" in request_directives, kwargs)
+            )
+            self._inflight[request_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(request_key, None))
+
+        # Shielded, so one caller giving up doesn't cancel the request for the others
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _read(response: aiohttp.ClientResponse, from_cache: bool) -> CachedResponse:
+        return CachedResponse(
+            str(response.url),
+            response.status,
+            response.reason,
+            list(response.headers.items()),
+            await response.read(),
+            from_cache,
+            response.request_info,
+        )
+
+    async def _fetch(self, session, url, key, headers, force_revalidate, kwargs) -> CachedResponse:
+        entry = await self._lookup(key)
+        if entry is not None and any(headers.get(k) != v for k, v in entry.vary.items()):
+            entry = None
+
+        now = time.time()
+        if entry is not None and not force_revalidate and entry.is_fresh(now):
+            self._stats.hits += 1
+            return CachedResponse.from_entry(entry)
+
+        conditional = CIMultiDict(headers)
+        if entry is not None:
+            etag = entry.header("ETag")
+            last_modified = entry.header("Last-Modified")
+            if etag:
+                conditional["If-None-Match"] = etag
+            if last_modified:
+                conditional["If-Modified-Since"] = last_modified
+
+        async with session.get(url, headers=conditional, **kwargs) as response:
+            if response.status == 304 and entry is not None:
+                self._stats.revalidated += 1
+                # A 304 carries the updated freshness and validators, but no body
+                merged = CIMultiDict(entry.headers)
+                for name in ("Cache-Control", "Expires", "Date", "Age", "ETag", "Last-Modified"):
+                    if name in response.headers:
+                        merged[name] = response.headers[name]
+                expires = self._expires(merged, now)
+                if expires is None:
+                    await self._forget(key)
+                else:
+                    entry = CacheEntry(
+                        entry.url,
+                        entry.status,
+                        entry.reason,
+                        list(merged.items()),
+                        entry.body,
+                        entry.vary,
+                        expires,
+                    )
+                    await self._store(key, entry)
+                return CachedResponse.from_entry(entry)
+
+            self._stats.misses += 1
+            result = await self._read(response, from_cache=False)
+
+        expires = None
+        if result.status in CACHEABLE_STATUSES:
+            expires = self._expires(result.headers, now)
+        if expires is None:
+            if entry is not None:
+                await self._forget(key)
+        else:
+            await self._store(
+                key,
+                CacheEntry(
+                    result.url,
+                    result.status,
+                    result.reason,
+                    list(result.headers.items()),
+                    result.body,
+                    self._vary(result.headers, headers),
+                    expires,
+                ),
+            )
+        return result
+
+
+class _RequestContext:
+    # Like aiohttp's request context: usable with both `await` and `async with`
+    def __init__(self, coroutine):
+        self._coroutine = coroutine
+
+    def __await__(self):
+        return self._coroutine.__await__()
+
+    async def __aenter__(self) -> CachedResponse:
+        return await self._coroutine
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+
+class CachingSession:
+    """
+    Wraps an aiohttp.ClientSession so that `get` goes through an HttpCache. Every other attribute
+    (post, close, ...) is the wrapped session's own.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, cache: HttpCache):
+        self.session = session
+        self.cache = cache
+
+    def get(self, url: str, **kwargs) -> _RequestContext:
+        return _RequestContext(self.cache.get(self.session, url, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+if __name__ == "__main__":
+    from aiohttp import web
+
+    async def main():
+        version = {"etag": '"v1"', "upstream_calls": 0}
+
+        async def handler(request):
+            version["upstream_calls"] += 1
+            await asyncio.sleep(0.05)
+            if request.headers.get("If-None-Match") == version["etag"]:
+                return web.Response(status=304, headers={"ETag": version["etag"]})
+            return web.Response(
+                text="x" * 1000,
+                headers={"ETag": version["etag"], "Cache-Control": "max-age=1"},
+            )
+
+        async def search(request):
+            # A malformed Age must not make the response unusable
+            await asyncio.sleep(0.05)
+            return web.Response(
+                text=request.query.get("q", ""), headers={"Cache-Control": "max-age=60", "Age": "x"}
+            )
+
+        async def greeting(request):
+            await asyncio.sleep(0.05)
+            language = request.headers.get("Accept-Language", "en")
+            return web.Response(
+                text={"en": "hello", "fr": "bonjour"}[language],
+                headers={"Cache-Control": "max-age=60", "Vary": "Accept-Language"},
+            )
+
+        app = web.Application()
+        app.router.add_get("/resource", handler)
+        app.router.add_get("/search", search)
+        app.router.add_get("/greeting", greeting)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        url = f"{base}/resource"
+
+        cache = HttpCache()
+        async with aiohttp.ClientSession() as session:
+            session = CachingSession(session, cache)
+
+            # 100 concurrent requests for the same URL make one upstream call
+            await asyncio.gather(*(session.get(url) for _ in range(100)))
+            await session.get(url)  # Fresh: served from memory
+            await asyncio.sleep(1.1)
+            await session.get(url)  # Stale: revalidated with If-None-Match, 304
+
+            # Different query parameters are different resources, also when concurrent
+            a, b = await asyncio.gather(
+                session.get(f"{base}/search", params={"q": "a"}),
+                session.get(f"{base}/search", params={"q": "b"}),
+            )
+            assert (a.body, b.body) == (b"a", b"b"), (a.body, b.body)
+            cached = await session.get(f"{base}/search", params={"q": "b"})
+            assert cached.from_cache and cached.body == b"b"
+
+            # Concurrent requests differing in a header the response varies on aren't merged
+            english, french = await asyncio.gather(
+                session.get(f"{base}/greeting", headers={"Accept-Language": "en"}),
+                session.get(f"{base}/greeting", headers={"Accept-Language": "fr"}),
+            )
+            assert (english.body, french.body) == (b"hello", b"bonjour")
+
+        await runner.cleanup()
+        print(f"Upstream calls: {version['upstream_calls']}")
+        print(cache.stats())
+
+    asyncio.run(main())
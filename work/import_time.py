@@ -0,0 +1,266 @@
+"""
+Import-time budgets for the package and the script entry points, to catch startup regressions.
+
+Each module is imported in a fresh interpreter with `python -X importtime -c "import <module>"`,
+several times. The cumulative time reported for the module is compared with its budget, using
+the fastest run since the others only add noise from the machine. A budget can also list modules
+that must not be imported at all, such as heavy dependencies meant to load lazily.
+
+Usage (from the repository root or this directory):
+    python work/import_time.py                     # check the default budgets
+    python work/import_time.py --top 10            # and show the slowest imports of each
+    python work/import_time.py thread=80 memoization=60
+
+It also checks that the package's lazy exports resolve correctly whatever was imported first
+(see check_exports).
+
+The exit status is 1 when a budget is exceeded or a check fails, so it can run as a check.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY = os.path.dirname(HERE)
+
+
+@dataclass
+class ImportRecord:
+    """
+    One line of -X importtime output. Times are in microseconds.
+    """
+
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int  # 0 for imports made directly by the -c statement or the interpreter
+
+
+@dataclass
+class Budget:
+    module: str
+    max_ms: float
+    forbidden: Tuple[str, ...] = ()  # Modules (and their submodules) that must not be imported
+    directory: str = HERE  # Where the module is importable from
+
+
+@dataclass
+class Measurement:
+    module: str
+    runs_ms: List[float]
+    records: List[ImportRecord] = field(default_factory=list)  # From the fastest run
+    error: Optional[str] = None
+
+    @property
+    def best_ms(self) -> float:
+        return min(self.runs_ms) if self.runs_ms else float("inf")
+
+    @property
+    def median_ms(self) -> float:
+        return statistics.median(self.runs_ms) if self.runs_ms else float("inf")
+
+    def own_records(self) -> List[ImportRecord]:
+        """
+        :return List[ImportRecord]: The module and everything it imported, without the
+            interpreter's startup imports. Nested imports are listed before the one that made them.
+        """
+        end = max(i for i, r in enumerate(self.records) if r.name == self.module and r.depth == 0)
+        start = end
+        while start > 0 and self.records[start - 1].depth > 0:
+            start -= 1
+        return self.records[start : end + 1]
+
+    def imported(self, module: str) -> List[str]:
+        return [r.name for r in self.records if r.name == module or r.name.startswith(module + ".")]
+
+
+BUDGETS = [
+    # The package loads submodules on first use; importing it alone must stay near free
+    Budget(
+        "warlock_utils_package",
+        15,
+        forbidden=("asyncio", "tracemalloc", "concurrent.futures"),
+    ),
+    Budget(
+        "gen_mr_diff_changelog",
+        300,
+        forbidden=("aiohttp", "gitlab", "pyperclip", "http_cache"),
+    ),
+    Budget(
+        "mouse_mover",
+        60,
+        forbidden=("pyautogui",),
+        directory=os.path.join(REPOSITORY, "ai_prompts_checks"),
+    ),
+]
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """
+    Parses the lines written to stderr by -X importtime, e.g.
+        import time:      1130 |      65104 |   warlock_utils_package.decorators
+
+    :param output (str): The stderr of the interpreter; other lines are ignored.
+
+    :return List[ImportRecord]: The imports, in the order they finished.
+    """
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # The header line
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        records.append(
+            ImportRecord(
+                name=stripped,
+                self_us=int(parts[0]),
+                cumulative_us=int(parts[1]),
+                depth=(len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return records
+
+
+def measure(module: str, repeat: int = 5, directory: str = HERE) -> Measurement:
+    """
+    :param module (str): The module to import.
+    :param repeat (int): The number of fresh interpreters to import it in.
+    :param directory (str): The working directory, so sibling scripts are importable.
+
+    :return Measurement: The cumulative import time of each run, in milliseconds.
+    """
+    measurement = Measurement(module, [])
+    # Compiled files are written on the first run; later runs measure a warm start
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=directory,
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            measurement.error = process.stderr.strip().splitlines()[-1]
+            return measurement
+
+        records = parse_importtime(process.stderr)
+        total = next((r for r in records if r.name == module and r.depth == 0), None)
+        if total is None:
+            measurement.error = f"{module} missing from the -X importtime output"
+            return measurement
+        milliseconds = total.cumulative_us / 1000
+        if milliseconds < measurement.best_ms:
+            measurement.records = records
+        measurement.runs_ms.append(milliseconds)
+    return measurement
+
+
+def check(budgets: List[Budget], repeat: int = 5, top: int = 0) -> bool:
+    """
+    Measures every budgeted module and prints a report.
+
+    :return bool: Whether all modules are within their budgets.
+    """
+    passed = True
+    for budget in budgets:
+        measurement = measure(budget.module, repeat, budget.directory)
+        if measurement.error:
+            print(f"FAIL {budget.module}: {measurement.error}")
+            passed = False
+            continue
+
+        problems = []
+        if measurement.best_ms > budget.max_ms:
+            problems.append(f"over the {budget.max_ms:g} ms budget")
+        for forbidden in budget.forbidden:
+            if measurement.imported(forbidden):
+                problems.append(f"imports {forbidden}")
+        passed = passed and not problems
+
+        print(
+            f"{'FAIL' if problems else 'ok  '} {budget.module}: {measurement.best_ms:.1f} ms "
+            f"(median {measurement.median_ms:.1f} ms, budget {budget.max_ms:g} ms)"
+            + (f" - {', '.join(problems)}" if problems else "")
+        )
+        if top or problems:
+            own = measurement.own_records()
+            for record in sorted(own, key=lambda r: r.self_us, reverse=True)[: top or 5]:
+                print(f"       {record.self_us / 1000:7.1f} ms  {record.name}")
+    return passed
+
+
+# Imports every submodule directly first, as `import warlock_utils_package.memory_profile` or
+# unpickling a MemoryReport does, then resolves every export. Submodules named like one of their
+# exports (memory_profile, timing_decorator) must not shadow it.
+_EXPORTS_SCRIPT = """
+import importlib, types
+import warlock_utils_package as package
+for module_name in package._EXPORTS:
+    importlib.import_module(f"warlock_utils_package.{module_name}")
+for name in package.__all__:
+    exec(f"from warlock_utils_package import {name} as value")
+    expected = getattr(importlib.import_module(
+        f"warlock_utils_package.{package._MODULES[name]}"), name)
+    assert value is expected and not isinstance(value, types.ModuleType), name
+"""
+
+
+def check_exports(directory: str = HERE) -> bool:
+    """
+    Checks in a fresh interpreter that every warlock_utils_package export is the object its
+    submodule defines, even after the submodules were imported directly.
+
+    :return bool: Whether the check passed.
+    """
+    process = subprocess.run(
+        [sys.executable, "-c", _EXPORTS_SCRIPT], cwd=directory, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        print(f"FAIL warlock_utils_package exports: {process.stderr.strip().splitlines()[-1]}")
+        return False
+    print("ok   warlock_utils_package exports")
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "budgets",
+        nargs="*",
+        metavar="MODULE=MS",
+        help="Budgets to check instead of the defaults; MS overrides a default budget's limit.",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module (default 5).")
+    parser.add_argument("--top", type=int, default=0, help="Show the N slowest imports.")
+    arguments = parser.parse_args(argv)
+
+    budgets = BUDGETS
+    if arguments.budgets:
+        defaults = {budget.module: budget for budget in BUDGETS}
+        budgets = []
+        for item in arguments.budgets:
+            module, _, limit = item.partition("=")
+            try:
+                max_ms = float(limit)
+            except ValueError:
+                parser.error(f"Expected MODULE=MS, got {item!r}")
+            default = defaults.get(module)
+            if default is not None:
+                budgets.append(Budget(module, max_ms, default.forbidden, default.directory))
+            else:
+                budgets.append(Budget(module, max_ms))
+
+    passed = check(budgets, arguments.repeat, arguments.top)
+    passed = check_exports() and passed
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
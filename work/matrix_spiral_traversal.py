@@ -58,6 +58,7 @@ def spiral_order(matrix: list[list[int]]) -> list[list[int]]:
     return result
 
 
-matrix = [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 16]]
+if __name__ == "__main__":
+    matrix = [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 16]]
 
-print(spiral_order(matrix))
+    print(spiral_order(matrix))
@@ -1,14 +1,19 @@
-from functools import lru_cache
+from sequences import FibonacciMemo
 
 from warlock_utils_package import timing_decorator
 
+# Bounded: keeps at most 16 (F(n), F(n+1)) checkpoints instead of every number ever computed
+memo = FibonacciMemo(max_checkpoints=16)
+
 
 @timing_decorator
-@lru_cache(maxsize=None)
 def fibonacci(n):
-    if n < 2:
-        return n
-    return fibonacci(n - 1) + fibonacci(n - 2)
+    return memo(n)
 
 
-print(fibonacci(50))  # Much faster due to caching
+if __name__ == "__main__":
+    print(fibonacci(50))
+    print(fibonacci(5000) % 10**20)  # Past the recursion limit of the recursive version
+    print(fibonacci(1_000_000).bit_length())  # Computed by fast doubling
+    print(fibonacci(1_000_050).bit_length())  # 50 additions from the previous checkpoint
+    print(f"{memo.hits} hits, {memo.misses} misses, {memo.nbytes() / 1024:.0f} KiB kept")
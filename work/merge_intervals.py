@@ -32,8 +32,9 @@ def merge_intervals(intervals: list[list[int]]) -> list[list[int]]:
     return merged_intervals
 
 
-merged_intervals = merge_intervals(
-    [[20, 22], [2, 6], [1, 3], [4, 5], [8, 10], [12, 18]]
-)
+if __name__ == "__main__":
+    merged_intervals = merge_intervals(
+        [[20, 22], [2, 6], [1, 3], [4, 5], [8, 10], [12, 18]]
+    )
 
-print(merged_intervals)
+    print(merged_intervals)
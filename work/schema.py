@@ -0,0 +1,358 @@
+"""
+Generated serializers for dataclasses.
+
+`dataclasses.asdict` walks every field through a recursive deep copy, and a hand-written
+`Person(name=data["name"], age=int(data["age"]), ...)` has to be kept in sync with the class by
+hand. `compile_schema` generates both directions from the dataclass instead, as straight-line
+code with every field access and type coercion inlined, the way attrs and msgspec do:
+
+    def from_dict(data):
+        return _cls(data['name'], int(data['age']), data['city'])
+
+Four functions are generated per class:
+    - to_dict(obj) / from_dict(data): for JSON and csv.DictReader/DictWriter rows.
+    - to_row(obj) / from_row(row): tuples in field order, for csv.reader/csv.writer.
+
+Field values are coerced on the way in (int, float, bool and Optional versions of them; nested
+dataclasses through their own schema) and passed through as they are on the way out. Unlike
+asdict, lists and dicts in fields are not copied.
+
+The compiled code is cached in memory per class, and on disk (like .pyc files) so other processes
+skip the compile step; the disk cache is keyed by a hash of the generated source, so it never
+serves code for an outdated class definition.
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+import typing
+from dataclasses import MISSING, fields, is_dataclass
+from typing import Any, Callable, Dict, Optional, TypedDict
+
+# Where compiled schemas are cached; empty to disable the disk cache
+CACHE_ENV_VAR = "SCHEMA_CACHE_DIR"
+_DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__")
+
+_GENERATOR_VERSION = 2  # Bump when the generated code changes shape
+
+_schemas: Dict[type, "Schema"] = {}
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+_COERCIONS: Dict[Any, Optional[str]] = {int: "int", float: "float", bool: "_to_bool", str: None}
+
+
+class Schema:
+    """
+    The generated functions for one dataclass. Create with compile_schema.
+    """
+
+    def __init__(self, cls: type, source: str, namespace: dict, from_cache: bool):
+        self.cls = cls
+        self.fieldnames = [field.name for field in fields(cls)]
+        self.source = source
+        self.from_cache = from_cache  # Whether the code was loaded from the disk cache
+
+        self.to_dict: Callable[[Any], dict] = namespace["to_dict"]
+        self.from_dict: Callable[[dict], Any] = namespace["from_dict"]
+        self.to_row: Callable[[Any], tuple] = namespace["to_row"]
+        self.from_row: Callable[[typing.Sequence], Any] = namespace["from_row"]
+        self._typed_dict = None
+
+    @property
+    def typed_dict(self) -> type:
+        """
+        A TypedDict with the dataclass's fields, the type of to_dict's result. Built once.
+        """
+        if self._typed_dict is None:
+            hints = typing.get_type_hints(self.cls)
+            self._typed_dict = TypedDict(
+                f"{self.cls.__name__}Dict",
+                {name: hints[name] for name in self.fieldnames},
+                total=True,
+            )
+        return self._typed_dict
+
+    def __repr__(self) -> str:
+        return f"Schema({self.cls.__qualname__}, fields={self.fieldnames})"
+
+
+def _optional_argument(annotation):
+    """
+    :return: X for Optional[X] (Union[X, None]), otherwise None.
+    """
+    if typing.get_origin(annotation) is typing.Union:
+        arguments = typing.get_args(annotation)
+        if len(arguments) == 2 and type(None) in arguments:
+            return next(a for a in arguments if a is not type(None))
+    return None
+
+
+def _bind_nested(namespace: dict, name: str, cls: type, function: str) -> None:
+    """
+    Binds `name` in the generated code to `compile_schema(cls).<function>`, compiled on the first
+    call: compiling it now would recurse forever for self-referential dataclasses (a tree node
+    with Optional["Node"] children), whose schema isn't registered until it is generated.
+    """
+
+    def resolve(value):
+        namespace[name] = getattr(compile_schema(cls), function)
+        return namespace[name](value)
+
+    namespace[name] = resolve
+
+
+def _coercion(annotation, namespace: dict, index: int, value: str, nested: bool = True) -> str:
+    """
+    :return str: An expression converting `value` to the annotated type. With `nested`, dicts
+        in dataclass fields are converted with that dataclass's schema; rows keep nested objects
+        as they are.
+    """
+    # Optional[X] is Union[X, None]: empty CSV cells and None become None
+    if typing.get_origin(annotation) is typing.Union:
+        argument = _optional_argument(annotation)
+        if argument is not None:
+            inner = _coercion(argument, namespace, index, value, nested)
+            if inner == value:
+                return value
+            return f"(None if {value} is None or {value} == '' else {inner})"
+        return value
+
+    if annotation in _COERCIONS:
+        function = _COERCIONS[annotation]
+        return f"{function}({value})" if function else value
+
+    if is_dataclass(annotation) and nested:
+        _bind_nested(namespace, f"_from_dict_{index}", annotation, "from_dict")
+        return f"_from_dict_{index}({value})"
+
+    return value
+
+
+def _generate(cls: type, namespace: dict) -> str:
+    hints = typing.get_type_hints(cls)
+    all_fields = fields(cls)
+    init_fields = [field for field in all_fields if field.init]
+
+    to_dict_items = []
+    for index, field in enumerate(all_fields):
+        annotation = hints[field.name]
+        optional = _optional_argument(annotation)
+        nested = optional if optional is not None else annotation
+        value = f"obj.{field.name}"
+        if is_dataclass(nested):
+            _bind_nested(namespace, f"_to_dict_{index}", nested, "to_dict")
+            if optional is not None:
+                value = f"(None if {value} is None else _to_dict_{index}({value}))"
+            else:
+                value = f"_to_dict_{index}({value})"
+        to_dict_items.append(f"{field.name!r}: {value}")
+    row_items = "".join(f"obj.{field.name}, " for field in all_fields)
+
+    from_dict_lines = []
+    from_dict_arguments = []
+    from_row_arguments = []
+    for index, field in enumerate(init_fields):
+        if field.default is not MISSING or field.default_factory is not MISSING:
+            # Missing keys fall back to the field's default
+            if field.default is not MISSING:
+                namespace[f"_default_{index}"] = field.default
+                fallback = f"_default_{index}"
+            else:
+                namespace[f"_factory_{index}"] = field.default_factory
+                fallback = f"_factory_{index}()"
+            from_dict_lines.append(f"    v{index} = data.get({field.name!r}, _MISSING)")
+            coerced = _coercion(hints[field.name], namespace, index, f"v{index}")
+            from_dict_arguments.append(f"{fallback} if v{index} is _MISSING else {coerced}")
+        else:
+            from_dict_arguments.append(
+                _coercion(hints[field.name], namespace, index, f"data[{field.name!r}]")
+            )
+        from_row_arguments.append(
+            _coercion(hints[field.name], namespace, index, f"v{index}", nested=False)
+        )
+
+    # Keyword-only fields are passed by name, after the positional ones
+    for arguments in (from_dict_arguments, from_row_arguments):
+        arguments[:] = [a for a, f in zip(arguments, init_fields) if not f.kw_only] + [
+            f"{f.name}={a}" for a, f in zip(arguments, init_fields) if f.kw_only
+        ]
+
+    # Rows hold every field; fields excluded from __init__ are skipped when rebuilding
+    row_names = [f"v{init_fields.index(f)}" if f.init else "_" for f in all_fields]
+
+    return "\n".join(
+        [
+            "def to_dict(obj):",
+            f"    return {{{', '.join(to_dict_items)}}}",
+            "",
+            "def to_row(obj):",
+            f"    return ({row_items})",
+            "",
+            "def from_dict(data):",
+            *from_dict_lines,
+            f"    return _cls({', '.join(from_dict_arguments)})",
+            "",
+            "def from_row(row):",
+            f"    {''.join(name + ', ' for name in row_names)}= row",
+            f"    return _cls({', '.join(from_row_arguments)})",
+            "",
+        ]
+    )
+
+
+def _cache_path(cls: type, source: str, cache_dir: str) -> str:
+    digest = hashlib.sha256(
+        f"{_GENERATOR_VERSION}\n{sys.implementation.cache_tag}\n{source}".encode()
+    ).hexdigest()[:16]
+    return os.path.join(cache_dir, f"schema-{cls.__qualname__}-{digest}.bin")
+
+
+def _load_code(cls: type, source: str, cache_dir: Optional[str]):
+    """
+    :return: (code object, whether it came from the disk cache).
+    """
+    path = _cache_path(cls, source, cache_dir) if cache_dir else None
+    if path is not None:
+        try:
+            with open(path, "rb") as file:
+                return marshal.loads(file.read()), True
+        except (OSError, ValueError, EOFError, TypeError):
+            pass  # Not cached yet, or unreadable: compile it again
+
+    code = compile(source, f"<schema {cls.__module__}.{cls.__qualname__}>", "exec")
+    if path is not None:
+        # Written atomically, since several processes may compile the same schema at once; a
+        # read-only location only costs the compile step next time
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as file:
+                file.write(marshal.dumps(code))
+            os.replace(temporary, path)
+        except OSError:
+            pass
+    return code, False
+
+
+def compile_schema(cls: type, cache_dir: Optional[str] = None) -> Schema:
+    """
+    Generates (or loads from the cache) the serializers of a dataclass.
+
+    :param cls (type): The dataclass.
+    :param cache_dir (str): The disk cache directory; defaults to the SCHEMA_CACHE_DIR
+        environment variable, or this module's __pycache__ directory. An empty string disables it.
+
+    :return Schema: The schema, shared by every caller in this process.
+    """
+    schema = _schemas.get(cls)
+    if schema is not None:
+        return schema
+
+    if not is_dataclass(cls):
+        raise TypeError(f"{cls!r} is not a dataclass.")
+    if cache_dir is None:
+        cache_dir = os.getenv(CACHE_ENV_VAR, _DEFAULT_CACHE_DIR)
+
+    namespace = {"_cls": cls, "_MISSING": MISSING, "_to_bool": _to_bool}
+    source = _generate(cls, namespace)
+    code, from_cache = _load_code(cls, source, cache_dir)
+    exec(code, namespace)
+
+    schema = _schemas[cls] = Schema(cls, source, namespace, from_cache)
+    return schema
+
+
+if __name__ == "__main__":
+    import time
+    from dataclasses import asdict
+
+    from file_operations import Person
+
+    schema = compile_schema(Person)
+    print(schema, "loaded from cache" if schema.from_cache else "compiled")
+    print(schema.source)
+
+    persons = [Person(name=f"Person {i}", age=i % 90, city="London") for i in range(200_000)]
+    dicts = [schema.to_dict(person) for person in persons]
+    rows = [(person.name, str(person.age), person.city) for person in persons]
+
+    def manual_from_dict(data):
+        # What Person.deserialize did before
+        return Person(name=data["name"], age=int(data["age"]), city=data["city"])
+
+    def timed(label, function, items):
+        start_time = time.perf_counter()
+        for item in items:
+            function(item)
+        per_record = (time.perf_counter() - start_time) / len(items) * 1e9
+        print(f"{label:<28} {per_record:8.0f} ns per record")
+        return per_record
+
+    baseline = timed("dataclasses.asdict", asdict, persons)
+    fast = timed("schema.to_dict", schema.to_dict, persons)
+    timed("schema.to_row", schema.to_row, persons)
+    timed("manual from_dict", manual_from_dict, dicts)
+    timed("schema.from_dict", schema.from_dict, dicts)
+    timed("schema.from_row", schema.from_row, rows)
+    print(f"to_dict is {baseline / fast:.1f}x faster than asdict")
+
+    assert schema.from_dict(schema.to_dict(persons[7])) == persons[7]
+    assert schema.from_row(rows[7]) == persons[7]
+
+    # Optional nested dataclasses, defaults and keyword-only fields round-trip like asdict
+    import dataclasses
+
+    @dataclasses.dataclass
+    class Address:
+        city: str
+        zip_code: Optional[int] = None
+
+    @dataclasses.dataclass
+    class Contact:
+        name: str
+        home: Optional[Address] = None
+        tags: list = dataclasses.field(default_factory=list)
+        email: str = dataclasses.field(default="", kw_only=True)
+        age: int = dataclasses.field(kw_only=True)
+
+    @dataclasses.dataclass(kw_only=True)
+    class Account:
+        owner: Contact
+        backup: Optional[Contact] = None
+
+    contacts = [
+        Contact("Ann", Address("Paris", 75001), ["a"], email="ann@example.com", age=30),
+        Contact("Bob", None, age=40),
+    ]
+    contact_schema = compile_schema(Contact, cache_dir="")
+    for contact in contacts:
+        assert contact_schema.to_dict(contact) == asdict(contact)
+        assert contact_schema.from_dict(contact_schema.to_dict(contact)) == contact
+        assert contact_schema.from_row(contact_schema.to_row(contact)) == contact
+    assert contact_schema.from_dict({"name": "Cy", "age": "5"}) == Contact("Cy", age=5)
+
+    account = Account(owner=contacts[1], backup=contacts[0])
+    account_schema = compile_schema(Account, cache_dir="")
+    assert account_schema.to_dict(account) == asdict(account)
+    assert account_schema.from_dict(account_schema.to_dict(account)) == account
+    assert account_schema.from_dict({"owner": asdict(contacts[0])}) == Account(owner=contacts[0])
+
+    # Self-referential dataclasses compile, their nested schema being bound on first use
+    @dataclasses.dataclass
+    class Node:
+        v: int
+        nxt: Optional["Node"] = None
+
+    chain = Node(1, Node(2, Node(3)))
+    node_schema = compile_schema(Node, cache_dir="")
+    assert node_schema.to_dict(chain) == asdict(chain)
+    assert node_schema.from_dict(node_schema.to_dict(chain)) == chain
+    assert node_schema.from_dict({"v": "4", "nxt": {"v": "5"}}) == Node(4, Node(5))
+    print("Round trips OK")
@@ -0,0 +1,378 @@
+"""
+Exact Fibonacci numbers and linear recurrences in O(log n) big-int operations.
+
+The naive recursion in memoization.py needs n stack frames and keeps every intermediate number in
+its cache, so it fails past the recursion limit (around n=1000) and its memory only ever grows.
+The functions here never recurse:
+
+- `fibonacci` uses fast doubling, F(2k) = F(k)(2F(k+1) - F(k)) and F(2k+1) = F(k)² + F(k+1)²,
+  walking the bits of n from the most significant one: about log2(n) steps of three
+  multiplications each. The cost is dominated by the last few steps, which multiply numbers close
+  to the size of the result (F(n) has about 0.694n bits).
+- `LinearRecurrence` raises the k×k companion matrix to the n-th power by repeated squaring, for
+  any recurrence a(n) = c1·a(n-1) + ... + ck·a(n-k).
+- Every function takes an optional modulus; with one, the numbers never grow past it, so n can be
+  as large as 10**18.
+"""
+
+import sys
+import time
+from bisect import bisect_right, insort
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+Pair = Tuple[int, int]  # (F(n), F(n+1))
+
+
+def fibonacci_pair(n: int, modulus: Optional[int] = None) -> Pair:
+    """
+    Computes F(n) and F(n+1) by fast doubling.
+
+    :param n (int): The index, at least 0.
+    :param modulus (int): If given, the numbers are computed modulo it.
+
+    :return Pair: (F(n), F(n+1)).
+    """
+    if n < 0:
+        raise ValueError(f"Index must be non-negative, got {n}.")
+
+    a, b = 0, 1  # F(0), F(1)
+    for bit in bin(n)[2:]:
+        # (a, b) = (F(k), F(k+1)) becomes (F(2k), F(2k+1)), then shifts by one if the bit is set
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if modulus is not None:
+            c %= modulus
+            d %= modulus
+        if bit == "1":
+            a, b = d, c + d
+            if modulus is not None:
+                b %= modulus
+        else:
+            a, b = c, d
+    return a, b
+
+
+def fibonacci(n: int, modulus: Optional[int] = None) -> int:
+    """
+    :param n (int): The index. Negative indices follow F(-n) = (-1)^(n+1)·F(n).
+    :param modulus (int): If given, the result is reduced modulo it.
+
+    :return int: F(n).
+    """
+    if n >= 0:
+        return fibonacci_pair(n, modulus)[0]
+
+    value = fibonacci_pair(-n, modulus)[0]
+    if n % 2 == 0:
+        value = -value
+    return value if modulus is None else value % modulus
+
+
+def fibonacci_mod(n: int, modulus: int) -> int:
+    """
+    :param n (int): The index, at least 0.
+    :param modulus (int): The modulus, e.g. 10**9 + 7.
+
+    :return int: F(n) mod modulus, in O(log n) operations on numbers below the modulus.
+    """
+    return fibonacci_pair(n, modulus)[0]
+
+
+def _add_pairs(p: Pair, q: Pair, modulus: Optional[int] = None) -> Pair:
+    # F(m+n) = F(m)·F(n+1) + (F(m+1) - F(m))·F(n), F(m+n+1) = F(m+1)·F(n+1) + F(m)·F(n)
+    fm, fm1 = p
+    fn, fn1 = q
+    first = fm * fn1 + (fm1 - fm) * fn
+    second = fm1 * fn1 + fm * fn
+    if modulus is not None:
+        return first % modulus, second % modulus
+    return first, second
+
+
+def fibonacci_range(
+    start: int = 0,
+    stop: Optional[int] = None,
+    step: int = 1,
+    modulus: Optional[int] = None,
+) -> Iterator[int]:
+    """
+    Yields F(start), F(start + step), ... lazily, like `range`.
+
+    The first term costs one fast-doubling computation; each further term costs one addition for
+    step 1, or a few multiplications for larger steps, instead of a computation from scratch.
+
+    :param start (int): The first index, at least 0.
+    :param stop (int): The index to stop before; None for an endless stream.
+    :param step (int): The distance between indices, at least 1.
+    :param modulus (int): If given, the terms are reduced modulo it.
+
+    :return Iterator[int]: The terms.
+    """
+    if step < 1:
+        raise ValueError(f"Step must be positive, got {step}.")
+
+    a, b = fibonacci_pair(start, modulus)
+    shift = fibonacci_pair(step, modulus) if step > 1 else None
+    n = start
+    while stop is None or n < stop:
+        yield a
+        if shift is None:
+            a, b = b, a + b if modulus is None else (a + b) % modulus
+        else:
+            a, b = _add_pairs((a, b), shift, modulus)
+        n += step
+
+
+class FibonacciMemo:
+    """
+    A bounded memo of Fibonacci checkpoints, for workloads that ask for the same or nearby indices
+    repeatedly.
+
+    Each checkpoint stores the pair (F(n), F(n+1)), from which any later index can be reached by
+    additions. A request is served from the nearest checkpoint at or below it when that is at most
+    `max_step` indices away (an addition of big ints is far cheaper than the multiplications of a
+    fresh computation); otherwise the pair is computed by fast doubling and becomes a checkpoint.
+
+    At most `max_checkpoints` pairs are kept, evicting the least recently used one, so memory stays
+    bounded however many indices are requested. Unlike lru_cache on the recursive version, no
+    intermediate values are retained.
+
+    Usage:
+        memo = FibonacciMemo(max_checkpoints=16)
+        memo(1_000_000)
+        memo(1_000_100)  # 100 additions from the first checkpoint
+    """
+
+    def __init__(self, max_checkpoints: int = 32, max_step: int = 1024):
+        """
+        :param max_checkpoints (int): The number of pairs kept.
+        :param max_step (int): The largest distance walked from a checkpoint by additions.
+        """
+        if max_checkpoints < 1:
+            raise ValueError(f"max_checkpoints must be positive, got {max_checkpoints}.")
+
+        self.max_checkpoints = max_checkpoints
+        self.max_step = max_step
+        self.hits = 0
+        self.misses = 0
+        self._pairs: "OrderedDict[int, Pair]" = OrderedDict()
+        self._indices: List[int] = []  # The checkpoint indices, sorted
+
+    def __call__(self, n: int) -> int:
+        return self.pair(n)[0]
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def pair(self, n: int) -> Pair:
+        """
+        :param n (int): The index, at least 0.
+
+        :return Pair: (F(n), F(n+1)).
+        """
+        position = bisect_right(self._indices, n) - 1
+        if position >= 0 and n - self._indices[position] <= self.max_step:
+            nearest = self._indices[position]
+            a, b = self._pairs[nearest]
+            self._pairs.move_to_end(nearest)
+            if nearest == n:
+                self.hits += 1
+                return a, b
+            for _ in range(n - nearest):
+                a, b = b, a + b
+            self.hits += 1
+        else:
+            a, b = fibonacci_pair(n)
+            self.misses += 1
+
+        self._store(n, (a, b))
+        return a, b
+
+    def _store(self, n: int, pair: Pair):
+        self._pairs[n] = pair
+        insort(self._indices, n)
+        if len(self._pairs) > self.max_checkpoints:
+            evicted, _ = self._pairs.popitem(last=False)
+            self._indices.pop(bisect_right(self._indices, evicted) - 1)
+
+    def clear(self):
+        self._pairs.clear()
+        self._indices.clear()
+
+    def nbytes(self) -> int:
+        """
+        :return int: The memory used by the stored numbers, in bytes.
+        """
+        return sum(sys.getsizeof(a) + sys.getsizeof(b) for a, b in self._pairs.values())
+
+
+Matrix = List[List[int]]
+
+
+def _multiply(x: Matrix, y: Matrix, modulus: Optional[int]) -> Matrix:
+    columns = list(zip(*y))
+    product = [[sum(a * b for a, b in zip(row, column)) for column in columns] for row in x]
+    if modulus is not None:
+        product = [[value % modulus for value in row] for row in product]
+    return product
+
+
+def _apply(x: Matrix, vector: List[int], modulus: Optional[int]) -> List[int]:
+    result = [sum(a * b for a, b in zip(row, vector)) for row in x]
+    if modulus is not None:
+        result = [value % modulus for value in result]
+    return result
+
+
+class LinearRecurrence:
+    """
+    A homogeneous linear recurrence a(n) = c1·a(n-1) + c2·a(n-2) + ... + ck·a(n-k) with integer
+    coefficients, evaluated exactly at any index.
+
+    The state (a(n+k-1), ..., a(n)) advances by one index when multiplied by the k×k companion
+    matrix M, so a(n) is read from M^n applied to the initial state. M^n is built by repeated
+    squaring: O(k³·log n) multiplications, applied to the state as each bit of n is consumed, so
+    only O(k²) work is spent per set bit.
+
+    Usage:
+        pell = LinearRecurrence([2, 1], [0, 1])  # P(n) = 2P(n-1) + P(n-2)
+        pell.term(10)  # 2378
+        list(pell.terms(0, 5))  # [0, 1, 2, 5, 12]
+    """
+
+    def __init__(self, coefficients: Sequence[int], initial: Sequence[int]):
+        """
+        :param coefficients (Sequence[int]): c1, ..., ck.
+        :param initial (Sequence[int]): a(0), ..., a(k-1).
+        """
+        if not coefficients or len(coefficients) != len(initial):
+            raise ValueError(
+                "A recurrence needs as many initial terms as coefficients, and at least one."
+            )
+
+        self.coefficients = list(coefficients)
+        self.initial = list(initial)
+        self.order = len(coefficients)
+
+        # Row 0 computes the next term; the other rows shift the state down by one
+        self._companion: Matrix = [self.coefficients] + [
+            [int(column == row) for column in range(self.order)]
+            for row in range(self.order - 1)
+        ]
+
+    def __repr__(self) -> str:
+        return f"LinearRecurrence({self.coefficients}, {self.initial})"
+
+    def state(self, n: int, modulus: Optional[int] = None) -> List[int]:
+        """
+        :param n (int): The index, at least 0.
+        :param modulus (int): If given, the terms are computed modulo it.
+
+        :return List[int]: [a(n+k-1), ..., a(n+1), a(n)].
+        """
+        if n < 0:
+            raise ValueError(f"Index must be non-negative, got {n}.")
+
+        vector = self.initial[::-1]
+        if modulus is not None:
+            vector = [value % modulus for value in vector]
+
+        power = self._companion
+        while n:
+            if n & 1:
+                vector = _apply(power, vector, modulus)
+            n >>= 1
+            if n:
+                power = _multiply(power, power, modulus)
+        return vector
+
+    def term(self, n: int, modulus: Optional[int] = None) -> int:
+        """
+        :param n (int): The index, at least 0.
+        :param modulus (int): If given, the result is reduced modulo it.
+
+        :return int: a(n).
+        """
+        if n < self.order:
+            return self.initial[n] if modulus is None else self.initial[n] % modulus
+        return self.state(n - self.order + 1, modulus)[0]
+
+    def terms(
+        self, start: int = 0, stop: Optional[int] = None, modulus: Optional[int] = None
+    ) -> Iterator[int]:
+        """
+        Yields a(start), a(start+1), ... lazily. Only the first term is computed by matrix power;
+        each further term costs k multiplications by the (small) coefficients.
+
+        :param start (int): The first index, at least 0.
+        :param stop (int): The index to stop before; None for an endless stream.
+        :param modulus (int): If given, the terms are reduced modulo it.
+
+        :return Iterator[int]: The terms.
+        """
+        window = self.state(start, modulus)  # Newest term first
+        coefficients = self.coefficients
+        n = start
+        while stop is None or n < stop:
+            yield window[-1]
+            following = sum(c * value for c, value in zip(coefficients, window))
+            if modulus is not None:
+                following %= modulus
+            window = [following] + window[:-1]
+            n += 1
+
+
+def benchmark():
+    """
+    Times each method against the iterative loop. The iterative loop is quadratic in total (n
+    additions of numbers growing to O(n) bits), so it is only run at n=10⁵.
+    """
+
+    def timed(label, func, *args):
+        start_time = time.perf_counter()
+        result = func(*args)
+        duration = time.perf_counter() - start_time
+        print(f"{label:<44} {duration:9.4f}s")
+        return result
+
+    def iterative(n):
+        a, b = 0, 1
+        for _ in range(n):
+            a, b = b, a + b
+        return a
+
+    fib_matrix = LinearRecurrence([1, 1], [0, 1])
+
+    expected = timed("iterative loop, n=10^5", iterative, 10**5)
+    assert timed("fast doubling, n=10^5", fibonacci, 10**5) == expected
+    assert timed("companion matrix, n=10^5", fib_matrix.term, 10**5) == expected
+
+    large = timed("fast doubling, n=10^6", fibonacci, 10**6)
+    assert timed("companion matrix, n=10^6", fib_matrix.term, 10**6) == large
+    print(f"  F(10^6) has {large.bit_length()} bits and ends in ...{large % 10**10:010}")
+    timed("fast doubling, n=10^7", fibonacci, 10**7)
+
+    timed("fast doubling mod 10^9+7, n=10^18", fibonacci_mod, 10**18, 10**9 + 7)
+    tribonacci = LinearRecurrence([1, 1, 1], [0, 0, 1])
+    timed("tribonacci mod 10^9+7, n=10^18", tribonacci.term, 10**18, 10**9 + 7)
+
+    memo = FibonacciMemo(max_checkpoints=8)
+    memo(10**6)
+    timed("memo, 500 indices past a checkpoint", lambda: [memo(10**6 + i) for i in range(500)])
+    print(f"  {len(memo)} checkpoints, {memo.nbytes() / 1024:.0f} KiB")
+
+    timed(
+        "fibonacci_range, 10^4 terms from n=10^5",
+        lambda: sum(1 for _ in fibonacci_range(10**5, 10**5 + 10**4)),
+    )
+
+
+if __name__ == "__main__":
+    print([fibonacci(n) for n in range(-5, 11)])
+    print(fibonacci(5000) % 10**20)  # The recursive version hits the recursion limit here
+    print(list(fibonacci_range(10, 60, step=10)))
+    print(list(LinearRecurrence([2, 1], [0, 1]).terms(0, 10)))  # Pell numbers
+    print(LinearRecurrence([1, 1, 1], [0, 0, 1]).term(10**18, modulus=10**9 + 7))
+    print()
+    benchmark()
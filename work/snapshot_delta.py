@@ -0,0 +1,496 @@
+"""
+Differences between two snapshots of a Person dataset, and patches that replay them.
+
+Records are matched by a key (one or more fields, e.g. ["name"]) and compared by a content
+digest, a short hash of all their fields. Two ways of pairing up the records are available; both
+stream their input and yield Change records as they go:
+
+- "hash" (default): both snapshots are split into partitions on disk by a hash of the key, so
+  every key lands in the same partition number on both sides. One old partition at a time is
+  loaded into a dict and the matching new partition is streamed against it. Memory is bounded by
+  the size of one partition, which is chosen from the memory budget.
+- "sort": both snapshots are sorted by the key with the external sort, then merged in one pass,
+  like a sorted merge join. Slower, but the changes come out in key order.
+
+A patch file stores the changes compactly as JSON lines (gzip-compressed for a ".gz" name):
+added records whole, removed records by key, changed records whole. Removed and changed records
+also carry the digest of the old record, so `apply_patch` can tell when a patch is applied to a
+snapshot it wasn't made from.
+
+Within one snapshot, a key is expected to be unique; for repeated keys the first record wins and
+the others are counted in DeltaStats.duplicates.
+"""
+
+import csv
+import hashlib
+import json
+import math
+import os
+import tempfile
+import zlib
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from compressed_io import compression_from_extension, open_file
+from external_sort import FIELDS, read_persons, sorted_persons, write_persons
+from file_operations import Person, person_schema
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+PATCH_FORMAT = "person-patch"
+PATCH_VERSION = 1
+
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+MAX_PARTITIONS = 512  # Each one is an open file while partitioning
+
+# Rough bytes of memory per byte of CSV once a record sits in a dict as a Person
+_MEMORY_PER_FILE_BYTE = 12
+_COMPRESSION_RATIO = 7  # Typical for Person CSVs; only used to size the partitions
+
+
+@dataclass
+class Change:
+    """
+    One difference between two snapshots: `old` is None for added records, `new` is None for
+    removed ones.
+    """
+
+    kind: str
+    key: tuple
+    old: Optional[Person] = None
+    new: Optional[Person] = None
+
+
+@dataclass
+class DeltaStats:
+    added: int = 0
+    removed: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    duplicates: int = 0
+    partitions: int = 0
+    conflicts: int = 0  # Patch operations that didn't match the snapshot (apply_patch)
+
+    def count(self, change: Change):
+        setattr(self, change.kind, getattr(self, change.kind) + 1)
+
+
+def record_digest(person: Person) -> bytes:
+    """
+    :return bytes: An 8-byte BLAKE2 hash of all the record's fields.
+    """
+    return hashlib.blake2b(
+        "\x1f".join(map(str, person_schema.to_row(person))).encode(), digest_size=8
+    ).digest()
+
+
+def key_function(keys: Sequence[str]) -> Callable[[Person], tuple]:
+    """
+    :param keys (Sequence[str]): The Person fields identifying a record.
+
+    :return Callable: A function returning a record's key as a tuple.
+    """
+    if not keys:
+        raise ValueError("At least one key field is required.")
+    for name in keys:
+        if name not in FIELDS:
+            raise ValueError(f"Unknown field {name!r}; expected one of {list(FIELDS)}.")
+
+    getter = attrgetter(*keys)
+    if len(keys) > 1:
+        return getter
+    return lambda person: (getter(person),)
+
+
+# Sorted merge
+
+
+def _unique_sorted(
+    persons: Iterable[Person], key: Callable, stats: DeltaStats
+) -> Iterator[Tuple[tuple, Person]]:
+    previous = None
+    for person in persons:
+        current = key(person)
+        if previous is not None:
+            if current == previous:
+                stats.duplicates += 1
+                continue
+            if current < previous:
+                raise ValueError(f"Input is not sorted by key: {current} after {previous}.")
+        previous = current
+        yield current, person
+
+
+def diff_sorted(
+    old: Iterable[Person],
+    new: Iterable[Person],
+    keys: Sequence[str],
+    stats: Optional[DeltaStats] = None,
+) -> Iterator[Change]:
+    """
+    Compares two streams that are both sorted by `keys` (e.g. by sorted_persons) in one pass.
+
+    :param old (Iterable[Person]): The old snapshot, sorted by key.
+    :param new (Iterable[Person]): The new snapshot, sorted by key.
+    :param keys (Sequence[str]): The key fields.
+    :param stats (DeltaStats): Filled in with counts, if given.
+
+    :return Iterator[Change]: The changes, in key order.
+    """
+    key = key_function(keys)
+    stats = stats if stats is not None else DeltaStats()
+    old_items = _unique_sorted(old, key, stats)
+    new_items = _unique_sorted(new, key, stats)
+    old_item = next(old_items, None)
+    new_item = next(new_items, None)
+
+    while old_item is not None or new_item is not None:
+        if new_item is None or (old_item is not None and old_item[0] < new_item[0]):
+            change = Change(REMOVED, old_item[0], old=old_item[1])
+            old_item = next(old_items, None)
+        elif old_item is None or new_item[0] < old_item[0]:
+            change = Change(ADDED, new_item[0], new=new_item[1])
+            new_item = next(new_items, None)
+        else:
+            old_person, new_person = old_item[1], new_item[1]
+            old_item = next(old_items, None)
+            new_item = next(new_items, None)
+            if record_digest(old_person) == record_digest(new_person):
+                stats.unchanged += 1
+                continue
+            change = Change(CHANGED, key(new_person), old=old_person, new=new_person)
+
+        stats.count(change)
+        yield change
+
+
+# Hash partitioning
+
+
+def _partition_count(path: str, memory_bytes: int) -> int:
+    size = os.path.getsize(path)
+    if compression_from_extension(path):
+        size *= _COMPRESSION_RATIO
+    return min(MAX_PARTITIONS, max(1, math.ceil(size * _MEMORY_PER_FILE_BYTE / memory_bytes)))
+
+
+def _partition(path: str, key: Callable, directory: str, prefix: str, count: int) -> List[str]:
+    paths = [os.path.join(directory, f"{prefix}-{i}.csv") for i in range(count)]
+    files = [open(p, "w", newline="") for p in paths]
+    try:
+        writers = [csv.writer(file) for file in files]
+        to_row = person_schema.to_row
+        for person in read_persons(path):
+            # crc32 rather than hash(), which differs between processes for strings
+            bucket = zlib.crc32("\x1f".join(map(str, key(person))).encode()) % count
+            writers[bucket].writerow(to_row(person))
+    finally:
+        for file in files:
+            file.close()
+    return paths
+
+
+def _read_partition(path: str) -> Iterator[Person]:
+    with open(path, "r", newline="") as file:
+        yield from map(person_schema.from_row, csv.reader(file))
+
+
+def _diff_maps(
+    old: Iterable[Person], new: Iterable[Person], key: Callable, stats: DeltaStats
+) -> Iterator[Change]:
+    old_by_key: Dict[tuple, Person] = {}
+    for person in old:
+        if old_by_key.setdefault(key(person), person) is not person:
+            stats.duplicates += 1
+
+    seen = set()
+    for person in new:
+        current = key(person)
+        if current in seen:
+            stats.duplicates += 1
+            continue
+        seen.add(current)
+
+        previous = old_by_key.pop(current, None)
+        if previous is None:
+            change = Change(ADDED, current, new=person)
+        elif record_digest(previous) == record_digest(person):
+            stats.unchanged += 1
+            continue
+        else:
+            change = Change(CHANGED, current, old=previous, new=person)
+        stats.count(change)
+        yield change
+
+    for current, person in old_by_key.items():
+        change = Change(REMOVED, current, old=person)
+        stats.count(change)
+        yield change
+
+
+def diff_partitioned(
+    old_path: str,
+    new_path: str,
+    keys: Sequence[str],
+    memory_bytes: int = DEFAULT_MEMORY_BYTES,
+    partitions: Optional[int] = None,
+    temp_dir: Optional[str] = None,
+    stats: Optional[DeltaStats] = None,
+) -> Iterator[Change]:
+    """
+    Compares two snapshot files by hash partitioning. Snapshots that fit the budget are compared
+    in memory without writing partitions.
+
+    :param old_path (str): The old snapshot (CSV or JSON lines, possibly compressed).
+    :param new_path (str): The new snapshot.
+    :param keys (Sequence[str]): The key fields.
+    :param memory_bytes (int): The approximate memory for one partition of the old snapshot.
+    :param partitions (int): The number of partitions; by default estimated from the old file's
+        size and the budget.
+    :param temp_dir (str): Where partitions are written; defaults to the system temp directory.
+    :param stats (DeltaStats): Filled in with counts, if given.
+
+    :return Iterator[Change]: The changes, grouped by partition; within one, added and changed
+        records come in new snapshot order, followed by the removed ones.
+    """
+    key = key_function(keys)
+    stats = stats if stats is not None else DeltaStats()
+    count = partitions or _partition_count(old_path, memory_bytes)
+    stats.partitions = count
+
+    if count == 1:
+        yield from _diff_maps(read_persons(old_path), read_persons(new_path), key, stats)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="snapshot-delta-", dir=temp_dir) as directory:
+        old_parts = _partition(old_path, key, directory, "old", count)
+        new_parts = _partition(new_path, key, directory, "new", count)
+        for old_part, new_part in zip(old_parts, new_parts):
+            yield from _diff_maps(_read_partition(old_part), _read_partition(new_part), key, stats)
+            os.remove(old_part)
+            os.remove(new_part)
+
+
+def diff_snapshots(
+    old_path: str,
+    new_path: str,
+    keys: Sequence[str] = ("name",),
+    method: str = "hash",
+    memory_bytes: int = DEFAULT_MEMORY_BYTES,
+    temp_dir: Optional[str] = None,
+    stats: Optional[DeltaStats] = None,
+) -> Iterator[Change]:
+    """
+    Compares two snapshot files with bounded memory.
+
+    :param old_path (str): The old snapshot (CSV or JSON lines, possibly compressed).
+    :param new_path (str): The new snapshot.
+    :param keys (Sequence[str]): The key fields.
+    :param method (str): "hash" (faster) or "sort" (changes in key order).
+    :param memory_bytes (int): The approximate memory budget.
+    :param temp_dir (str): Where partitions or sort runs are written.
+    :param stats (DeltaStats): Filled in with counts, if given.
+
+    :return Iterator[Change]: The changes.
+    """
+    if method == "hash":
+        return diff_partitioned(
+            old_path, new_path, keys, memory_bytes, temp_dir=temp_dir, stats=stats
+        )
+    if method == "sort":
+        # Half the budget each, since both sorts are merging at the same time
+        return diff_sorted(
+            sorted_persons(read_persons(old_path), keys, memory_bytes // 2, temp_dir=temp_dir),
+            sorted_persons(read_persons(new_path), keys, memory_bytes // 2, temp_dir=temp_dir),
+            keys,
+            stats,
+        )
+    raise ValueError(f"Unknown method: {method!r}")
+
+
+# Patches
+
+
+def write_patch(path: str, changes: Iterable[Change], keys: Sequence[str]) -> DeltaStats:
+    """
+    Writes changes to a patch file: a header line, then one compact JSON array per change:
+        ["+", row]                 an added record
+        ["-", key, old digest]     a removed record
+        ["~", row, old digest]     a changed record, with its new content
+
+    :param path (str): The patch file; compressed if the name ends in ".gz", ".xz" or ".bz2".
+    :param changes (Iterable[Change]): The changes, e.g. from diff_snapshots.
+    :param keys (Sequence[str]): The key fields the changes were computed with.
+
+    :return DeltaStats: The number of changes of each kind written.
+    """
+    stats = DeltaStats()
+    dumps = json.JSONEncoder(separators=(",", ":")).encode
+    to_row = person_schema.to_row
+    with open_file(path, "w", encoding="utf-8", parallel=True) as file:
+        header = {
+            "format": PATCH_FORMAT,
+            "version": PATCH_VERSION,
+            "keys": list(keys),
+            "fields": person_schema.fieldnames,
+        }
+        file.write(dumps(header) + "\n")
+        for change in changes:
+            stats.count(change)
+            if change.kind == ADDED:
+                operation = ["+", to_row(change.new)]
+            elif change.kind == REMOVED:
+                operation = ["-", list(change.key), record_digest(change.old).hex()]
+            else:
+                operation = ["~", to_row(change.new), record_digest(change.old).hex()]
+            file.write(dumps(operation) + "\n")
+    return stats
+
+
+def read_patch(path: str) -> Tuple[dict, Iterator[list]]:
+    """
+    :param path (str): A patch file written by write_patch.
+
+    :return Tuple[dict, Iterator[list]]: The header, and the operations as a stream.
+    """
+    file = open_file(path, "r", encoding="utf-8")
+    header = json.loads(file.readline() or "{}")
+    if header.get("format") != PATCH_FORMAT or header.get("version") != PATCH_VERSION:
+        file.close()
+        raise ValueError(f"{path} is not a version {PATCH_VERSION} {PATCH_FORMAT} file.")
+
+    def operations() -> Iterator[list]:
+        with file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    return header, operations()
+
+
+def apply_patch(snapshot_path: str, patch_path: str, output_path: str) -> DeltaStats:
+    """
+    Applies a patch to the snapshot it was made from, writing the new snapshot.
+
+    The snapshot is streamed; only the patch's operations are held in memory, keyed by record
+    key, which is small as long as most records are unchanged. Records keep their order; added
+    records are appended at the end. Operations that don't match the snapshot (a removed or
+    changed record that is missing or has a different digest, or an added record that already
+    exists) are reported and counted as conflicts; the patch's version of the record wins.
+
+    :param snapshot_path (str): The old snapshot.
+    :param patch_path (str): The patch file.
+    :param output_path (str): The file to write; must differ from the snapshot.
+
+    :return DeltaStats: What was applied.
+    """
+    header, operations = read_patch(patch_path)
+    key = key_function(header["keys"])
+    from_row = person_schema.from_row
+
+    added: Dict[tuple, Person] = {}
+    pending: Dict[tuple, Tuple[Optional[Person], str]] = {}  # Removed (None) or changed
+    for operation in operations:
+        if operation[0] == "+":
+            person = from_row(operation[1])
+            added[key(person)] = person
+        elif operation[0] == "-":
+            pending[tuple(operation[1])] = (None, operation[2])
+        else:
+            person = from_row(operation[1])
+            pending[key(person)] = (person, operation[2])
+
+    stats = DeltaStats()
+
+    def patched() -> Iterator[Person]:
+        for person in read_persons(snapshot_path):
+            current = key(person)
+            if current in added:
+                print(f"Conflict: added record {current} already exists. Replacing it.")
+                stats.conflicts += 1
+                continue
+            operation = pending.pop(current, None)
+            if operation is None:
+                stats.unchanged += 1
+                yield person
+                continue
+
+            replacement, digest = operation
+            if record_digest(person).hex() != digest:
+                print(f"Conflict: record {current} differs from the one the patch was made from.")
+                stats.conflicts += 1
+            if replacement is None:
+                stats.removed += 1
+            else:
+                stats.changed += 1
+                yield replacement
+
+        for current, (replacement, _) in pending.items():
+            print(f"Conflict: record {current} is not in the snapshot.")
+            stats.conflicts += 1
+            if replacement is not None:
+                stats.changed += 1
+                yield replacement
+
+        stats.added += len(added)
+        yield from added.values()
+
+    write_persons(output_path, patched())
+    return stats
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from file_operations import FileOperations
+
+    random.seed(7)
+    cities = ["New York", "London", "Paris", "Tokyo", "Berlin"]
+    old_path = "data/snapshot_old.ignore.csv"
+    new_path = "data/snapshot_new.ignore.csv"
+    patch_path = "data/snapshot.ignore.patch.gz"
+    rows = 200_000
+
+    old = [Person(f"Person {i}", random.randrange(90), random.choice(cities)) for i in range(rows)]
+    new = [person for person in old if random.random() > 0.01]  # ~1% removed
+    for i in random.sample(range(len(new)), len(new) // 50):  # ~2% changed
+        new[i] = Person(new[i].name, new[i].age + 1, new[i].city)
+    new += [Person(f"Person {rows + i}", 30, "Lagos") for i in range(rows // 100)]  # ~1% added
+    random.shuffle(new)
+    FileOperations().write_csv(old_path, old)
+    FileOperations().write_csv(new_path, new)
+
+    start_time = time.perf_counter()
+    old_by_name = {person.name: person for person in FileOperations().read_csv(old_path)}
+    new_by_name = {person.name: person for person in FileOperations().read_csv(new_path)}
+    common = old_by_name.keys() & new_by_name.keys()
+    naive = len(old_by_name.keys() ^ new_by_name.keys()) + sum(
+        1 for name in common if old_by_name[name] != new_by_name[name]
+    )
+    print(f"Both snapshots in dicts: {naive} changes in {time.perf_counter() - start_time:.2f}s")
+    del old_by_name, new_by_name
+
+    # A small budget, to force partitioning and a spilling sort
+    for method in ("hash", "sort"):
+        stats = DeltaStats()
+        start_time = time.perf_counter()
+        changes = diff_snapshots(
+            old_path, new_path, ["name"], method, memory_bytes=4 * 1024 * 1024, stats=stats
+        )
+        written = write_patch(patch_path, changes, ["name"])
+        print(f"{method}: {stats} in {time.perf_counter() - start_time:.2f}s")
+        assert written.added + written.removed + written.changed == naive
+
+    print(
+        f"Patch: {os.path.getsize(patch_path) >> 10} KiB, "
+        f"new snapshot: {os.path.getsize(new_path) >> 10} KiB"
+    )
+    applied_path = "data/snapshot_applied.ignore.csv"
+    print(apply_patch(old_path, patch_path, applied_path))
+    applied = sorted(read_persons(applied_path), key=attrgetter("name"))
+    assert applied == sorted(new, key=attrgetter("name")), "The patched snapshot differs"
+    print("Patched snapshot matches the new one")
@@ -1,23 +1,68 @@
-import threading
+import json
+import os
 import time
 
-def print_numbers():
-  for i in range(10):
-    print(i)
-    time.sleep(1)
+from warlock_utils_package import SKIP, ThreadPipeline
 
-def print_letters():
-  for letter in "abcde":
-    print(letter)
-    time.sleep(1)
+DIRECTORY = "data/thread_pipeline.ignore"
 
-t1 = threading.Thread(target=print_numbers)
-t2 = threading.Thread(target=print_letters)
+# Simulated storage latency per file access, like a network share; the local files used here are
+# in the page cache, where reads and writes are too fast for threads to overlap anything
+LATENCY = 0.002
 
-t1.start()
-t2.start()
 
-t1.join()
-t2.join()
+def read_file(path):
+    time.sleep(LATENCY)
+    with open(path, "r") as file:
+        return path, file.read()
 
-print("Done")
+
+def parse(entry):
+    path, text = entry
+    rows = [line.split(",") for line in text.splitlines() if line]
+    return (path, rows) if rows else SKIP
+
+
+def transform(entry):
+    path, rows = entry
+    return path, [{"name": name, "age": int(age)} for name, age in rows if int(age) >= 18]
+
+
+def write_file(entry):
+    path, adults = entry
+    target = path.replace(".csv", ".json")
+    time.sleep(LATENCY)
+    with open(target, "w") as file:
+        file.write(json.dumps(adults))
+    return target, len(adults)
+
+
+if __name__ == "__main__":
+    os.makedirs(DIRECTORY, exist_ok=True)
+    paths = []
+    for i in range(500):
+        path = os.path.join(DIRECTORY, f"people_{i}.csv")
+        with open(path, "w") as file:
+            file.writelines(f"Person {j},{(i + j) % 90}\n" for j in range(200))
+        paths.append(path)
+
+    start_time = time.perf_counter()
+    sequential = [write_file(transform(parse(read_file(path)))) for path in paths]
+    print(f"Sequential: {time.perf_counter() - start_time:.3f}s")
+
+    # Reads and writes overlap with parsing; at most 16 files wait between any two stages
+    pipeline = (
+        ThreadPipeline(queue_size=16, ordered=True)
+        .stage(read_file, workers=4, name="read")
+        .stage(parse, workers=2)
+        .stage(transform, workers=2)
+        .stage(write_file, workers=4, name="write")
+    )
+    start_time = time.perf_counter()
+    results = list(pipeline.run(paths))
+    print(f"Pipeline: {time.perf_counter() - start_time:.3f}s")
+    assert results == sequential
+
+    print(f"{sum(count for _, count in results)} adults written to {len(results)} files")
+    print(pipeline.report())
+    print("Done")
@@ -0,0 +1,302 @@
+import asyncio
+import hashlib
+import random
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterable, List, Optional
+
+import aiohttp
+
+from http_cache import HttpCache, CachingSession
+
+# Statuses worth retrying: the server is overloaded or failed transiently
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class FetchResult:
+    """
+    The outcome of fetching one URL. The body itself is never kept, only its size and (optionally)
+    its digest.
+    """
+
+    url: str
+    status: Optional[int] = None
+    size: int = 0
+    digest: Optional[str] = None
+    elapsed: float = 0.0
+    attempts: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status is not None and self.status < 400
+
+
+class UrlFetcher:
+    """
+    Fetches large numbers of URLs concurrently over one pooled session.
+
+    - Concurrency is bounded by a semaphore, and connections by a TCPConnector with a per-host
+      limit, keep-alive and a DNS cache, so thousands of URLs never mean thousands of sockets.
+    - Bodies are streamed in chunks and only their size (and optionally a hash) is recorded, so
+      memory stays O(concurrency * chunk size) regardless of response sizes.
+    - Each attempt has its own timeout; connection errors, timeouts and retryable statuses are
+      retried with exponential backoff and full jitter. The concurrency slot is only held
+      during an attempt, so a URL backing off doesn't keep others from being fetched.
+
+    Usage:
+        async with UrlFetcher(concurrency=100) as fetcher:
+            async for result in fetcher.fetch_iter(urls):
+                print(result.url, result.status, result.size)
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 100,
+        limit_per_host: int = 0,
+        timeout: float = 10.0,
+        connect_timeout: Optional[float] = 5.0,
+        retries: int = 2,
+        backoff: float = 0.2,
+        max_backoff: float = 5.0,
+        hash_algorithm: Optional[str] = None,
+        chunk_size: int = 64 * 1024,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        cache: Optional[HttpCache] = None,
+    ):
+        """
+        :param concurrency (int): The maximum number of requests in flight.
+        :param limit_per_host (int): The maximum connections per host; 0 means only `concurrency`
+            applies.
+        :param timeout (float): The total time allowed for one attempt, including the body.
+        :param connect_timeout (float): The time allowed to get a connection, or None.
+        :param retries (int): How many times a failed request is retried.
+        :param backoff (float): The base delay in seconds; attempt n waits up to backoff * 2**n.
+        :param max_backoff (float): The upper bound of a single delay.
+        :param hash_algorithm (str): A hashlib algorithm name to digest bodies with, or None to
+            only count their size.
+        :param chunk_size (int): The size of the chunks bodies are read in.
+        :param keepalive_timeout (float): How long idle connections are kept for reuse.
+        :param dns_cache_ttl (int): How long resolved host names are cached, in seconds.
+        :param cache (HttpCache): A cache to fetch through, or None. Cached bodies are read whole
+            instead of streamed, since the cache has to keep them.
+        """
+        if hash_algorithm is not None:
+            hashlib.new(hash_algorithm)  # Fail early on an unknown algorithm
+
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hash_algorithm = hash_algorithm
+        self.chunk_size = chunk_size
+        self.cache = cache
+
+        self._timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self._connector_options = dict(
+            limit=concurrency,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=dns_cache_ttl,
+            use_dns_cache=True,
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "UrlFetcher":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def open(self):
+        """
+        Creates the session. Must be called from within the event loop that will use it.
+        """
+        if self._session is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**self._connector_options),
+                timeout=self._timeout,
+            )
+
+    async def close(self):
+        """
+        Closes the session and its pooled connections.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _delay(self, attempt: int) -> float:
+        # Full jitter: spreads retries out so failed requests don't come back in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    async def _attempt(self, url: str, result: FetchResult):
+        hasher = hashlib.new(self.hash_algorithm) if self.hash_algorithm else None
+        size = 0
+
+        if self.cache is not None:
+            async with CachingSession(self._session, self.cache).get(url) as response:
+                result.status = response.status
+                if response.status in RETRY_STATUSES:
+                    return
+                size = len(response.body)
+                if hasher is not None:
+                    hasher.update(response.body)
+
+        else:
+            async with self._session.get(url) as response:
+                result.status = response.status
+                if response.status in RETRY_STATUSES:
+                    return
+
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    size += len(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+
+        result.size = size
+        result.digest = hasher.hexdigest() if hasher is not None else None
+
+    async def fetch(self, url: str) -> FetchResult:
+        """
+        Fetches one URL, retrying transient failures. Never raises for network errors; they are
+        recorded on the result instead.
+
+        :param url (str): The URL to fetch.
+
+        :return FetchResult: The status, body size, digest and timing of the last attempt.
+        """
+        if self._session is None:
+            raise RuntimeError("UrlFetcher is not open; use 'async with UrlFetcher()'.")
+
+        result = FetchResult(url=url)
+        start_time = time.perf_counter()
+
+        for attempt in range(self.retries + 1):
+            result.attempts = attempt + 1
+            result.error = None
+            async with self._semaphore:
+                try:
+                    await self._attempt(url, result)
+                    if result.status not in RETRY_STATUSES:
+                        break
+                    result.error = f"HTTP {result.status}"
+                except asyncio.TimeoutError:
+                    result.error = "Timed out"
+                except aiohttp.ClientError as e:
+                    result.error = f"{type(e).__name__}: {e}"
+
+            # Back off without holding a slot
+            if attempt < self.retries:
+                await asyncio.sleep(self._delay(attempt))
+
+        result.elapsed = time.perf_counter() - start_time
+        return result
+
+    async def fetch_iter(self, urls: Iterable[str]) -> AsyncIterator[FetchResult]:
+        """
+        Fetches URLs and yields results in completion order.
+
+        URLs are pulled from the iterable lazily by `concurrency` workers, so a generator of
+        millions of URLs is never materialized, and at most `concurrency` finished results wait
+        for the consumer (a slow consumer slows the fetching down instead of buffering).
+
+        :param urls (Iterable[str]): The URLs to fetch.
+
+        :return AsyncIterator[FetchResult]: One result per URL, as soon as it completes.
+        """
+        pending = iter(urls)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        done = object()
+
+        async def worker():
+            try:
+                for url in pending:
+                    await results.put(await self.fetch(url))
+            except Exception as e:
+                # Hand unexpected errors (e.g. from the URL iterable) to the consumer to raise
+                await results.put(e)
+            else:
+                await results.put(done)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        running = len(workers)
+
+        try:
+            while running:
+                item = await results.get()
+                if item is done:
+                    running -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            # The consumer may stop early; don't leave requests running in the background
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def fetch_all(self, urls: Iterable[str]) -> List[FetchResult]:
+        """
+        Fetches URLs and returns the results in completion order.
+
+        :param urls (Iterable[str]): The URLs to fetch.
+
+        :return List[FetchResult]: One result per URL.
+        """
+        return [result async for result in self.fetch_iter(urls)]
+
+
+async def benchmark(requests: int = 10_000, concurrency: int = 200, body_size: int = 16 * 1024):
+    """
+    Fetches `requests` URLs from a local aiohttp server and prints the throughput, comparing the
+    size-only and hashing modes.
+
+    :param requests (int): The number of requests per run.
+    :param concurrency (int): The number of requests in flight.
+    :param body_size (int): The size of each response body.
+    """
+    from aiohttp import web
+
+    body = b"x" * body_size
+
+    async def handler(request):
+        return web.Response(body=body)
+
+    app = web.Application()
+    app.router.add_get("/{item}", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    urls = [f"http://127.0.0.1:{port}/{i}" for i in range(requests)]
+
+    try:
+        for hash_algorithm in (None, "sha256"):
+            async with UrlFetcher(concurrency=concurrency, hash_algorithm=hash_algorithm) as fetcher:
+                start_time = time.perf_counter()
+                ok = total = 0
+                async for result in fetcher.fetch_iter(urls):
+                    total += 1
+                    ok += result.ok
+                duration = time.perf_counter() - start_time
+
+            mode = hash_algorithm or "size only"
+            print(
+                f"{mode:>10}: {total} requests ({ok} ok) in {duration:.3f} seconds, "
+                f"{total / duration:,.0f} requests/second"
+            )
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
@@ -3,5 +3,54 @@
 
 # But below simplifies the imports and makes the package more user-friendly.
 
-from .decorators import Decorator, decorator
-from .timing_decorator import timing_decorator
+# The submodules are imported lazily, on first access of one of their names (PEP 562), so
+# `from warlock_utils_package import timing_decorator` doesn't pay for asyncio, tracemalloc and
+# concurrent.futures, which the other submodules pull in. Add new exports to this table.
+
+import importlib
+import sys
+import types
+
+_EXPORTS = {
+    "decorators": ["Decorator", "decorator"],
+    "timing_decorator": ["timing_decorator"],
+    "memory_profile": ["MemoryProfile", "MemoryReport", "memory_profile"],
+    "task_runner": ["TaskRunner", "TaskStats", "RunnerMetrics", "run_tasks"],
+    "loop_monitor": ["LoopMonitor", "run_monitored"],
+    "profiler": ["Profile", "profile"],
+    "pipeline": ["AsyncPipeline", "Pipeline"],
+    "thread_pipeline": ["SKIP", "StageError", "StageMetrics", "ThreadPipeline"],
+}
+
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_MODULES)
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name, value):
+        # However a submodule gets imported (lazily here, `import warlock_utils_package.x`, or
+        # by unpickling one of its classes), the import system then binds it as an attribute of
+        # the package. For timing_decorator and memory_profile that would hide the function of
+        # the same name, so the function is bound instead, as `from .x import x` used to do.
+        if isinstance(value, types.ModuleType) and name in _EXPORTS.get(name, ()):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+
+def __getattr__(name):
+    module_name = _MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(f".{module_name}", __name__)
+    for export in _EXPORTS[module_name]:
+        globals()[export] = getattr(module, export)
+    return globals()[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,4 +1,3 @@
-import asyncio
 import inspect
 from typing import Any
 from functools import wraps
@@ -66,6 +65,9 @@ class Decorator:
                 print(f"Finished calling async function: {self.func.__name__}")
                 return result
 
+            # Imported here: only async functions need it, and it's slow to import
+            import asyncio
+
             # If called within an active event loop, use await directly
             if asyncio.get_running_loop().is_running():
                 return async_wrapper(*args, **kwds)
@@ -81,6 +83,7 @@ class Decorator:
 
 
 if __name__ == "__main__":
+    import asyncio
 
     async def main():
 
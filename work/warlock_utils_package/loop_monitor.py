@@ -0,0 +1,307 @@
+import asyncio
+import inspect
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Dict, List, Optional, Tuple
+
+# Set to 1 to enable the monitor in scripts started with run_monitored
+ENV_VAR = "LOOP_MONITOR"
+
+_ASYNC_FLAGS = inspect.CO_COROUTINE | inspect.CO_ITERABLE_COROUTINE | inspect.CO_ASYNC_GENERATOR
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+_HANDLE_RUN = asyncio.events.Handle._run.__code__
+
+Location = Tuple[str, int, str]  # (file name, line number, function name)
+
+
+@dataclass
+class Offender:
+    """
+    All the stalls attributed to one location: the innermost coroutine (or, for plain callbacks,
+    function) that was running while the loop was blocked.
+    """
+
+    location: Location
+    task: Optional[str] = None
+    count: int = 0
+    total: float = 0.0
+    worst: float = 0.0
+    stack: List[str] = field(default_factory=list)  # Captured during the worst stall
+
+
+def _location(frames: List[traceback.FrameSummary], codes: List, callback) -> Location:
+    # Prefer the innermost async function: that is the code that forgot to await something
+    for summary, code in zip(reversed(frames), reversed(codes)):
+        if code.co_flags & _ASYNC_FLAGS and not summary.filename.startswith(_ASYNCIO_DIR):
+            return summary.filename, summary.lineno, summary.name
+
+    # A plain callback: the first frame the event loop called into
+    internal = [i for i, f in enumerate(frames) if f.filename.startswith(_ASYNCIO_DIR)]
+    if internal and internal[-1] + 1 < len(frames):
+        frame = frames[internal[-1] + 1]
+        return frame.filename, frame.lineno, frame.name
+
+    # The callback itself has no frame (a builtin such as time.sleep); name it instead
+    code = getattr(callback, "__code__", None)
+    name = getattr(callback, "__qualname__", repr(callback))
+    if code is not None:
+        return code.co_filename, code.co_firstlineno, name
+    return "<builtin>", 0, name
+
+
+class LoopMonitor:
+    """
+    Detects event loop stalls and the code causing them.
+
+    A heartbeat callback is scheduled on the loop every `interval` seconds and records how late it
+    runs (the loop lag). A watchdog thread checks on the heartbeat; when it is overdue by more than
+    `threshold`, the loop is stuck in a callback or task step, so the watchdog captures the loop
+    thread's stack from `sys._current_frames()`. Once the loop resumes, the stall is attributed to
+    the innermost coroutine on that stack, e.g. an `async def` making a blocking network call.
+
+    The overhead is one short callback per interval and four thread wake-ups per threshold; no
+    tracing or debug mode is involved, so it can stay enabled in production.
+
+    Usage:
+        async def main():
+            async with LoopMonitor(threshold=0.1) as monitor:
+                ...
+            print(monitor.report())
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        interval: float = 0.05,
+        stack_limit: int = 40,
+        max_samples: int = 10_000,
+    ):
+        """
+        :param threshold (float): A stall at least this long, in seconds, is recorded with its stack.
+        :param interval (float): The heartbeat period in seconds.
+        :param stack_limit (int): The maximum number of frames captured per stall.
+        :param max_samples (int): How many recent lag samples are kept for percentiles.
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.stack_limit = stack_limit
+
+        self.samples: deque = deque(maxlen=max_samples)
+        self.sample_count = 0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.offenders: Dict[Location, Offender] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread = 0
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._due = 0.0  # When the next heartbeat should run, in perf_counter time
+        self._capture: Optional[tuple] = None  # (frames, codes, callback, task) of a stall
+
+    async def __aenter__(self) -> "LoopMonitor":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self):
+        """
+        Starts monitoring the running event loop. Must be called from the loop's thread.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stopped.clear()
+        self._schedule()
+
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self):
+        """
+        Stops the heartbeat and the watchdog thread.
+        """
+        self._stopped.set()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def _schedule(self):
+        self._due = time.perf_counter() + self.interval
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _beat(self):
+        lag = max(0.0, time.perf_counter() - self._due)
+        self.samples.append(lag)
+        self.sample_count += 1
+        self.max_lag = max(self.max_lag, lag)
+
+        with self._lock:
+            capture, self._capture = self._capture, None
+
+        if lag >= self.threshold:
+            self.stalls += 1
+            if capture is not None:
+                self._record(lag, *capture)
+
+        if not self._stopped.is_set():
+            self._schedule()
+
+    def _watch(self):
+        # Capture at half the threshold, so short stalls are not missed between wake-ups; the
+        # capture is only kept if the stall turns out to reach the threshold
+        while not self._stopped.wait(self.threshold / 4):
+            with self._lock:
+                overdue = time.perf_counter() - self._due
+                if overdue < self.threshold / 2 or self._capture is not None:
+                    continue
+
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is None:
+                    continue
+
+                codes = []
+                callback = None
+                walker = frame
+                while walker is not None and len(codes) < self.stack_limit:
+                    codes.append(walker.f_code)
+                    if walker.f_code is _HANDLE_RUN:
+                        # The loop is running a callback; remember which one
+                        callback = getattr(walker.f_locals.get("self"), "_callback", None)
+                    walker = walker.f_back
+                codes.reverse()
+                frames = list(traceback.extract_stack(frame, limit=self.stack_limit))
+
+                task = None
+                try:
+                    current = asyncio.current_task(self._loop)
+                    task = current.get_name() if current is not None else None
+                except RuntimeError:
+                    pass
+
+                self._capture = (frames, codes, callback, task)
+
+    def _record(self, duration, frames, codes, callback, task):
+        location = _location(frames, codes, callback)
+        offender = self.offenders.get(location)
+        if offender is None:
+            offender = self.offenders[location] = Offender(location=location, task=task)
+
+        offender.count += 1
+        offender.total += duration
+        if duration > offender.worst:
+            offender.worst = duration
+            offender.task = task
+            offender.stack = traceback.format_list(frames)
+
+    def worst_offenders(self, n: int = 10) -> List[Offender]:
+        """
+        :param n (int): The number of offenders.
+
+        :return List[Offender]: The locations that blocked the loop longest in total.
+        """
+        return sorted(self.offenders.values(), key=lambda o: o.total, reverse=True)[:n]
+
+    def percentile(self, fraction: float) -> float:
+        """
+        :param fraction (float): e.g. 0.99 for the 99th percentile.
+
+        :return float: That percentile of the recent lag samples, in seconds.
+        """
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def report(self, n: int = 5, stacks: bool = True) -> str:
+        """
+        :param n (int): The number of offenders to list.
+        :param stacks (bool): Whether to include the stack captured for the worst offender.
+
+        :return str: A human readable summary.
+        """
+        lines = [
+            f"Event loop lag: {self.sample_count} samples, "
+            f"p50 {self.percentile(0.5) * 1000:.1f}ms, p99 {self.percentile(0.99) * 1000:.1f}ms, "
+            f"max {self.max_lag * 1000:.1f}ms",
+            f"Stalls of {self.threshold * 1000:.0f}ms or more: {self.stalls}",
+        ]
+
+        offenders = self.worst_offenders(n)
+        for offender in offenders:
+            filename, lineno, name = offender.location
+            lines.append(
+                f"  {offender.total * 1000:9.1f}ms total, {offender.count:4} stalls, "
+                f"worst {offender.worst * 1000:.1f}ms  {name} ({filename}:{lineno})"
+                + (f" in task {offender.task}" if offender.task else "")
+            )
+
+        if stacks and offenders:
+            lines.append("Stack of the worst stall:")
+            lines.extend(line.rstrip("\n") for line in offenders[0].stack)
+
+        return "\n".join(lines)
+
+
+def run_monitored(
+    main: Awaitable,
+    enabled: Optional[bool] = None,
+    threshold: float = 0.1,
+    interval: float = 0.05,
+):
+    """
+    A drop-in replacement for `asyncio.run(main)` that prints a LoopMonitor report at the end.
+
+    :param main: The coroutine to run.
+    :param enabled (bool): Whether to monitor; by default, only when the LOOP_MONITOR
+        environment variable is set to a non-empty value other than 0.
+    :param threshold (float): See LoopMonitor.
+    :param interval (float): See LoopMonitor.
+
+    :return: The coroutine's result.
+    """
+    if enabled is None:
+        enabled = os.getenv(ENV_VAR, "") not in ("", "0")
+    if not enabled:
+        return asyncio.run(main)
+
+    monitor = LoopMonitor(threshold=threshold, interval=interval)
+
+    async def monitored():
+        async with monitor:
+            return await main
+
+    try:
+        return asyncio.run(monitored())
+    finally:
+        print(monitor.report(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+
+    async def blocking_fetch():
+        # Looks async, but blocks the loop like a synchronous HTTP client would
+        time.sleep(0.3)
+
+    async def well_behaved():
+        await asyncio.sleep(0.3)
+
+    async def main():
+        await asyncio.gather(well_behaved(), blocking_fetch(), blocking_fetch())
+        asyncio.get_running_loop().call_soon(time.sleep, 0.15)
+        await asyncio.sleep(0.3)
+
+    run_monitored(main(), enabled=True)
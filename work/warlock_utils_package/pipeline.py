@@ -0,0 +1,502 @@
+"""
+Lazy, composable data pipelines.
+
+Every stage pulls items from the previous one on demand, so only the items in flight are held in
+memory: memory is bounded by batch and window sizes, not by the size of the data.
+
+    rows = (
+        Pipeline(csv.DictReader(file))
+        .map(parse_row)
+        .filter(None)
+        .dedupe(key=lambda person: person.name)
+        .batch(1000)
+    )
+    for batch in rows:
+        ...
+
+AsyncPipeline offers the same stages over async iterables. Async generators only produce an item
+when the next stage asks for one, so a slow stage naturally slows down the stages before it;
+`buffer` adds a bounded queue between stages to let them overlap without unbounded buffering.
+"""
+
+import asyncio
+import inspect
+import itertools
+from collections import OrderedDict, deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+# Sync stages
+
+
+def batch(iterable: Iterable, size: int) -> Iterator[list]:
+    """
+    Groups items into lists of `size` (the last one may be shorter).
+    """
+    if size < 1:
+        raise ValueError("Batch size must be at least 1.")
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def window(iterable: Iterable, size: int, step: int = 1) -> Iterator[tuple]:
+    """
+    Yields sliding windows of `size` consecutive items, advancing by `step`. Windows shorter than
+    `size` at the end are dropped.
+    """
+    if size < 1 or step < 1:
+        raise ValueError("Window size and step must be at least 1.")
+    items: deque = deque(maxlen=size)
+    skip = 0
+    for item in iterable:
+        items.append(item)
+        if skip:
+            skip -= 1
+            continue
+        if len(items) == size:
+            yield tuple(items)
+            skip = step - 1
+
+
+class _Seen:
+    # The keys already seen; with a limit, only the most recent `max_keys` are remembered
+    def __init__(self, max_keys: Optional[int]):
+        self.max_keys = max_keys
+        self.keys = set() if max_keys is None else OrderedDict()
+
+    def add(self, key) -> bool:
+        if self.max_keys is None:
+            if key in self.keys:
+                return False
+            self.keys.add(key)
+            return True
+
+        if key in self.keys:
+            self.keys.move_to_end(key)
+            return False
+        self.keys[key] = None
+        if len(self.keys) > self.max_keys:
+            self.keys.popitem(last=False)
+        return True
+
+
+def dedupe(
+    iterable: Iterable, key: Optional[Callable] = None, max_keys: Optional[int] = None
+) -> Iterator:
+    """
+    Drops items whose key was already seen, keeping the first occurrence.
+
+    :param key: Computes the key of an item; defaults to the item itself.
+    :param max_keys: Remember only this many recent keys, bounding memory at the cost of letting
+        duplicates that are far apart through. None remembers every key.
+    """
+    seen = _Seen(max_keys)
+    for item in iterable:
+        if seen.add(item if key is None else key(item)):
+            yield item
+
+
+def _apply_chunk(func: Callable, chunk: list) -> list:
+    # Module level, so it can be pickled for process pools
+    return [func(item) for item in chunk]
+
+
+def parallel_map(
+    func: Callable,
+    iterable: Iterable,
+    workers: Optional[int] = None,
+    chunk_size: int = 1000,
+    kind: str = "process",
+    ordered: bool = True,
+    executor: Optional[Executor] = None,
+) -> Iterator:
+    """
+    Applies `func` to every item in a process or thread pool.
+
+    Items are sent in chunks, so the per-task overhead (and for processes, pickling) is paid once
+    per chunk. At most 2 * workers chunks are in flight: the input is only consumed as fast as the
+    pool works through it, unlike `Executor.map`, which submits everything up front.
+
+    :param func: The function to apply. For processes it must be picklable (module level).
+    :param workers: The pool size; defaults to the executor's default.
+    :param chunk_size: The number of items per task.
+    :param kind: "process" or "thread", used when no executor is given.
+    :param ordered: Yield results in input order; otherwise in completion order.
+    :param executor: An existing pool to use instead of creating one.
+    """
+    if kind not in ("process", "thread"):
+        raise ValueError(f"Unknown pool kind: {kind!r}")
+
+    owned = executor is None
+    if owned:
+        pool_class = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+        executor = pool_class(max_workers=workers)
+    max_in_flight = 2 * (workers or getattr(executor, "_max_workers", 4))
+
+    chunks = batch(iterable, chunk_size)
+    pending: deque = deque()
+    try:
+        for chunk in chunks:
+            pending.append(executor.submit(_apply_chunk, func, chunk))
+            while len(pending) >= max_in_flight:
+                if ordered:
+                    yield from pending.popleft().result()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                        yield from future.result()
+
+        while pending:
+            if ordered:
+                yield from pending.popleft().result()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield from future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+class Pipeline:
+    """
+    A chain of lazy stages over an iterable. Each method returns a new Pipeline; nothing runs
+    until the pipeline is iterated or a terminal method (collect, count, reduce, for_each) is
+    called. A pipeline can be iterated only once, like the iterator it wraps.
+    """
+
+    def __init__(self, source: Iterable):
+        self._source = source
+
+    def __iter__(self) -> Iterator:
+        return iter(self._source)
+
+    def map(self, func: Callable) -> "Pipeline":
+        return Pipeline(map(func, self._source))
+
+    def filter(self, predicate: Optional[Callable]) -> "Pipeline":
+        """
+        Keeps the items for which `predicate` is true; None keeps the truthy items.
+        """
+        return Pipeline(filter(predicate, self._source))
+
+    def batch(self, size: int) -> "Pipeline":
+        return Pipeline(batch(self._source, size))
+
+    def flatten(self) -> "Pipeline":
+        return Pipeline(itertools.chain.from_iterable(self._source))
+
+    def window(self, size: int, step: int = 1) -> "Pipeline":
+        return Pipeline(window(self._source, size, step))
+
+    def dedupe(self, key: Optional[Callable] = None, max_keys: Optional[int] = None) -> "Pipeline":
+        return Pipeline(dedupe(self._source, key, max_keys))
+
+    def take(self, n: int) -> "Pipeline":
+        return Pipeline(itertools.islice(self._source, n))
+
+    def tee(self, n: int = 2) -> Tuple["Pipeline", ...]:
+        """
+        Splits the pipeline into n independent pipelines. Items are buffered until every branch
+        has consumed them, so branches should be iterated roughly in step (e.g. zipped).
+        """
+        return tuple(Pipeline(branch) for branch in itertools.tee(self._source, n))
+
+    def parallel_map(self, func: Callable, **options) -> "Pipeline":
+        """
+        Like map, but in a process or thread pool. See `parallel_map` for the options.
+        """
+        return Pipeline(parallel_map(func, self._source, **options))
+
+    def collect(self) -> list:
+        return list(self._source)
+
+    def count(self) -> int:
+        return sum(1 for _ in self._source)
+
+    def reduce(self, func: Callable, initial: Any) -> Any:
+        result = initial
+        for item in self._source:
+            result = func(result, item)
+        return result
+
+    def for_each(self, func: Callable) -> None:
+        for item in self._source:
+            func(item)
+
+
+# Async stages
+
+
+async def _aiter(iterable) -> AsyncIterator:
+    if hasattr(iterable, "__aiter__"):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
+
+
+async def _call(func: Callable, item):
+    result = func(item)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def amap(func: Callable, iterable: AsyncIterable) -> AsyncIterator:
+    async for item in iterable:
+        yield await _call(func, item)
+
+
+async def afilter(predicate: Optional[Callable], iterable: AsyncIterable) -> AsyncIterator:
+    async for item in iterable:
+        if (item if predicate is None else await _call(predicate, item)):
+            yield item
+
+
+async def abatch(iterable: AsyncIterable, size: int) -> AsyncIterator[list]:
+    if size < 1:
+        raise ValueError("Batch size must be at least 1.")
+    chunk = []
+    async for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def aflatten(iterable: AsyncIterable) -> AsyncIterator:
+    async for items in iterable:
+        for item in items:
+            yield item
+
+
+async def awindow(iterable: AsyncIterable, size: int, step: int = 1) -> AsyncIterator[tuple]:
+    if size < 1 or step < 1:
+        raise ValueError("Window size and step must be at least 1.")
+    items: deque = deque(maxlen=size)
+    skip = 0
+    async for item in iterable:
+        items.append(item)
+        if skip:
+            skip -= 1
+            continue
+        if len(items) == size:
+            yield tuple(items)
+            skip = step - 1
+
+
+async def adedupe(
+    iterable: AsyncIterable, key: Optional[Callable] = None, max_keys: Optional[int] = None
+) -> AsyncIterator:
+    seen = _Seen(max_keys)
+    async for item in iterable:
+        if seen.add(item if key is None else key(item)):
+            yield item
+
+
+async def atake(iterable: AsyncIterable, n: int) -> AsyncIterator:
+    if n <= 0:
+        return
+    count = 0
+    async for item in iterable:
+        yield item
+        count += 1
+        if count >= n:
+            return
+
+
+async def abuffer(iterable: AsyncIterable, size: int) -> AsyncIterator:
+    """
+    Runs the upstream stages in a separate task that stays up to `size` items ahead of the
+    consumer, so producing and consuming overlap; when the buffer is full, the producer waits.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+    done = object()
+
+    async def produce():
+        try:
+            async for item in iterable:
+                await queue.put((item, None))
+        except Exception as e:
+            await queue.put((done, e))
+        else:
+            await queue.put((done, None))
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+
+async def aparallel_map(
+    func: Callable,
+    iterable: AsyncIterable,
+    concurrency: int = 10,
+    chunk_size: int = 1,
+    ordered: bool = True,
+    executor: Optional[Executor] = None,
+) -> AsyncIterator:
+    """
+    Applies `func` to items concurrently, with at most `concurrency` calls (or chunks) in flight.
+
+    Coroutine functions run as tasks on the loop. Plain functions run in `executor` (the loop's
+    default thread pool if None) in chunks of `chunk_size` items, so CPU-bound work can use a
+    ProcessPoolExecutor without blocking the loop.
+
+    :param ordered: Yield results in input order; otherwise in completion order.
+    """
+    loop = asyncio.get_running_loop()
+    is_async = inspect.iscoroutinefunction(func)
+
+    async def run_chunk(chunk) -> list:
+        return await asyncio.gather(*(func(item) for item in chunk))
+
+    def start(chunk) -> asyncio.Future:
+        if is_async:
+            return asyncio.create_task(run_chunk(chunk))
+        return loop.run_in_executor(executor, _apply_chunk, func, chunk)
+
+    pending: deque = deque()
+
+    async def drain_one():
+        if ordered:
+            return await pending.popleft()
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        future = done.pop()
+        pending.remove(future)
+        return future.result()
+
+    try:
+        async for chunk in abatch(iterable, chunk_size):
+            pending.append(start(chunk))
+            while len(pending) >= concurrency:
+                for result in await drain_one():
+                    yield result
+        while pending:
+            for result in await drain_one():
+                yield result
+    finally:
+        # The consumer stopped early or failed: don't leave work running in the background
+        for future in pending:
+            future.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+class AsyncPipeline:
+    """
+    The async counterpart of Pipeline, over an async iterable (or a plain iterable). Functions
+    passed to map and filter may be sync or async.
+    """
+
+    def __init__(self, source):
+        self._source = _aiter(source)
+
+    def __aiter__(self) -> AsyncIterator:
+        return self._source
+
+    def _then(self, stage) -> "AsyncPipeline":
+        return AsyncPipeline(stage)
+
+    def map(self, func: Callable) -> "AsyncPipeline":
+        return self._then(amap(func, self._source))
+
+    def filter(self, predicate: Optional[Callable]) -> "AsyncPipeline":
+        return self._then(afilter(predicate, self._source))
+
+    def batch(self, size: int) -> "AsyncPipeline":
+        return self._then(abatch(self._source, size))
+
+    def flatten(self) -> "AsyncPipeline":
+        return self._then(aflatten(self._source))
+
+    def window(self, size: int, step: int = 1) -> "AsyncPipeline":
+        return self._then(awindow(self._source, size, step))
+
+    def dedupe(
+        self, key: Optional[Callable] = None, max_keys: Optional[int] = None
+    ) -> "AsyncPipeline":
+        return self._then(adedupe(self._source, key, max_keys))
+
+    def take(self, n: int) -> "AsyncPipeline":
+        return self._then(atake(self._source, n))
+
+    def buffer(self, size: int) -> "AsyncPipeline":
+        return self._then(abuffer(self._source, size))
+
+    def parallel_map(self, func: Callable, **options) -> "AsyncPipeline":
+        """
+        Like map, but concurrent. See `aparallel_map` for the options.
+        """
+        return self._then(aparallel_map(func, self._source, **options))
+
+    async def collect(self) -> List:
+        return [item async for item in self._source]
+
+    async def count(self) -> int:
+        count = 0
+        async for _ in self._source:
+            count += 1
+        return count
+
+    async def for_each(self, func: Callable) -> None:
+        async for item in self._source:
+            await _call(func, item)
+
+
+if __name__ == "__main__":
+    print(Pipeline(range(20)).filter(lambda x: x % 3).map(lambda x: x * x).batch(4).collect())
+    print(Pipeline("abcdef").window(3, step=2).collect())
+    print(Pipeline([3, 1, 3, 2, 1]).dedupe().collect())
+
+    evens, odds = Pipeline(range(10)).tee()
+    print(list(zip(evens.filter(lambda x: x % 2 == 0), odds.filter(lambda x: x % 2))))
+
+    print(Pipeline(range(10)).parallel_map(abs, workers=2, chunk_size=3, kind="thread").collect())
+
+    async def slow_square(x):
+        await asyncio.sleep(0.01)
+        return x * x
+
+    async def main():
+        squares = (
+            AsyncPipeline(range(100))
+            .parallel_map(slow_square, concurrency=20)
+            .buffer(10)
+            .take(10)
+        )
+        print(await squares.collect())
+
+    asyncio.run(main())
@@ -0,0 +1,369 @@
+import asyncio
+import inspect
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+FAIL_FAST = "fail_fast"
+COLLECT = "collect"
+
+
+@dataclass
+class TaskStats:
+    """
+    Scheduling metrics for one task submitted to a TaskRunner.
+    """
+
+    name: str
+    priority: int
+    submitted_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    status: str = "queued"  # queued, running, ok, error, timeout or cancelled
+    error: Optional[BaseException] = None
+
+    @property
+    def queue_wait(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def run_time(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+@dataclass
+class RunnerMetrics:
+    """
+    Aggregate metrics for a TaskRunner.
+    """
+
+    tasks: List[TaskStats] = field(default_factory=list)
+    loop_lag_max: float = 0.0
+    loop_lag_samples: int = 0
+    loop_lag_total: float = 0.0
+    wall_time: float = 0.0
+
+    def count(self, status: str) -> int:
+        return sum(1 for task in self.tasks if task.status == status)
+
+    def summary(self) -> dict:
+        """
+        :return dict: Counts per status, mean and max queue wait and run time, and loop lag, with
+            times in seconds.
+        """
+        waits = [t.queue_wait for t in self.tasks if t.queue_wait is not None]
+        runs = [t.run_time for t in self.tasks if t.run_time is not None]
+        return {
+            "tasks": len(self.tasks),
+            **{
+                status: self.count(status)
+                for status in ("ok", "error", "timeout", "cancelled")
+            },
+            "queue_wait_mean": sum(waits) / len(waits) if waits else 0.0,
+            "queue_wait_max": max(waits, default=0.0),
+            "run_time_mean": sum(runs) / len(runs) if runs else 0.0,
+            "run_time_max": max(runs, default=0.0),
+            "loop_lag_mean": (
+                self.loop_lag_total / self.loop_lag_samples if self.loop_lag_samples else 0.0
+            ),
+            "loop_lag_max": self.loop_lag_max,
+            "wall_time": self.wall_time,
+        }
+
+    def report(self) -> str:
+        """
+        :return str: A one-line human readable summary.
+        """
+        s = self.summary()
+        return (
+            f"{s['tasks']} tasks ({s['ok']} ok, {s['error']} failed, {s['timeout']} timed out, "
+            f"{s['cancelled']} cancelled) in {s['wall_time']:.3f}s | "
+            f"queue wait mean {s['queue_wait_mean'] * 1000:.1f}ms max {s['queue_wait_max'] * 1000:.1f}ms | "
+            f"run time mean {s['run_time_mean'] * 1000:.1f}ms max {s['run_time_max'] * 1000:.1f}ms | "
+            f"loop lag max {s['loop_lag_max'] * 1000:.1f}ms"
+        )
+
+
+class _Job:
+    __slots__ = ("factory", "future", "stats", "timeout")
+
+    def __init__(self, factory, future, stats, timeout):
+        self.factory = factory
+        self.future = future
+        self.stats = stats
+        self.timeout = timeout
+
+    def discard(self):
+        # A queued coroutine object that will never run must be closed, or Python warns about it
+        if inspect.iscoroutine(self.factory):
+            self.factory.close()
+        if not self.future.done():
+            self.future.cancel()
+        self.stats.status = "cancelled"
+
+
+class TaskRunner:
+    """
+    Structured concurrency for groups of coroutines, built on asyncio.TaskGroup.
+
+    - At most `max_concurrency` tasks run at a time; the rest wait in a priority queue (a lower
+      number runs first, ties run in submission order).
+    - Each task can have a deadline, after which it is cancelled and counts as timed out.
+    - With the "fail_fast" policy, the first failure cancels every running and queued task and the
+      runner raises an ExceptionGroup on exit, as TaskGroup does. With "collect", failures are
+      recorded on the task handles and in `errors`, and everything else keeps running.
+    - An optional progress callback is called after every task, and queue wait, run time and
+      event loop lag are recorded in `metrics`.
+
+    Leaving the `async with` block waits for every submitted task, including tasks submitted by
+    other tasks.
+
+    Usage:
+        async with TaskRunner(max_concurrency=10) as runner:
+            handles = [runner.submit(fetch, url, timeout=5) for url in urls]
+        results = [handle.result() for handle in handles]
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        policy: str = FAIL_FAST,
+        timeout: Optional[float] = None,
+        on_progress: Optional[Callable[[TaskStats, int, int], Any]] = None,
+        lag_interval: Optional[float] = 0.05,
+    ):
+        """
+        :param max_concurrency (int): The maximum number of tasks running at once.
+        :param policy (str): "fail_fast" or "collect".
+        :param timeout (float): The default deadline per task in seconds, or None.
+        :param on_progress (callable): Called as on_progress(stats, finished, submitted) after
+            each task finishes.
+        :param lag_interval (float): How often the event loop lag is sampled, or None to not
+            sample it.
+        """
+        if policy not in (FAIL_FAST, COLLECT):
+            raise ValueError(f"Unknown policy: {policy!r}")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+
+        self.max_concurrency = max_concurrency
+        self.policy = policy
+        self.timeout = timeout
+        self.on_progress = on_progress
+        self.lag_interval = lag_interval
+
+        self.metrics = RunnerMetrics()
+        self.errors: List[BaseException] = []
+
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._group: Optional[asyncio.TaskGroup] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: List[_Job] = []
+        self._finished = 0
+        self._closed = False
+        self._started_at = 0.0
+
+    async def __aenter__(self) -> "TaskRunner":
+        if self._group is not None or self._closed:
+            raise RuntimeError("A TaskRunner can only be entered once.")
+
+        self._started_at = time.perf_counter()
+        self._group = asyncio.TaskGroup()
+        await self._group.__aenter__()
+
+        self._workers = [
+            self._group.create_task(self._worker(), name=f"task-runner-worker-{i}")
+            for i in range(self.max_concurrency)
+        ]
+        if self.lag_interval:
+            self._workers.append(self._group.create_task(self._sample_lag()))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                await self._queue.join()
+        except BaseException as e:
+            # With fail_fast, a failing task cancels this (the parent) task; TaskGroup turns that
+            # into an ExceptionGroup below
+            exc_type, exc, tb = type(e), e, e.__traceback__
+        finally:
+            self._closed = True
+            for worker in self._workers:
+                worker.cancel()
+
+        try:
+            return await self._group.__aexit__(exc_type, exc, tb)
+        finally:
+            for job in self._running:
+                job.discard()
+            while not self._queue.empty():
+                self._queue.get_nowait()[2].discard()
+            self.metrics.wall_time = time.perf_counter() - self._started_at
+
+    def submit(
+        self,
+        func: Callable[..., Awaitable] | Awaitable,
+        *args,
+        priority: int = 0,
+        timeout: Optional[float] = None,
+        name: Optional[str] = None,
+        **kwargs,
+    ) -> asyncio.Future:
+        """
+        Queues a task.
+
+        :param func: A coroutine function, called with `args` and `kwargs` only when the task
+            starts, or an already created coroutine.
+        :param priority (int): Lower numbers run first.
+        :param timeout (float): The deadline for this task, overriding the runner's default.
+        :param name (str): A name for the metrics; defaults to the function's name.
+
+        :return asyncio.Future: Resolves to the task's result, or its exception.
+        """
+        if self._closed:
+            raise RuntimeError("The TaskRunner is closed.")
+
+        if inspect.iscoroutine(func):
+            factory = func
+            default_name = func.__qualname__
+        else:
+            factory = lambda: func(*args, **kwargs)  # noqa: E731
+            default_name = getattr(func, "__qualname__", repr(func))
+
+        stats = TaskStats(
+            name=name or default_name, priority=priority, submitted_at=time.perf_counter()
+        )
+        self.metrics.tasks.append(stats)
+        job = _Job(
+            factory,
+            asyncio.get_running_loop().create_future(),
+            stats,
+            self.timeout if timeout is None else timeout,
+        )
+        self._queue.put_nowait((priority, next(self._sequence), job))
+        return job.future
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: _Job):
+        stats = job.stats
+        stats.status = "running"
+        stats.started_at = time.perf_counter()
+        self._running.append(job)
+
+        try:
+            coroutine = job.factory if inspect.iscoroutine(job.factory) else job.factory()
+            async with asyncio.timeout(job.timeout):
+                result = await coroutine
+        except TimeoutError as e:
+            stats.status = "timeout" if job.timeout is not None else "error"
+            error = e
+        except asyncio.CancelledError:
+            stats.status = "cancelled"
+            job.future.cancel()
+            # Only the worker being cancelled stops it; a job that raised CancelledError on its
+            # own (e.g. by awaiting a cancelled future) is just done, and the worker moves on
+            if asyncio.current_task().cancelling():
+                raise
+            error = None
+        except Exception as e:
+            stats.status = "error"
+            error = e
+        else:
+            stats.status = "ok"
+            job.future.set_result(result)
+            error = None
+        finally:
+            stats.finished_at = time.perf_counter()
+            self._running.remove(job)
+
+        if error is not None:
+            stats.error = error
+            self.errors.append(error)
+            job.future.set_exception(error)
+            # Failures are reported through the runner, so unawaited handles must not warn
+            job.future.exception()
+
+        self._finished += 1
+        if self.on_progress is not None:
+            self.on_progress(stats, self._finished, len(self.metrics.tasks))
+
+        if error is not None and self.policy == FAIL_FAST:
+            raise error
+
+    async def _sample_lag(self):
+        metrics = self.metrics
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.lag_interval)
+            lag = max(0.0, time.perf_counter() - start - self.lag_interval)
+            metrics.loop_lag_samples += 1
+            metrics.loop_lag_total += lag
+            metrics.loop_lag_max = max(metrics.loop_lag_max, lag)
+
+
+async def run_tasks(
+    coroutines: Iterable[Awaitable],
+    max_concurrency: int = 10,
+    policy: str = FAIL_FAST,
+    timeout: Optional[float] = None,
+) -> List[Any]:
+    """
+    A bounded, structured replacement for `asyncio.gather`.
+
+    :param coroutines: The coroutines to run.
+    :param max_concurrency (int): The maximum number running at once.
+    :param policy (str): "fail_fast" raises an ExceptionGroup on the first failure; "collect"
+        returns exceptions in place of results, like gather(return_exceptions=True).
+    :param timeout (float): The deadline per coroutine, or None.
+
+    :return List[Any]: The results in submission order.
+    """
+    async with TaskRunner(max_concurrency, policy=policy, timeout=timeout, lag_interval=None) as runner:
+        handles = [runner.submit(coroutine) for coroutine in coroutines]
+    return [handle.exception() or handle.result() for handle in handles]
+
+
+if __name__ == "__main__":
+
+    async def work(n):
+        await asyncio.sleep(0.01 * n)
+        if n == 7:
+            raise ValueError(f"Task {n} failed")
+        return n * n
+
+    async def main():
+        async with TaskRunner(
+            max_concurrency=3,
+            policy=COLLECT,
+            timeout=0.08,
+            on_progress=lambda stats, done, total: print(
+                f"[{done}/{total}] {stats.name} {stats.status}"
+            ),
+        ) as runner:
+            handles = [runner.submit(work, n, priority=-n, name=f"work({n})") for n in range(10)]
+
+        print([h.result() if not h.exception() else repr(h.exception()) for h in handles])
+        print(runner.metrics.report())
+
+        try:
+            async with TaskRunner(max_concurrency=3) as runner:
+                for n in range(10):
+                    runner.submit(work, n)
+        except ExceptionGroup as group:
+            print(f"Fail fast: {group.exceptions!r}, {runner.metrics.report()}")
+
+    asyncio.run(main())
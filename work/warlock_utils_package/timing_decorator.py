@@ -1,5 +1,4 @@
 import time
-import asyncio
 from functools import wraps
 import inspect
 